@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import os
@@ -7,6 +7,8 @@ import json
 from datetime import datetime
 import uuid
 import time
+import random
+import threading
 import google.generativeai as genai
 from PIL import Image as PILImage
 import sys
@@ -16,8 +18,19 @@ import sys
 # ------------------------------------------------------------------
 sys.path.append(str(Path(__file__).parent.parent))
 from config.config import Config
-from utils.recommendation import DiseaseRecommendationEngine
+from utils.recommendation import DiseaseRecommendationEngine, localize_recommendation, recommendation_json
+from utils.translation_cache import TranslationCache
+from utils.disease_labels import disease_labels, display_name
+from utils.knowledge_search import KnowledgeBaseIndex
 from utils.weather_api import WeatherDataIntegrator
+from utils.job_queue import JobQueue, QueueFullError, sse_event
+from utils.metrics import metrics
+from utils.json_parsing import IncrementalObjectParser, invalid_fields, parse_model_json
+from utils.chatbot_cache import ChatbotAnswerCache
+from utils.diagnosis_log import DiagnosisLog
+from backend.chatbot import CropDiseaseChatbot
+from backend.conversation_memory import ConversationMemory
+from backend.conversation_context import RollingContext, estimate_tokens, format_turn
 
 # ------------------------------------------------------------------
 # ✅ Flask App Setup
@@ -42,18 +55,86 @@ print("\n🔍 Initializing Gemini API...")
 gemini_model = None
 weather_api = None
 
-# Disease classes supported by the system
-DISEASE_CLASSES = [
-    'Pepper__bell___Bacterial_spot',
-    'Pepper__bell___healthy',
-    'Potato___Early_blight',
-    'Potato___Late_blight',
-    'Potato___healthy',
-    'Tomato_Bacterial_spot',
-    'Tomato_Early_blight',
-    'Tomato_Late_blight',
-    'Tomato_healthy'
-]
+# Bounded worker pool for asynchronous diagnosis requests
+diagnosis_jobs = JobQueue(
+    'diagnosis',
+    workers=Config.JOB_WORKERS,
+    max_pending=Config.JOB_QUEUE_SIZE,
+    ttl=Config.JOB_TTL_SECONDS
+)
+
+# Answers to repeated farmer questions, keyed on normalised question + language
+chatbot_cache = ChatbotAnswerCache(
+    ttl=Config.CHATBOT_CACHE_TTL,
+    max_entries=Config.CHATBOT_CACHE_MAX_ENTRIES,
+    similarity_threshold=Config.CHATBOT_CACHE_SIMILARITY
+)
+
+# Bounded per-session chat history shared by every chatbot route
+chat_memory = ConversationMemory(
+    max_turns=Config.CHAT_HISTORY_TURNS,
+    session_ttl=Config.CHAT_SESSION_TTL,
+    max_sessions=Config.CHAT_MAX_SESSIONS,
+    max_bytes=Config.CHAT_MEMORY_BYTES
+)
+
+# Rule-based first responder; only unmatched or open-ended questions reach Gemini
+rule_chatbot = CropDiseaseChatbot(memory=chat_memory)
+
+# BM25 index over the disease knowledge base for local answers and grounding. Indexing reads
+# every entry, so it is built by the first chat request that needs it rather than at import
+knowledge_index = None
+knowledge_index_lock = threading.Lock()
+
+
+def get_knowledge_index():
+    """BM25 index of the current knowledge files, built on first use after start-up or a reload"""
+    global knowledge_index
+    DiseaseRecommendationEngine.DISEASE_INFO.maybe_reload()
+    index = knowledge_index
+    if index is None:
+        with knowledge_index_lock:
+            if knowledge_index is None:
+                knowledge_index = KnowledgeBaseIndex(DiseaseRecommendationEngine.DISEASE_INFO)
+            index = knowledge_index
+    return index
+
+
+def drop_knowledge_index(knowledge_base):
+    """Rebuild the index on next use and drop cached answers once the knowledge files change"""
+    global knowledge_index
+    with knowledge_index_lock:
+        knowledge_index = None
+    chatbot_cache.clear()
+
+
+DiseaseRecommendationEngine.DISEASE_INFO.on_reload(drop_knowledge_index)
+
+# Translations of engine recommendations and canned answers; filled in the background
+translation_cache = TranslationCache(
+    Config.TRANSLATION_CACHE_PATH,
+    # Resolved at call time; gemini_translate is defined with the helpers below
+    translate=lambda texts, lang: gemini_translate(texts, lang)
+)
+translation_jobs = JobQueue('translation', workers=1, max_pending=2, ttl=Config.JOB_TTL_SECONDS)
+
+# Labels given to kept uploads, reused as training data
+diagnosis_log = DiagnosisLog(Config.DIAGNOSIS_LOG_PATH)
+
+# Recent turns verbatim plus a rolling summary, so prompts stay bounded; the summary
+# call runs on its own worker so no chat request waits for it
+summary_jobs = JobQueue('summary', workers=1, max_pending=16, ttl=Config.JOB_TTL_SECONDS)
+chat_context = RollingContext(
+    chat_memory,
+    # Resolved at call time; summarize_conversation is defined with the helpers below
+    summarize=lambda summary, transcript, max_tokens: summarize_conversation(summary, transcript, max_tokens),
+    token_budget=Config.CHAT_CONTEXT_TOKENS,
+    summary_tokens=Config.CHAT_SUMMARY_TOKENS,
+    submit=lambda fold: summary_jobs.submit(lambda job: fold())
+)
+
+# Disease classes supported by the system (canonical spellings)
+DISEASE_CLASSES = disease_labels.labels
 
 def load_model_safely():
     """Initialize Gemini API"""
@@ -86,15 +167,12 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def predict_disease_from_image(img_path):
-    """Use Gemini Vision API to analyze plant disease"""
-    img = None
-    try:
-        # Open image using PIL
-        img = PILImage.open(img_path)
-        
-        # Create prompt for Gemini
-        prompt = f"""You are an expert plant pathologist and agricultural advisor. Analyze this image carefully.
+def build_full_diagnosis_prompt(lang=None):
+    """Prompt asking Gemini for the diagnosis and the whole treatment plan"""
+    language = ''
+    if lang and lang != 'en':
+        language = f"\n- Write reasoning, fertilizer and every list item in {Config.LANGUAGE_NAMES[lang]}; keep the JSON keys and disease names exactly as given"
+    return f"""You are an expert plant pathologist and agricultural advisor. Analyze this image carefully.
 
 FIRST: Determine if this image shows a plant leaf (from crops like Pepper, Potato, Tomato, or similar vegetables/fruits).
 
@@ -134,71 +212,231 @@ IMPORTANT INSTRUCTIONS:
 - Provide SPECIFIC fertilizer recommendations (mention NPK ratios, amounts, timing)
 - Include practical, actionable advice
 - Mention specific product names, dosages, and application schedules where possible
-- Consider the stage of disease when recommending treatments"""
+- Consider the stage of disease when recommending treatments{language}"""
 
-        # Generate response from Gemini
-        response = gemini_model.generate_content([prompt, img])
+
+def build_compact_diagnosis_prompt():
+    """Prompt asking Gemini only for the label; treatment comes from the local engine"""
+    return f"""You are an expert plant pathologist. Look at this image.
+If it is NOT a crop plant leaf (person, animal, object, landscape, etc.), reply {{"is_leaf": false}}.
+Otherwise reply {{"is_leaf": true, "disease": "<one of: {', '.join(DISEASE_CLASSES)}>", "confidence": <0-100>}}.
+Reply with that JSON object only."""
+
+
+# Output cap for compact mode; the reply is a three-field JSON object
+COMPACT_MAX_OUTPUT_TOKENS = 100
+
+
+# Fields a leaf diagnosis must carry in each prompt mode; a reply without them is unusable
+DIAGNOSIS_FIELDS = {'compact': {'disease': str, 'confidence': (int, float)}}
+DIAGNOSIS_FIELDS['full'] = {
+    **DIAGNOSIS_FIELDS['compact'],
+    'reasoning': str,
+    'fertilizer': str,
+    'immediate_actions': [str],
+    'organic_treatment': [str],
+    'chemical_treatment': [str],
+    'prevention': [str]
+}
+
+
+class DiagnosisUnavailableError(Exception):
+    """Gemini could not produce a usable diagnosis; not the user's fault"""
+
+
+def diagnosis_schema(mode):
+    """JSON response schema declared to Gemini for each prompt mode"""
+    properties = {
+        'is_leaf': {'type': 'boolean'},
+        'message': {'type': 'string'},
+        'disease': {'type': 'string', 'enum': DISEASE_CLASSES},
+        'confidence': {'type': 'number'}
+    }
+    if mode == 'full':
+        string_list = {'type': 'array', 'items': {'type': 'string'}}
+        properties.update({
+            'reasoning': {'type': 'string'},
+            'fertilizer': {'type': 'string'},
+            'immediate_actions': string_list,
+            'organic_treatment': string_list,
+            'chemical_treatment': string_list,
+            'prevention': string_list
+        })
+    return {'type': 'object', 'properties': properties, 'required': ['is_leaf']}
+
+
+def generate_diagnosis(img, mode, on_field=None, lang=None):
+    """One Gemini vision call with the given prompt mode; returns the reply text
+
+    With ``on_field`` the reply is streamed and ``on_field(key, value)`` is
+    called for each top-level field as soon as it closes.
+    """
+    generation_config = {}
+    if Config.GEMINI_STRUCTURED_OUTPUT:
+        generation_config['response_mime_type'] = 'application/json'
+        # Schema output comes back in alphabetical key order (the SDK cannot declare
+        # an ordering), which would hold the label back behind the treatment lists
+        if on_field is None or mode == 'compact':
+            generation_config['response_schema'] = diagnosis_schema(mode)
+    if mode == 'compact':
+        generation_config['max_output_tokens'] = COMPACT_MAX_OUTPUT_TOKENS
+        prompt = build_compact_diagnosis_prompt()
+    else:
+        prompt = build_full_diagnosis_prompt(lang)
+
+    started = time.perf_counter()
+    if on_field is None:
+        response = gemini_model.generate_content([prompt, img], generation_config=generation_config or None)
         response_text = response.text.strip()
+    else:
+        response = gemini_model.generate_content([prompt, img], generation_config=generation_config or None, stream=True)
+        parser = IncrementalObjectParser()
+        parts = []
+        for chunk in response:
+            text = chunk.text if chunk.parts else ''
+            parts.append(text)
+            for key, value in parser.feed(text):
+                if key == 'disease':
+                    metrics.observe(f'diagnosis.{mode}.label_ms', (time.perf_counter() - started) * 1000)
+                on_field(key, value)
+        response_text = ''.join(parts).strip()
+    gemini_ms = (time.perf_counter() - started) * 1000
+    metrics.observe(f'diagnosis.{mode}.gemini_ms', gemini_ms)
+    prompt_tokens, output_tokens = record_usage(response, f'diagnosis.{mode}')
+    print(f"🔬 Diagnosis ({mode}): {gemini_ms:.0f}ms, tokens in/out {prompt_tokens}/{output_tokens}")
+    return response_text
+
+
+def check_diagnosis(result, mode, response_text, repaired=False):
+    """Raise JSONDecodeError unless ``result`` is a usable reply for the prompt mode
+
+    A repaired truncation can be as little as ``{"is_leaf": true}``, which
+    parses but carries no diagnosis, so leaf replies need every mode field.
+    Repair also closes a label cut off mid-string, so a repaired label must
+    be a known disease.
+    """
+    if not isinstance(result, dict):
+        raise json.JSONDecodeError('Expected a JSON object', response_text, 0)
+    if not isinstance(result.get('is_leaf'), bool):
+        raise json.JSONDecodeError('Reply has no is_leaf flag', response_text, 0)
+    if result['is_leaf']:
+        invalid = invalid_fields(result, DIAGNOSIS_FIELDS[mode])
+        if invalid:
+            raise json.JSONDecodeError(f"Diagnosis is missing or mistypes {', '.join(invalid)}", response_text, 0)
+        if repaired and result['disease'] not in disease_labels:
+            raise json.JSONDecodeError(f"Repaired label {result['disease']!r} is not a known disease", response_text, 0)
+
+
+def parse_diagnosis(img, response_text, mode, on_retry=None):
+    """Parse the reply, repairing or retrying before giving up; returns (result, mode)
+
+    ``on_retry()`` is called before the compact retry, so anything streamed
+    from the rejected reply can be withdrawn.
+    """
+    repaired = False
+    try:
+        result, repaired = parse_model_json(response_text)
+        check_diagnosis(result, mode, response_text, repaired)
+        if repaired:
+            metrics.incr('diagnosis.repairs')
+            print("🩹 Repaired truncated diagnosis JSON")
+        return result, mode
+    except json.JSONDecodeError as e:
+        metrics.incr('diagnosis.repair_failures' if repaired else 'diagnosis.parse_failures')
+        print(f"❌ JSON parsing error: {e}")
+        print(f"Response text: {response_text}")
+
+    # Retry once with the short label-only prompt; the local engine fills in the rest
+    metrics.incr('diagnosis.retries')
+    if on_retry is not None:
+        on_retry()
+    retry_text = generate_diagnosis(img, 'compact')
+    try:
+        result, repaired = parse_model_json(retry_text)
+        check_diagnosis(result, 'compact', retry_text, repaired)
+        return result, 'compact'
+    except json.JSONDecodeError:
+        pass
+    metrics.incr('diagnosis.retry_failures')
+    print(f"❌ Retry reply was not valid JSON either: {retry_text}")
+    raise DiagnosisUnavailableError('Gemini returned malformed JSON twice')
+
+
+def choose_diagnosis_mode():
+    """'full' or 'compact' per Config.DIAGNOSIS_MODE; 'ab' splits requests between them"""
+    mode = Config.DIAGNOSIS_MODE
+    if mode == 'ab':
+        return 'compact' if random.random() < Config.DIAGNOSIS_AB_COMPACT_SHARE else 'full'
+    return mode if mode in ('full', 'compact') else 'compact'
+
+
+def predict_disease_from_image(img_path, mode=None, on_field=None, lang=None):
+    """Use Gemini Vision API to analyze plant disease
+
+    Returns (disease, confidence, recommendation), or (None, message, None) when
+    the image is not a leaf. Raises DiagnosisUnavailableError when Gemini fails.
+    ``on_field`` streams the reply; see generate_diagnosis. ``lang`` asks for
+    Gemini-written text (full mode) in that language.
+    """
+    mode = mode or choose_diagnosis_mode()
+    img = None
+    try:
+        # Open image using PIL
+        img = PILImage.open(img_path)
         
-        # Close the image immediately after sending to Gemini
+        # Generate response from Gemini
+        response_text = generate_diagnosis(img, mode, on_field, lang)
+        result, mode = parse_diagnosis(img, response_text, mode, getattr(on_field, 'reset', None))
+        
+        # Close the image once Gemini is done with it
         if img:
             img.close()
             img = None
         
-        # Extract JSON from response (handle markdown code blocks)
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        # Parse JSON response
-        result = json.loads(response_text)
-        
         # Check if it's a leaf image
         is_leaf = result.get('is_leaf', True)
         if not is_leaf:
             error_message = result.get('message', 'Incorrect image! Please upload a different image with a correct crop leaf.')
             return None, error_message, None
         
-        disease = result.get('disease', 'Unknown')
+        # Validate disease is in our list; an unknown label is reported as-is, never guessed
+        label = str(result.get('disease') or 'Unknown')
+        disease = disease_labels.get(label)
+        if disease is None:
+            metrics.incr('diagnosis.unknown_labels')
+            print(f"⚠️ Gemini returned an unknown disease label: {label}")
+            disease = label
         confidence = float(result.get('confidence', 0))
-        
-        # Build recommendation object from Gemini response
-        recommendation = {
-            'disease': disease.replace('___', ' - ').replace('_', ' '),
-            'confidence': confidence,
-            'reasoning': result.get('reasoning', ''),
-            'fertilizer': result.get('fertilizer', 'Consult local agricultural expert for fertilizer recommendation'),
-            'immediate_actions': result.get('immediate_actions', []),
-            'treatment': {
-                'organic': result.get('organic_treatment', []),
-                'chemical': result.get('chemical_treatment', [])
-            },
-            'prevention': result.get('prevention', [])
-        }
-        
-        # Validate disease is in our list
-        if disease not in DISEASE_CLASSES:
-            # Try to find closest match
-            disease_lower = disease.lower().replace(' ', '_')
-            for valid_disease in DISEASE_CLASSES:
-                if disease_lower in valid_disease.lower():
-                    disease = valid_disease
-                    break
-            else:
-                disease = DISEASE_CLASSES[0]  # Default to first class if no match
+
+        if mode == 'compact':
+            # Same sections as the full prompt, filled in deterministically
+            fraction = confidence / 100 if confidence > 1 else confidence
+            recommendation = DiseaseRecommendationEngine.get_recommendation(disease, fraction)
+            recommendation['confidence'] = confidence
+        else:
+            # Build recommendation object from Gemini response
+            recommendation = {
+                'disease': display_name(disease),
+                'confidence': confidence,
+                'reasoning': result.get('reasoning', ''),
+                'fertilizer': result.get('fertilizer', 'Consult local agricultural expert for fertilizer recommendation'),
+                'immediate_actions': result.get('immediate_actions', []),
+                'treatment': {
+                    'organic': result.get('organic_treatment', []),
+                    'chemical': result.get('chemical_treatment', [])
+                },
+                'prevention': result.get('prevention', [])
+            }
+        recommendation['diagnosis_mode'] = mode
         
         return disease, confidence, recommendation
         
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parsing error: {e}")
-        print(f"Response text: {response_text}")
-        # Return None to indicate invalid image
-        return None, "Incorrect image! Please upload a different image with a correct crop leaf.", None
+    except DiagnosisUnavailableError:
+        raise
     except Exception as e:
         print(f"❌ Gemini API error: {e}")
-        # Return None to indicate error
-        return None, "Incorrect image! Please upload a different image with a correct crop leaf.", None
+        metrics.incr('diagnosis.upstream_errors')
+        raise DiagnosisUnavailableError(str(e)) from e
     finally:
         # Ensure image is closed even if there's an error
         if img:
@@ -247,42 +485,27 @@ def is_likely_leaf(image_path):
 
 
 
-# ------------------------------------------------------------------
-# ✅ Routes
-# ------------------------------------------------------------------
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-@app.route('/upload')
-def upload_page():
-    return render_template('upload.html')
+def format_conversation(summary, recent_turns):
+    """Prompt section carrying earlier turns of this conversation"""
+    if not summary and not recent_turns:
+        return ''
+    lines = ['', 'CONVERSATION SO FAR:']
+    if summary:
+        lines.append(f"Summary of earlier messages: {summary}")
+    lines.extend(format_turn(turn) for turn in recent_turns)
+    return '\n'.join(lines) + '\n'
 
-@app.route('/chatbot')
-def chatbot_page():
-    return render_template('chatbot.html')
 
-@app.route('/api/chatbot', methods=['POST'])
-def chatbot_route():
-    """Chatbot endpoint for farmer assistance"""
-    if gemini_model is None:
-        return jsonify({'success': False, 'error': 'Gemini API not initialized'}), 503
-    
-    try:
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        
-        if not user_message:
-            return jsonify({'success': False, 'error': 'No message provided'}), 400
-        
-        # Create comprehensive farmer-focused prompt
-        prompt = f"""You are a helpful, friendly agricultural assistant chatbot for Indian farmers. Your name is "Krishi Mitra" (Farm Friend).
+def build_chatbot_prompt(user_message, summary='', recent_turns=()):
+    """Create comprehensive farmer-focused prompt"""
+    conversation = format_conversation(summary, recent_turns)
+    return f"""You are a helpful, friendly agricultural assistant chatbot for Indian farmers. Your name is "Krishi Mitra" (Farm Friend).
 
 CONTEXT:
 - You are part of an AI Crop Disease Detection web application
 - The app helps farmers identify crop diseases by uploading leaf photos
 - You help farmers with: app usage, fertilizer information, disease treatments, farming advice, where to buy supplies
-
+{conversation}
 USER QUESTION: {user_message}
 
 INSTRUCTIONS:
@@ -315,13 +538,438 @@ IMPORTANT TOPICS TO COVER WHEN RELEVANT:
 
 Respond naturally and helpfully:"""
 
+def build_grounded_prompt(user_message, notes, summary='', recent_turns=()):
+    """Compact prompt carrying only the retrieved knowledge-base notes"""
+    conversation = format_conversation(summary, recent_turns)
+    reference = '\n'.join(f"- {note}" for note in notes)
+    return f"""You are "Krishi Mitra", a friendly farming assistant for Indian farmers. Answer in simple language, in the farmer's language, in 2-4 short paragraphs with practical doses. Base the answer on the reference notes; suggest the /upload page for a photo diagnosis and a local extension officer if unsure.
+
+REFERENCE NOTES:
+{reference}
+{conversation}
+QUESTION: {user_message}"""
+
+
+def summarize_conversation(summary, transcript, max_tokens):
+    """Fold older turns into the running summary with a short Gemini call"""
+    if gemini_model is None:
+        return None
+    prompt = f"""Summarise this conversation between a farmer and the Krishi Mitra farming assistant in at most {max_tokens * 3 // 4} words.
+Keep crops, diseases, products, doses, the farmer's location and any open questions. Plain text only.
+
+Summary so far: {summary or 'none'}
+
+{chr(10).join(transcript)}
+
+Updated summary:"""
+    response = gemini_model.generate_content(prompt)
+    metrics.incr('chatbot.summaries')
+    record_usage(response, 'chatbot_summary')
+    return response.text.strip()
+
+
+def record_usage(response, label):
+    """Log Gemini's reported token counts when the SDK provides them"""
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    output_tokens = getattr(usage, 'candidates_token_count', None)
+    if prompt_tokens is not None:
+        metrics.observe(f'{label}.prompt_tokens', prompt_tokens)
+    if output_tokens is not None:
+        metrics.observe(f'{label}.output_tokens', output_tokens)
+    return prompt_tokens, output_tokens
+
+
+def has_chat_context(session_id):
+    """True once the session has a summary or a Gemini turn to follow up on
+
+    Only standalone questions are safe to answer from (or store in) the shared
+    cache. This reads the session as it is, so the cache can be checked before
+    any retrieval or summarisation is paid for.
+    """
+    summary, turns = chat_memory.context(session_id)
+    return bool(summary) or any(turn['source'] == 'gemini' for turn in turns)
+
+
+def prepare_chat_prompt(session_id, user_message, lang=Config.DEFAULT_LANGUAGE):
+    """Build the bounded multi-turn prompt for a question Gemini has to answer"""
+    summary, recent_turns = chat_context.build(session_id)
+    notes = get_knowledge_index().snippets(user_message)
+    if notes:
+        metrics.incr('chatbot.grounded')
+        prompt = build_grounded_prompt(user_message, notes, summary, recent_turns)
+    else:
+        prompt = build_chatbot_prompt(user_message, summary, recent_turns)
+    if lang != Config.DEFAULT_LANGUAGE:
+        prompt += f"\n\nReply in {Config.LANGUAGE_NAMES[lang]}."
+
+    context_tokens = estimate_tokens(format_conversation(summary, recent_turns))
+    prompt_tokens = estimate_tokens(prompt)
+    metrics.observe('chatbot.prompt_tokens_est', prompt_tokens)
+    print(f"🧮 Chatbot prompt ~{prompt_tokens} tokens "
+          f"(context ~{context_tokens}, {len(recent_turns)} recent turns, summary {'yes' if summary else 'no'}, "
+          f"{len(notes)} knowledge notes)")
+    return prompt
+
+
+def chat_session_id(data):
+    """Conversation id from the request body, else a per-browser id kept in the Flask session"""
+    session_id = data.get('session_id')
+    if session_id:
+        return str(session_id)[:64]
+    if 'chat_id' not in session:
+        session['chat_id'] = uuid.uuid4().hex
+    return session['chat_id']
+
+
+def answer_from_rules(user_message):
+    """Canned answer when a high-confidence intent matches, else None"""
+    started = time.perf_counter()
+    intent_name, confidence = rule_chatbot.match_intent(user_message)
+    metrics.observe('chatbot.rules_ms', (time.perf_counter() - started) * 1000)
+    if intent_name is None or confidence < Config.CHATBOT_RULE_CONFIDENCE:
+        return None
+    result = rule_chatbot.respond_to_intent(intent_name)
+    result['confidence'] = confidence
+    result['source'] = 'rules'
+    return result
+
+
+def answer_from_knowledge(user_message):
+    """Answer disease-specific questions from the local knowledge base, else None"""
+    index = get_knowledge_index()
+    started = time.perf_counter()
+    result = index.answer(user_message)
+    metrics.observe('chatbot.knowledge_ms', (time.perf_counter() - started) * 1000)
+    if result is not None:
+        result['source'] = 'knowledge'
+    return result
+
+
+def answer_locally(user_message):
+    """First local route that can answer without Gemini, else None"""
+    return answer_from_rules(user_message) or answer_from_knowledge(user_message)
+
+
+def gemini_translate(texts, lang):
+    """Translate a batch of English strings with one Gemini call"""
+    if gemini_model is None:
+        raise RuntimeError('Gemini API not initialized')
+    prompt = f"""Translate each string in this JSON array from English into {Config.LANGUAGE_NAMES[lang]} for Indian farmers.
+Use simple everyday words. Keep numbers, units, doses, NPK ratios, product names and emojis unchanged.
+Reply with a JSON array of exactly {len(texts)} strings in the same order.
+
+{json.dumps(texts, ensure_ascii=False)}"""
+    response = gemini_model.generate_content(prompt, generation_config={
+        'response_mime_type': 'application/json',
+        'response_schema': {'type': 'array', 'items': {'type': 'string'}}
+    })
+    record_usage(response, 'translation')
+    translations, _ = parse_model_json(response.text)
+    if not isinstance(translations, list) or not all(isinstance(t, str) for t in translations):
+        raise ValueError('Translation reply was not a list of strings')
+    return translations
+
+
+def schedule_translations():
+    """Translate strings missed by recent requests on the background worker"""
+    if not translation_cache.has_pending() or gemini_model is None:
+        return
+    try:
+        translation_jobs.submit(lambda job: {'translated': translation_cache.fill_pending()})
+    except QueueFullError:
+        pass  # A fill is already queued and will pick these up
+
+
+def request_language(value):
+    """Validated language code from a request value, or None when unsupported"""
+    if not isinstance(value, str):
+        # Absent, or a JSON number, list or object where a code was expected
+        return Config.DEFAULT_LANGUAGE
+    lang = (value or Config.DEFAULT_LANGUAGE).strip().lower()
+    return lang if lang in Config.SUPPORTED_LANGUAGES else None
+
+
+def unsupported_language_response():
+    return jsonify({
+        'success': False,
+        'error': f"Unsupported language. Use one of: {', '.join(Config.SUPPORTED_LANGUAGES)}"
+    }), 400
+
+
+def localize_answer(answer, lang):
+    """Canned chatbot answer in ``lang`` from the translation cache"""
+    if lang == Config.DEFAULT_LANGUAGE:
+        return answer
+    texts = {key: answer[key] for key in ('response', 'suggestions') if key in answer}
+    localized, complete = translation_cache.localize(texts, lang)
+    if not complete:
+        schedule_translations()
+    return {**answer, **localized, 'lang': lang, 'translation_complete': complete}
+
+
+def remove_upload(filepath):
+    """Delete a rejected upload once PIL has released it"""
+    # Add small delay to ensure file is released
+    time.sleep(0.1)
+    try:
+        os.remove(filepath)
+    except Exception as cleanup_error:
+        print(f"⚠️ Could not delete file: {cleanup_error}")
+
+
+def wants_async():
+    """True when the client opted into the 202 + job id flow"""
+    flag = request.args.get('async') or request.form.get('async') or ''
+    if flag.lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+class DiagnosisProgress:
+    """Publishes a diagnosis to a job's event stream while Gemini is still writing it
+
+    A ``diagnosis`` event (label + confidence) goes out as soon as both fields
+    have closed, then one ``section`` event per treatment section. The final
+    ``done`` event still carries the complete, validated result. If the reply
+    is rejected and retried, a ``reset`` event withdraws what was sent from it.
+    """
+
+    # Gemini field -> section name used in the recommendation payload
+    SECTIONS = {
+        'reasoning': 'reasoning',
+        'fertilizer': 'fertilizer',
+        'immediate_actions': 'immediate_actions',
+        'organic_treatment': 'organic',
+        'chemical_treatment': 'chemical',
+        'prevention': 'prevention'
+    }
+
+    def __init__(self, job, mode):
+        self.job = job
+        self.mode = mode
+        self.fields = {}
+        self.label_sent = False
+        self.sections_sent = set()
+
+    def __call__(self, key, value):
+        self.fields[key] = value
+        if self.fields.get('is_leaf') is False:
+            return
+        if not self.label_sent and 'disease' in self.fields and 'confidence' in self.fields:
+            try:
+                confidence = float(self.fields['confidence'])
+            except (TypeError, ValueError):
+                return
+            self.job.publish('diagnosis', {
+                'disease': disease_labels.get(str(self.fields['disease']), self.fields['disease']),
+                'confidence': round(confidence, 2),
+                'diagnosis_mode': self.mode
+            })
+            self.label_sent = True
+        if self.label_sent:
+            for field, section in self.SECTIONS.items():
+                if field in self.fields:
+                    self._send(section, self.fields[field])
+
+    def reset(self):
+        """Withdraw the label and sections of a rejected reply before the compact retry"""
+        if self.label_sent:
+            self.job.publish('reset', {'reason': 'retry'})
+        self.mode = 'compact'
+        self.fields = {}
+        self.label_sent = False
+        self.sections_sent = set()
+
+    def complete(self, recommendation):
+        """Send whatever sections the stream did not carry (all of them in compact mode)"""
+        if not self.label_sent:
+            return
+        treatment = recommendation.get('treatment', {})
+        for section in self.SECTIONS.values():
+            value = treatment.get(section) if section in ('organic', 'chemical') else recommendation.get(section)
+            if value:
+                self._send(section, value)
+
+    def _send(self, section, value):
+        if section not in self.sections_sent:
+            self.sections_sent.add(section)
+            self.job.publish('section', {'name': section, 'value': value})
+
+
+def localize_text(text, lang):
+    """Fixed message in ``lang`` from the translation cache, English until it is translated"""
+    if lang == Config.DEFAULT_LANGUAGE:
+        return text
+    localized, complete = translation_cache.localize(text, lang)
+    if not complete:
+        schedule_translations()
+    return localized
+
+
+def run_diagnosis(filepath, unique_filename, location, job=None, lang=Config.DEFAULT_LANGUAGE):
+    """Diagnose a saved upload; returns (payload, http_status)
+
+    With a ``job`` the Gemini reply is streamed and partial results are
+    published to the job's events as they arrive. Engine recommendations are
+    served in ``lang`` from the translation cache.
+    """
+    # Basic image validation first; it is local and saves a Gemini call
+    if not is_likely_leaf(filepath):
+        remove_upload(filepath)
+        return {
+            'success': False,
+            'message': localize_text('Incorrect image! Please upload a different image with a correct crop leaf.', lang)
+        }, 400
+
+    mode = choose_diagnosis_mode()
+    progress = DiagnosisProgress(job, mode) if job is not None and Config.DIAGNOSIS_STREAMING else None
+
+    # Predict disease using Gemini AI
+    try:
+        disease, confidence, recommendation = predict_disease_from_image(filepath, mode, progress, lang)
+    except DiagnosisUnavailableError:
+        remove_upload(filepath)
+        return {
+            'success': False,
+            'error': localize_text('We could not analyse this image right now. Please try again in a moment.', lang)
+        }, 502
+
+    # Check if Gemini detected a non-leaf image
+    if disease is None:
+        remove_upload(filepath)
+        return {
+            'success': False,
+            'message': localize_text(confidence, lang)  # confidence contains the error message in this case
+        }, 400
+
+    try:
+        diagnosis_log.append(image_filename=unique_filename, disease=disease, confidence=confidence,
+                             mode=recommendation.get('diagnosis_mode', mode))
+    except OSError as e:
+        print(f"⚠️ Could not record diagnosis: {e}")
+
+    translation_complete = True
+    if lang != Config.DEFAULT_LANGUAGE:
+        recommendation, translation_complete = localize_recommendation(recommendation, lang, translation_cache)
+        if not translation_complete:
+            metrics.incr('translation.incomplete_recommendations')
+            schedule_translations()
+
+    if progress is not None:
+        progress.complete(recommendation)
+
+    # Optional: Weather context
+    weather_data = None
+    disease_risks = []
+    if weather_api:
+        weather_data = weather_api.get_current_weather(location)
+        disease_risks = weather_api.assess_disease_risk(weather_data)
+
+    return {
+        'success': True,
+        'predicted_disease': disease,
+        'confidence': round(confidence, 2),
+        'recommendation': recommendation,  # Now from Gemini AI!
+        'weather': weather_data,
+        'disease_risks': disease_risks,
+        'image_filename': unique_filename,
+        'lang': lang,
+        'translation_complete': translation_complete
+    }, 200
+
+
+def diagnosis_response(payload, status_code):
+    """JSON response for a diagnosis, splicing in the recommendation's pre-serialised body"""
+    recommendation = payload.get('recommendation')
+    if recommendation is None:
+        return jsonify(payload), status_code
+    rest = {key: value for key, value in payload.items() if key != 'recommendation'}
+    body = json.dumps(rest).encode()[:-1] + b', "recommendation": ' + recommendation_json(recommendation) + b'}'
+    return Response(body, status=status_code, mimetype='application/json')
+
+
+def run_diagnosis_job(job, filepath, unique_filename, location, lang):
+    """Worker-pool entry point for asynchronous diagnosis"""
+    payload, status_code = run_diagnosis(filepath, unique_filename, location, job, lang)
+    return {**payload, 'http_status': status_code}
+
+
+# ------------------------------------------------------------------
+# ✅ Routes
+# ------------------------------------------------------------------
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+@app.route('/upload')
+def upload_page():
+    return render_template('upload.html')
+
+@app.route('/chatbot')
+def chatbot_page():
+    return render_template('chatbot.html')
+
+@app.route('/api/chatbot', methods=['POST'])
+def chatbot_route():
+    """Chatbot endpoint for farmer assistance"""
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '').strip()
+        
+        if not user_message:
+            return jsonify({'success': False, 'error': 'No message provided'}), 400
+
+        lang = request_language(data.get('lang'))
+        if lang is None:
+            return unsupported_language_response()
+
+        session_id = chat_session_id(data)
+        local = answer_locally(user_message)
+        if local is not None:
+            metrics.incr(f"chatbot.route.{local['source']}")
+            local = localize_answer(local, lang)
+            chat_memory.append(session_id, user_message, local['response'], source=local['source'])
+            return jsonify({
+                'success': True,
+                **{key: value for key, value in local.items() if key != 'timestamp'}
+            })
+
+        # A cache hit only records the turn: no retrieval, prompt or summary fold
+        has_context = has_chat_context(session_id)
+        cached = None if has_context else chatbot_cache.get(user_message, lang)
+        if cached is not None:
+            metrics.incr('chatbot.route.cache')
+            chat_memory.append(session_id, user_message, cached, source='cache')
+            return jsonify({
+                'success': True,
+                'response': cached,
+                'source': 'cache',
+                'cached': True
+            })
+
+        if gemini_model is None:
+            return jsonify({'success': False, 'error': 'Gemini API not initialized'}), 503
+        
+        metrics.incr('chatbot.route.gemini')
+        prompt = prepare_chat_prompt(session_id, user_message, lang)
+
         # Generate response using Gemini
+        started = time.perf_counter()
         response = gemini_model.generate_content(prompt)
         bot_response = response.text.strip()
+        metrics.observe('chatbot.total_ms', (time.perf_counter() - started) * 1000)
+        prompt_tokens, output_tokens = record_usage(response, 'chatbot')
+        if prompt_tokens is not None:
+            print(f"🧮 Gemini usage: {prompt_tokens} prompt + {output_tokens} output tokens")
+        if not has_context:
+            chatbot_cache.set(user_message, bot_response, lang)
+        chat_memory.append(session_id, user_message, bot_response, source='gemini')
         
         return jsonify({
             'success': True,
-            'response': bot_response
+            'response': bot_response,
+            'source': 'gemini'
         })
         
     except Exception as e:
@@ -331,6 +979,121 @@ Respond naturally and helpfully:"""
             'error': 'Sorry, I encountered an error. Please try again!'
         }), 500
 
+@app.route('/api/chatbot/stream', methods=['POST'])
+def chatbot_stream_route():
+    """Stream the chatbot answer as server-sent events while Gemini generates it"""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '').strip()
+    if not user_message:
+        return jsonify({'success': False, 'error': 'No message provided'}), 400
+
+    lang = request_language(data.get('lang'))
+    if lang is None:
+        return unsupported_language_response()
+
+    session_id = chat_session_id(data)
+    local = answer_locally(user_message)
+    if local is not None:
+        local = localize_answer(local, lang)
+    prompt, has_context, cached = None, False, None
+    if local is None:
+        # A cache hit only records the turn: no retrieval, prompt or summary fold
+        has_context = has_chat_context(session_id)
+        cached = None if has_context else chatbot_cache.get(user_message, lang)
+    if local is None and cached is None:
+        if gemini_model is None:
+            return jsonify({'success': False, 'error': 'Gemini API not initialized'}), 503
+        prompt = prepare_chat_prompt(session_id, user_message, lang)
+
+    def generate():
+        if local is not None:
+            metrics.incr(f"chatbot.route.{local['source']}")
+            chat_memory.append(session_id, user_message, local['response'], source=local['source'])
+            yield sse_event('chunk', {'text': local['response']})
+            yield sse_event('done', {'success': True, 'source': local['source'],
+                                     'ttft_ms': 0, 'total_ms': 0, 'chars': len(local['response'])})
+            return
+
+        if cached is not None:
+            metrics.incr('chatbot.route.cache')
+            chat_memory.append(session_id, user_message, cached, source='cache')
+            yield sse_event('chunk', {'text': cached})
+            yield sse_event('done', {'success': True, 'source': 'cache', 'cached': True,
+                                     'ttft_ms': 0, 'total_ms': 0, 'chars': len(cached)})
+            return
+
+        metrics.incr('chatbot.route.gemini')
+        started = time.perf_counter()
+        first_token_ms = None
+        chars = 0
+        parts = []
+        try:
+            response = gemini_model.generate_content(prompt, stream=True)
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk carried no text (e.g. safety or finish metadata)
+                    continue
+                if not text:
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                    metrics.observe('chatbot_stream.ttft_ms', first_token_ms)
+                chars += len(text)
+                parts.append(text)
+                yield sse_event('chunk', {'text': text})
+
+            total_ms = (time.perf_counter() - started) * 1000
+            metrics.observe('chatbot_stream.total_ms', total_ms)
+            print(f"💬 Chatbot stream: first token {first_token_ms or 0:.0f}ms, total {total_ms:.0f}ms, {chars} chars")
+            record_usage(response, 'chatbot_stream')
+            if parts:
+                bot_response = ''.join(parts).strip()
+                if not has_context:
+                    chatbot_cache.set(user_message, bot_response, lang)
+                chat_memory.append(session_id, user_message, bot_response, source='gemini')
+            yield sse_event('done', {
+                'success': True,
+                'source': 'gemini',
+                'ttft_ms': round(first_token_ms, 1) if first_token_ms is not None else None,
+                'total_ms': round(total_ms, 1),
+                'chars': chars
+            })
+        except Exception as e:
+            print(f"❌ Chatbot stream error: {e}")
+            metrics.incr('chatbot_stream.errors')
+            yield sse_event('error', {
+                'success': False,
+                'error': 'Sorry, I encountered an error. Please try again!'
+            })
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_route():
+    """In-process counters and latency summaries"""
+    routes = {name: metrics.counter(f'chatbot.route.{name}') for name in ('rules', 'knowledge', 'cache', 'gemini')}
+    total = sum(routes.values())
+    routes['upstream_avoided_ratio'] = round((total - routes['gemini']) / total, 4) if total else 0.0
+
+    return jsonify({
+        'success': True,
+        **metrics.snapshot(),
+        'chatbot_routes': routes,
+        'chatbot_cache': chatbot_cache.stats(),
+        'chat_memory': chat_memory.stats(),
+        'knowledge_base': {
+            'version': DiseaseRecommendationEngine.DISEASE_INFO.version,
+            'diseases': len(DiseaseRecommendationEngine.DISEASE_INFO)
+        },
+        'translations': translation_cache.stats()
+    })
+
 @app.route('/api/predict', methods=['POST'])
 def predict_route():
     """Main prediction endpoint"""
@@ -347,6 +1110,10 @@ def predict_route():
     if not allowed_file(file.filename):
         return jsonify({'success': False, 'error': 'Invalid file type'}), 400
 
+    lang = request_language(request.form.get('lang') or request.args.get('lang'))
+    if lang is None:
+        return unsupported_language_response()
+
     try:
         # Save uploaded image
         filename = secure_filename(file.filename)
@@ -354,66 +1121,101 @@ def predict_route():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
         file.save(filepath)
 
-        # Predict disease using Gemini AI
-        disease, confidence, recommendation = predict_disease_from_image(filepath)
-        
-        # Check if Gemini detected a non-leaf image
-        if disease is None:
-            # Add small delay to ensure file is released
-            time.sleep(0.1)
-            try:
-                os.remove(filepath)  # Cleanup
-            except Exception as cleanup_error:
-                print(f"⚠️ Could not delete file: {cleanup_error}")
-            return jsonify({
-                'success': False,
-                'message': confidence  # confidence contains the error message in this case
-            }), 400
+        location = request.form.get('location', Config.DEFAULT_LOCATION)
 
-        # Basic image validation (backup check)
-        if not is_likely_leaf(filepath):
-            # Add small delay to ensure file is released
-            time.sleep(0.1)
+        # Async mode: hand the Gemini call to the worker pool and return immediately
+        if wants_async():
             try:
-                os.remove(filepath)  # Optional cleanup
-            except Exception as cleanup_error:
-                print(f"⚠️ Could not delete file: {cleanup_error}")
-            return jsonify({
-                'success': False,
-                'message': 'Incorrect image! Please upload a different image with a correct crop leaf.'
-                }), 400
-        
-        # Optional: Weather context
-        location = request.form.get('location', Config.DEFAULT_LOCATION)
-        weather_data = None
-        disease_risks = []
-        if weather_api:
-            weather_data = weather_api.get_current_weather(location)
-            disease_risks = weather_api.assess_disease_risk(weather_data)
-
-        # Save to session
-        history = session.get('prediction_history', [])
-        history.append({
-            'timestamp': datetime.now().isoformat(),
-            'disease': disease,
-            'confidence': confidence
-        })
-        session['prediction_history'] = history
+                job = diagnosis_jobs.submit(run_diagnosis_job, filepath, unique_filename, location, lang)
+            except QueueFullError as e:
+                print(f"⚠️ {e}")
+                remove_upload(filepath)
+                response = jsonify({'success': False, 'error': 'Server is busy. Please try again shortly.'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
 
-        return jsonify({
-            'success': True,
-            'predicted_disease': disease,
-            'confidence': round(confidence, 2),
-            'recommendation': recommendation,  # Now from Gemini AI!
-            'weather': weather_data,
-            'disease_risks': disease_risks,
-            'image_filename': unique_filename
-        })
+            response = jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f"/api/jobs/{job.id}",
+                'events_url': f"/api/jobs/{job.id}/events"
+            })
+            response.headers['Location'] = f"/api/jobs/{job.id}"
+            return response, 202
+
+        payload, status_code = run_diagnosis(filepath, unique_filename, location, lang=lang)
+
+        if payload.get('success'):
+            # Save to session
+            history = session.get('prediction_history', [])
+            history.append({
+                'timestamp': datetime.now().isoformat(),
+                'disease': payload['predicted_disease'],
+                'confidence': payload['confidence']
+            })
+            session['prediction_history'] = history
+
+        return diagnosis_response(payload, status_code)
 
     except Exception as e:
         print("❌ Prediction error:", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/feedback', methods=['POST'])
+def feedback_route():
+    """Confirm or correct the diagnosis of a kept upload, for incremental training"""
+    data = request.get_json(silent=True) or {}
+    image_filename = data.get('image_filename', '')
+    if not image_filename or secure_filename(image_filename) != image_filename:
+        return jsonify({'success': False, 'error': 'Invalid image_filename'}), 400
+    if not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], image_filename)):
+        return jsonify({'success': False, 'error': 'Image not found'}), 404
+
+    if data.get('disease'):
+        disease = disease_labels.get(data['disease'])
+        if disease is None:
+            return jsonify({'success': False, 'error': f"Unknown disease: {data['disease']}"}), 400
+    else:
+        # No label given: the user confirms the diagnosis they were shown
+        diagnosed = diagnosis_log.latest(image_filename)
+        disease = disease_labels.get(diagnosed.get('disease')) if diagnosed else None
+        if disease is None:
+            return jsonify({'success': False, 'error': 'No diagnosis to confirm; please provide disease'}), 400
+
+    try:
+        diagnosis_log.confirm(image_filename, disease)
+    except OSError as e:
+        print(f"⚠️ Could not record feedback: {e}")
+        return jsonify({'success': False, 'error': 'Could not record feedback'}), 500
+    metrics.incr('diagnosis.confirmations')
+    return jsonify({'success': True, 'image_filename': image_filename, 'disease': disease})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+    """Poll an asynchronous diagnosis job"""
+    job = diagnosis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events_route(job_id):
+    """Server-sent event stream for an asynchronous diagnosis job"""
+    job = diagnosis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return Response(
+        job.iter_events(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def job_stats_route():
+    """Worker pool and backpressure counters"""
+    return jsonify({'success': True, 'diagnosis': diagnosis_jobs.stats()})
+
 # ------------------------------------------------------------------
 # ✅ Run Flask Server
 # ------------------------------------------------------------------
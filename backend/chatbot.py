@@ -1,12 +1,28 @@
-import re
+import random
 from datetime import datetime
 
+try:
+    from backend.intent_matcher import IntentMatcher
+    from backend.conversation_memory import ConversationMemory
+except ImportError:  # imported from inside backend/
+    from intent_matcher import IntentMatcher
+    from conversation_memory import ConversationMemory
+
 class CropDiseaseChatbot:
     """Rule-based chatbot for crop disease assistance"""
+
+    # Filler words ignored when measuring how much of a message an intent explains
+    STOPWORDS = {
+        'a', 'an', 'the', 'i', 'me', 'my', 'you', 'your', 'we', 'is', 'are', 'am',
+        'do', 'does', 'can', 'could', 'please', 'to', 'of', 'for', 'in', 'on',
+        'and', 'or', 'it', 'this', 'that', 'there', 'what', 'how', 'some', 'any',
+        'with', 'about', 'tell', 'give', 'want', 'need', 'know', 'should', 'will'
+    }
     
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, memory=None):
+        self.memory = memory if memory is not None else ConversationMemory()
         self.intents = self._load_intents()
+        self.matcher = IntentMatcher(self.intents, self.STOPWORDS)
         
     def _load_intents(self):
         """Load intent patterns and responses"""
@@ -87,15 +103,16 @@ class CropDiseaseChatbot:
             }
         }
     
-    def get_response(self, user_message, context=None):
+    def get_response(self, user_message, context=None, session_id='default'):
         """Generate response to user message"""
-        
-        # Store in history
-        self.conversation_history.append({
-            'user': user_message,
-            'timestamp': datetime.now().isoformat()
-        })
-        
+        result = self._respond(user_message, context)
+
+        # Store in this session's history
+        self.memory.append(session_id, user_message, result['response'])
+        return result
+
+    def _respond(self, user_message, context):
+        """Pick the response for a message without touching history"""
         # Clean and lowercase message
         message_lower = user_message.lower().strip()
         
@@ -110,20 +127,11 @@ class CropDiseaseChatbot:
                 }
         
         # Match intents
-        for intent_name, intent_data in self.intents.items():
-            for pattern in intent_data['patterns']:
-                if re.search(pattern, message_lower):
-                    import random
-                    response = random.choice(intent_data['responses'])
-                    
-                    self.conversation_history[-1]['bot'] = response
-                    
-                    return {
-                        'response': response,
-                        'intent': intent_name,
-                        'timestamp': datetime.now().isoformat(),
-                        'suggestions': self._get_suggestions(intent_name)
-                    }
+        intent_name, confidence = self.match_intent(message_lower)
+        if intent_name is not None:
+            result = self.respond_to_intent(intent_name)
+            result['confidence'] = confidence
+            return result
         
         # Default response
         default_response = "I'm not sure I understood that. Could you rephrase? You can ask me about disease symptoms, treatments, prevention methods, or upload an image for diagnosis."
@@ -131,9 +139,32 @@ class CropDiseaseChatbot:
         return {
             'response': default_response,
             'intent': 'unknown',
+            'confidence': 0.0,
             'timestamp': datetime.now().isoformat(),
             'suggestions': ['Upload an image', 'Common diseases', 'Prevention tips']
         }
+
+    def memory_stats(self):
+        """Live sessions and bytes held by conversation history"""
+        return self.memory.stats()
+
+    def match_intent(self, message):
+        """Return (intent_name, confidence) for the best matching intent, or (None, 0.0)
+
+        Confidence is the share of the message's content words that an intent's
+        keyword groups account for, so short focused messages ("hi", "upload photo")
+        score high and open-ended questions that merely contain a keyword score low.
+        """
+        return self.matcher.best(message)
+
+    def respond_to_intent(self, intent_name):
+        """Build the canned response for an intent"""
+        return {
+            'response': random.choice(self.intents[intent_name]['responses']),
+            'intent': intent_name,
+            'timestamp': datetime.now().isoformat(),
+            'suggestions': self._get_suggestions(intent_name)
+        }
     
     def _get_contextual_response(self, message, context):
         """Generate context-aware responses"""
@@ -0,0 +1,103 @@
+import threading
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for Gemini-style tokenisers)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def format_turn(turn):
+    return f"Farmer: {turn['user']}\nKrishi Mitra: {turn['bot'] or ''}"
+
+
+class RollingContext:
+    """Bounded multi-turn context: recent turns verbatim, older turns folded into a summary
+
+    Once the verbatim turns exceed ``token_budget`` the oldest are folded into
+    the session summary until they fit in half the budget, so summarisation
+    runs every few turns rather than on every request. The summary itself is
+    capped at ``summary_tokens``, which keeps the context portion of every
+    prompt under ``token_budget + summary_tokens`` regardless of length.
+
+    With ``submit`` (a callable that runs a function in the background) the
+    summary call is made off the request path: the prompt that triggers a
+    fold carries the current summary and the turns that fit, and the folded
+    summary is in place for the following ones. Without it the fold runs
+    inline and adds one summary call to that request.
+    """
+
+    def __init__(self, memory, summarize=None, token_budget=800, summary_tokens=200, submit=None):
+        self.memory = memory
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.submit = submit
+        self._folding = set()  # sessions with a background fold in flight
+        self._lock = threading.Lock()
+
+    def build(self, session_id):
+        """Return (summary, recent_turns) for the next prompt, folding old turns if needed"""
+        summary, turns = self.memory.context(session_id)
+        costs = [estimate_tokens(format_turn(turn)) for turn in turns]
+        if sum(costs) <= self.token_budget:
+            return summary, turns
+
+        # Fold the oldest turns until what is left fits in half the budget
+        remaining = sum(costs)
+        fold_count = 0
+        while fold_count < len(turns) - 1 and remaining > self.token_budget // 2:
+            remaining -= costs[fold_count]
+            fold_count += 1
+        if fold_count == 0:
+            return summary, turns
+
+        if self.submit is None:
+            if self.fold(session_id, summary, turns[:fold_count]):
+                return self.memory.context(session_id)[0], turns[fold_count:]
+            # Another request folded or the ring buffer dropped these turns meanwhile; use that state
+            return self.memory.context(session_id)
+
+        with self._lock:
+            scheduled = session_id in self._folding
+            self._folding.add(session_id)
+        if not scheduled:
+            try:
+                self.submit(lambda: self._fold_in_background(session_id, summary, turns[:fold_count]))
+            except Exception as e:
+                with self._lock:
+                    self._folding.discard(session_id)
+                print(f"⚠️ Could not schedule summarisation, retrying on the next turn: {e}")
+        return summary, turns[fold_count:]
+
+    def fold(self, session_id, summary, turns):
+        """Summarise ``turns`` into ``summary`` and store it; False if the session changed meanwhile"""
+        new_summary = self._fold(summary, turns)
+        return self.memory.fold(session_id, turns[0]['seq'], turns[-1]['seq'], new_summary, summary)
+
+    def _fold_in_background(self, session_id, summary, turns):
+        try:
+            return self.fold(session_id, summary, turns)
+        finally:
+            with self._lock:
+                self._folding.discard(session_id)
+
+    def _fold(self, summary, turns):
+        new_summary = None
+        if self.summarize is not None:
+            try:
+                new_summary = self.summarize(summary, [format_turn(turn) for turn in turns], self.summary_tokens)
+            except Exception as e:
+                print(f"⚠️ Summarisation failed, using extractive fallback: {e}")
+        if not new_summary:
+            # Extractive fallback: keep the farmer's own questions, newest last
+            new_summary = ' '.join([summary] + [f"Farmer asked: {turn['user']}" for turn in turns]).strip()
+        return self._clip(new_summary.strip())
+
+    def _clip(self, text):
+        """Hard cap on summary size, keeping the most recent part"""
+        max_chars = self.summary_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return '…' + text[-(max_chars - 1):]
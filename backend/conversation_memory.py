@@ -0,0 +1,159 @@
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class Turn:
+    """One user message and the bot's reply"""
+
+    __slots__ = ('seq', 'user', 'bot', 'source', 'timestamp', 'nbytes')
+
+    def __init__(self, seq, user, bot, source, timestamp):
+        self.seq = seq
+        self.user = user
+        self.bot = bot
+        self.source = source
+        self.timestamp = timestamp
+        self.nbytes = sys.getsizeof(self) + sys.getsizeof(user) + sys.getsizeof(bot)
+
+    def to_dict(self):
+        return {'seq': self.seq, 'user': self.user, 'bot': self.bot, 'source': self.source,
+                'timestamp': self.timestamp}
+
+
+class SessionHistory:
+    """Ring buffer of the most recent turns in one conversation, plus a summary of older ones"""
+
+    __slots__ = ('turns', 'summary', 'next_seq', 'last_seen', 'nbytes')
+
+    def __init__(self, max_turns):
+        self.turns = deque(maxlen=max_turns)
+        self.summary = ''
+        self.next_seq = 0  # sequence number of the next turn, so a fold can tell which turns it covers
+        self.last_seen = time.time()
+        self.nbytes = sys.getsizeof(self) + sys.getsizeof(self.turns) + sys.getsizeof(self.summary)
+
+
+class ConversationMemory:
+    """Per-session chat history with LRU/TTL eviction and a hard memory cap"""
+
+    def __init__(self, max_turns=20, session_ttl=1800, max_sessions=10000,
+                 max_bytes=32 * 1024 * 1024, max_chars=2000):
+        self.max_turns = max_turns
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self._sessions = OrderedDict()  # session_id -> SessionHistory, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'turns_recorded': 0, 'evicted_idle': 0, 'evicted_capacity': 0}
+
+    def append(self, session_id, user, bot=None, source='rules'):
+        """Record a turn for the session; `source` says who answered (rules, cache, gemini)"""
+        now = time.time()
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                history = SessionHistory(self.max_turns)
+                self._sessions[session_id] = history
+                self._bytes += history.nbytes + sys.getsizeof(session_id)
+            else:
+                self._sessions.move_to_end(session_id)
+
+            turn = Turn(history.next_seq, user[:self.max_chars], bot[:self.max_chars] if bot else bot, source, now)
+            history.next_seq += 1
+
+            if len(history.turns) == history.turns.maxlen:
+                dropped = history.turns[0]
+                history.nbytes -= dropped.nbytes
+                self._bytes -= dropped.nbytes
+            history.turns.append(turn)
+            history.nbytes += turn.nbytes
+            history.last_seen = now
+            self._bytes += turn.nbytes
+            self._counters['turns_recorded'] += 1
+
+            self._evict(now, keep=session_id)
+
+    def history(self, session_id):
+        """Turns for the session, oldest first"""
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None or time.time() - history.last_seen > self.session_ttl:
+                return []
+            return [turn.to_dict() for turn in history.turns]
+
+    def context(self, session_id):
+        """(summary, turns) for the session, oldest turn first"""
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None or time.time() - history.last_seen > self.session_ttl:
+                return '', []
+            return history.summary, [turn.to_dict() for turn in history.turns]
+
+    def fold(self, session_id, first_seq, last_seq, summary, previous_summary):
+        """Replace turns ``first_seq``..``last_seq`` with an updated summary
+
+        Only applies when the session still starts at ``first_seq`` and still has
+        ``previous_summary``, i.e. no other fold or ring-buffer eviction happened
+        while the summary was written. Returns whether it was applied.
+        """
+        summary = summary[:self.max_chars]
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if (history is None or not history.turns or history.turns[0].seq != first_seq
+                    or history.summary != previous_summary[:self.max_chars]):
+                return False
+            while history.turns and history.turns[0].seq <= last_seq:
+                dropped = history.turns.popleft()
+                history.nbytes -= dropped.nbytes
+                self._bytes -= dropped.nbytes
+            delta = sys.getsizeof(summary) - sys.getsizeof(history.summary)
+            history.summary = summary
+            history.nbytes += delta
+            self._bytes += delta
+            return True
+
+    def clear(self, session_id):
+        with self._lock:
+            self._drop(session_id)
+
+    def stats(self):
+        with self._lock:
+            self._evict(time.time())
+            return {
+                'live_sessions': len(self._sessions),
+                'turns': sum(len(h.turns) for h in self._sessions.values()),
+                'bytes_used': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_sessions': self.max_sessions,
+                'max_turns_per_session': self.max_turns,
+                'session_ttl_seconds': self.session_ttl,
+                **self._counters
+            }
+
+    def _drop(self, session_id):
+        """Remove a session and release its bytes (caller holds the lock)"""
+        history = self._sessions.pop(session_id, None)
+        if history is not None:
+            self._bytes -= history.nbytes + sys.getsizeof(session_id)
+        return history
+
+    def _evict(self, now, keep=None):
+        """Expire idle sessions, then enforce the session and byte caps (caller holds the lock)"""
+        # Sessions are kept in LRU order, so idle ones are always at the front
+        while self._sessions:
+            session_id, history = next(iter(self._sessions.items()))
+            if now - history.last_seen <= self.session_ttl:
+                break
+            self._drop(session_id)
+            self._counters['evicted_idle'] += 1
+
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            self._drop(session_id)
+            self._counters['evicted_capacity'] += 1
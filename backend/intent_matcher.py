@@ -0,0 +1,127 @@
+import re
+
+# Words are runs of letters/digits; keyword phrases are tokenised the same way
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# A pattern we can compile into the keyword trie: \b(alt|alt)\b groups joined by .*
+_GROUP_RE = re.compile(r'\\b\(([^()\\.*+?\[\]{}^$]+)\)\\b')
+
+
+def _parse_pattern(pattern):
+    """Split a keyword pattern into ordered groups of token tuples, or None if it is free-form regex"""
+    groups = []
+    for part in pattern.split('.*'):
+        match = _GROUP_RE.fullmatch(part)
+        if match is None:
+            return None
+        alternatives = []
+        for alt in match.group(1).split('|'):
+            tokens = tuple(TOKEN_RE.findall(alt.lower()))
+            if not tokens or ''.join(tokens) != re.sub(r'[\s\-]', '', alt.lower()):
+                return None
+            alternatives.append(tokens)
+        groups.append(alternatives)
+    return groups
+
+
+class IntentMatcher:
+    """Score every intent against a message in a single scan
+
+    Keyword patterns of the form ``\\b(a|b c)\\b`` (optionally chained with
+    ``.*``) are compiled into one word-level trie shared by all intents, so a
+    message is tokenised once and walked once no matter how many intents exist.
+    Anything else is precompiled and searched as a regular expression.
+    """
+
+    def __init__(self, intents, stopwords=()):
+        self.stopwords = set(stopwords)
+        self.intent_names = list(intents)
+        self._order = {name: i for i, name in enumerate(self.intent_names)}
+        self._trie = {}
+        self._max_phrase = 1
+        self._patterns = []   # (intent_index, number_of_groups)
+        self._regexes = []    # (intent_index, compiled) for free-form patterns
+
+        for intent_index, intent_name in enumerate(self.intent_names):
+            for pattern in intents[intent_name]['patterns']:
+                groups = _parse_pattern(pattern)
+                if groups is None:
+                    self._regexes.append((intent_index, re.compile(pattern)))
+                    continue
+                pattern_index = len(self._patterns)
+                self._patterns.append((intent_index, len(groups)))
+                for group_index, alternatives in enumerate(groups):
+                    for tokens in alternatives:
+                        self._add_phrase(tokens, (pattern_index, group_index))
+
+    def _add_phrase(self, tokens, target):
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(target)
+        self._max_phrase = max(self._max_phrase, len(tokens))
+
+    def scores(self, message):
+        """Return {intent_name: confidence} for every intent that matches"""
+        message = message.lower()
+        tokens = TOKEN_RE.findall(message)
+        content_words = {t for t in tokens if t not in self.stopwords}
+
+        # One pass over the tokens, collecting every keyword phrase that starts at each position
+        hits = {}  # pattern_index -> list of (group_index, start, end)
+        for start in range(len(tokens)):
+            node = self._trie
+            for end in range(start, min(start + self._max_phrase, len(tokens))):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                for pattern_index, group_index in node.get(None, ()):
+                    hits.setdefault(pattern_index, []).append((group_index, start, end + 1))
+
+        covered = {}  # intent_index -> set of tokens explained by that intent
+        for pattern_index, pattern_hits in hits.items():
+            intent_index, group_count = self._patterns[pattern_index]
+            words = self._satisfy(pattern_hits, group_count, tokens)
+            if words is not None:
+                covered.setdefault(intent_index, set()).update(words)
+
+        for intent_index, regex in self._regexes:
+            for match in regex.finditer(message):
+                words = covered.setdefault(intent_index, set())
+                for group in match.groups() or (match.group(0),):
+                    if group:
+                        words.update(TOKEN_RE.findall(group))
+
+        results = {}
+        for intent_index, words in covered.items():
+            score = len(words & content_words) / len(content_words) if content_words else 1.0
+            results[self.intent_names[intent_index]] = round(score, 3)
+        return results
+
+    @staticmethod
+    def _satisfy(pattern_hits, group_count, tokens):
+        """Tokens covered by a pattern whose groups occur in order, or None"""
+        if group_count == 1:
+            return {t for _, start, end in pattern_hits for t in tokens[start:end]}
+
+        pattern_hits.sort(key=lambda hit: hit[1])
+        position = 0
+        words = set()
+        for group_index in range(group_count):
+            for hit_group, start, end in pattern_hits:
+                if hit_group == group_index and start >= position:
+                    words.update(tokens[start:end])
+                    position = end
+                    break
+            else:
+                return None
+        return words
+
+    def best(self, message):
+        """Return (intent_name, confidence) for the highest-scoring intent, or (None, 0.0)"""
+        scores = self.scores(message)
+        if not scores:
+            return None, 0.0
+        # Highest score wins; intent declaration order breaks ties
+        name = max(scores, key=lambda n: (scores[n], -self._order[n]))
+        return name, scores[name]
@@ -0,0 +1,53 @@
+"""Pre-translate every engine recommendation and canned chatbot answer.
+
+Run once after deploying (or after a knowledge-base edit) so that requests in
+any supported language are served from the translation cache straight away:
+
+    python backend/warm_translations.py [--lang hi te]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import app as server
+from config.config import Config
+from utils.recommendation import DiseaseRecommendationEngine, UNTRANSLATED_KEYS
+from utils.translation_cache import _collect_strings
+
+
+FIXED_MESSAGES = (
+    'Incorrect image! Please upload a different image with a correct crop leaf.',
+    'We could not analyse this image right now. Please try again in a moment.',
+)
+
+
+def fixed_texts():
+    """Every string the app serves from the translation cache, apart from knowledge-base answers"""
+    texts = set(FIXED_MESSAGES)
+    for disease_code in DiseaseRecommendationEngine.DISEASE_INFO:
+        for severity in DiseaseRecommendationEngine.SEVERITY_BANDS:
+            entry = DiseaseRecommendationEngine.precomputed(disease_code, severity)
+            _collect_strings(entry.payload, UNTRANSLATED_KEYS, texts)
+    for intent_name, intent in server.rule_chatbot.intents.items():
+        texts.update(intent['responses'])
+        texts.update(server.rule_chatbot._get_suggestions(intent_name))
+    return texts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fill the translation cache ahead of traffic')
+    parser.add_argument('--lang', nargs='+', choices=Config.SUPPORTED_LANGUAGES,
+                        default=[lang for lang in Config.SUPPORTED_LANGUAGES if lang != Config.DEFAULT_LANGUAGE])
+    args = parser.parse_args()
+
+    if not server.load_model_safely():
+        sys.exit('❌ Gemini API not initialized. Please check your GEMINI_API_KEY in .env file')
+
+    texts = fixed_texts()
+    print(f"🌐 {len(texts)} strings to cover in {', '.join(args.lang)}")
+    for lang in args.lang:
+        translated = server.translation_cache.warm(texts, lang)
+        print(f"  {Config.LANGUAGE_NAMES[lang]}: {translated} new translations")
+    print(f"✅ Translation cache: {server.translation_cache.stats()['stored']}")
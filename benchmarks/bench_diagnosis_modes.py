@@ -0,0 +1,65 @@
+"""A/B latency and token comparison of the full and compact diagnosis prompts.
+
+Sends each image through Gemini twice, once per mode, alternating the order
+so neither mode benefits from warm-up. Needs GEMINI_API_KEY in .env.
+
+    python benchmarks/bench_diagnosis_modes.py [--images uploads] [--limit 10]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+import app as diagnosis_app
+from utils.metrics import metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', default=str(Path(__file__).parent.parent / 'uploads'))
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    if not diagnosis_app.load_model_safely():
+        sys.exit(1)
+
+    images = sorted(p for p in Path(args.images).iterdir()
+                    if p.suffix.lower().lstrip('.') in diagnosis_app.ALLOWED_EXTENSIONS)[:args.limit]
+    if not images:
+        print(f"❌ No images found in {args.images}")
+        sys.exit(1)
+
+    agree = 0
+    for i, path in enumerate(images):
+        order = ('full', 'compact') if i % 2 == 0 else ('compact', 'full')
+        labels = {}
+        for mode in order:
+            try:
+                disease, _, _ = diagnosis_app.predict_disease_from_image(str(path), mode=mode)
+            except diagnosis_app.DiagnosisUnavailableError:
+                disease = None
+            labels[mode] = disease
+        agree += labels['full'] == labels['compact']
+        print(f"  {path.name[:50]:<50} full={labels['full']}  compact={labels['compact']}")
+
+    timings = metrics.snapshot()['timings']
+    print("\n" + "=" * 60)
+    print(f"Diagnosis prompt A/B over {len(images)} images (label agreement {agree}/{len(images)})")
+    print("=" * 60)
+    for mode in ('full', 'compact'):
+        print(f"\n{mode}:")
+        for name, unit in (('gemini_ms', 'ms'), ('prompt_tokens', 'tok'), ('output_tokens', 'tok')):
+            summary = timings.get(f'diagnosis.{mode}.{name}')
+            line = f"mean {summary['avg']:7.1f}  min {summary['min']:7.1f}  max {summary['max']:7.1f}" if summary else '-'
+            print(f"  {name:<14} ({unit}) {line}")
+
+    full, compact = timings.get('diagnosis.full.gemini_ms'), timings.get('diagnosis.compact.gemini_ms')
+    if full and compact:
+        print(f"\nCompact mode saves {full['avg'] - compact['avg']:.0f}ms per diagnosis "
+              f"({(1 - compact['avg'] / full['avg']) * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Throughput of the chatbot intent matcher on 100k messages.
+
+Compares the original per-intent ``re.search`` loop with the compiled
+single-scan IntentMatcher, first on the shipped intents and then with
+several hundred synthetic intents added.
+
+    python benchmarks/bench_intent_matcher.py [--messages 100000] [--extra-intents 300]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.chatbot import CropDiseaseChatbot
+from backend.intent_matcher import IntentMatcher
+
+SAMPLE_MESSAGES = [
+    'hi', 'hello there', 'how to use the app', 'upload photo', 'what is npk 19-19-19',
+    'how to treat potato late blight organically', 'prevention tips for tomato',
+    'is neem oil safe for peppers', 'what fungicide should i spray', 'where to buy urea',
+    'will rain spread the disease', 'tell me about early blight disease symptoms',
+    'my tomato leaves have brown spots with yellow rings what should i do',
+    'help', 'compost tea recipe', 'scan my leaf picture please',
+]
+
+
+def legacy_match(intents, message):
+    """The original first-match loop over uncompiled patterns"""
+    message_lower = message.lower().strip()
+    for intent_name, intent_data in intents.items():
+        for pattern in intent_data['patterns']:
+            if re.search(pattern, message_lower):
+                return intent_name
+    return None
+
+
+def synthetic_intents(count, rng):
+    """Keyword intents shaped like the real ones"""
+    intents = {}
+    for i in range(count):
+        words = [f'kw{i}x{j}' for j in range(rng.randint(2, 6))]
+        intents[f'synthetic_{i}'] = {'patterns': [r'\b(' + '|'.join(words) + r')\b'], 'responses': ['...']}
+    return intents
+
+
+def run(label, fn, messages):
+    started = time.perf_counter()
+    for message in messages:
+        fn(message)
+    elapsed = time.perf_counter() - started
+    rate = len(messages) / elapsed
+    print(f"  {label:<28} {elapsed:7.2f}s  {rate:>10,.0f} msg/s  {elapsed / len(messages) * 1e6:6.1f} µs/msg")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--extra-intents', type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(args.messages)]
+    chatbot = CropDiseaseChatbot()
+
+    print("=" * 60)
+    print(f"Intent matching throughput ({args.messages:,} messages)")
+    print("=" * 60)
+
+    print(f"\n{len(chatbot.intents)} intents:")
+    run('legacy re.search loop', lambda m: legacy_match(chatbot.intents, m), messages)
+    run('IntentMatcher.best', chatbot.matcher.best, messages)
+
+    intents = {**chatbot.intents, **synthetic_intents(args.extra_intents, rng)}
+    matcher = IntentMatcher(intents, CropDiseaseChatbot.STOPWORDS)
+    print(f"\n{len(intents)} intents:")
+    run('legacy re.search loop', lambda m: legacy_match(intents, m), messages)
+    run('IntentMatcher.best', matcher.best, messages)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Training throughput against worker count for multi-worker CPU training.
+
+Starts 1, 2, 4... local workers (each with an equal share of the cores),
+trains a few steps per configuration and reports global images/sec. Pass
+--data-dir to measure on real data; by default a small synthetic dataset is
+generated, and backbones start from random weights.
+
+    python benchmarks/bench_multiworker.py [--workers 1 2 4] [--steps 20]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / 'models'))
+
+from config.config import Config
+from train_distributed import run_local_cluster
+
+
+def synthetic_dataset(directory, classes=4, per_class=64):
+    rng = np.random.default_rng(0)
+    for c in range(classes):
+        class_dir = Path(directory) / f"Class_{c}"
+        class_dir.mkdir(parents=True)
+        for i in range(per_class):
+            pixels = rng.integers(0, 256, Config.IMG_SIZE + (3,), dtype=np.uint8)
+            Image.fromarray(pixels).save(class_dir / f"{i}.jpg")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--data-dir', default=None)
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix='bench-multiworker-'))
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = scratch / 'data'
+        synthetic_dataset(data_dir)
+
+    rows = []
+    try:
+        for workers in args.workers:
+            report = run_local_cluster(workers, [
+                '--data-dir', str(data_dir), '--model-path', str(scratch / f'model-{workers}.h5'),
+                '--epochs', '2', '--fine-tune-epochs', '0', '--steps', str(args.steps), '--no-pretrained'
+            ], threads_per_worker=max((os.cpu_count() or 1) // workers, 1))
+            # The first epoch includes graph tracing and collective setup
+            rows.append((workers, report['global_batch'], report['learning_rate'], report['epochs'][-1]['images_per_sec']))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    base = rows[0][3] / rows[0][0]
+    print(f"\n{Config.MODEL_ARCHITECTURE}, {Config.IMG_SIZE[0]}x{Config.IMG_SIZE[1]}, "
+          f"batch {Config.BATCH_SIZE} per worker")
+    print(f"{'workers':>8} {'global batch':>13} {'lr':>9} {'images/sec':>11} {'speedup':>8} {'efficiency':>11}")
+    for workers, global_batch, learning_rate, rate in rows:
+        speedup = rate / rows[0][3]
+        print(f"{workers:>8} {global_batch:>13} {learning_rate:>9.4g} {rate:>11.1f} "
+              f"{speedup:>7.2f}x {rate / (base * workers):>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Cost of building and serialising a recommendation payload per request.
+
+Compares rebuilding the dict from an in-memory DISEASE_INFO and json-encoding
+it every time with the precomputed (disease, severity band) payloads, where only the
+per-request fields are encoded and spliced onto cached JSON bytes.
+
+    python benchmarks/bench_recommendation_payloads.py [--requests 200000]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.recommendation import DiseaseRecommendationEngine, recommendation_json
+
+
+# The original all-in-memory knowledge base
+LEGACY_INFO = {code: DiseaseRecommendationEngine.DISEASE_INFO[code] for code in DiseaseRecommendationEngine.DISEASE_INFO}
+
+
+def legacy(disease_code, confidence):
+    severity = DiseaseRecommendationEngine._determine_severity(disease_code, confidence)
+    recommendation = DiseaseRecommendationEngine._build_payload(disease_code, severity, LEGACY_INFO[disease_code])
+    recommendation['confidence'] = confidence
+    recommendation['diagnosis_mode'] = 'compact'
+    return json.dumps(recommendation).encode()
+
+
+def precomputed(disease_code, confidence):
+    recommendation = DiseaseRecommendationEngine.get_recommendation(disease_code, confidence)
+    recommendation['diagnosis_mode'] = 'compact'
+    return recommendation_json(recommendation)
+
+
+def run(fn, requests):
+    started = time.perf_counter()
+    for disease_code, confidence in requests:
+        fn(disease_code, confidence)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    codes = list(LEGACY_INFO)
+    requests = [(rng.choice(codes), round(rng.uniform(0.3, 1.0), 3)) for _ in range(args.requests)]
+
+    for disease_code, confidence in requests[:1000]:
+        assert json.loads(legacy(disease_code, confidence)) == json.loads(precomputed(disease_code, confidence))
+
+    print(f"Recommendation payloads over {args.requests:,} requests")
+    for name, fn in (('rebuild + json.dumps', legacy), ('precomputed + splice', precomputed)):
+        seconds = run(fn, requests)
+        print(f"  {name:<22} {seconds * 1e6 / args.requests:7.2f} µs/request  ({args.requests / seconds:,.0f} req/s)")
+
+
+if __name__ == '__main__':
+    main()
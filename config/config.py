@@ -14,13 +14,42 @@ class Config:
     DATA_DIR = BASE_DIR / 'data' / 'datasets'
     MODEL_DIR = BASE_DIR / 'models' / 'saved_models'
     UPLOAD_DIR = BASE_DIR / 'uploads'
+    KNOWLEDGE_DIR = BASE_DIR / 'data' / 'knowledge'
     
     # Model parameters
     IMG_SIZE = (224, 224)
     BATCH_SIZE = 32
     EPOCHS = 32
     LEARNING_RATE = 0.001
-    MODEL_ARCHITECTURE = 'resnet50'  # resnet50, vgg16, mobilenet
+    MODEL_ARCHITECTURE = 'resnet50'  # resnet50, vgg16, mobilenet, efficientnetb0, mobilenetv3small
+    VALIDATION_SPLIT = 0.2
+    # Decoded, resized training images are cached here after the first epoch ('memory' keeps them in RAM)
+    DATA_CACHE_DIR = os.getenv('DATA_CACHE_DIR', '')
+    DATA_SEED = 42
+    # Pre-resized uint8 shards written by models/dataset_compiler.py; used for training when present
+    COMPILED_DATA_DIR = BASE_DIR / 'data' / 'compiled'
+    # Phase 1 trains the head on frozen-backbone embeddings cached here (empty: train on images)
+    FEATURE_CACHE_DIR = os.getenv('FEATURE_CACHE_DIR', '')
+    # Per-worker epoch backups for multi-worker training, so a restarted worker resumes
+    DISTRIBUTED_BACKUP_DIR = Path(os.getenv('DISTRIBUTED_BACKUP_DIR', BASE_DIR / 'models' / 'backup'))
+    # TensorFlow profiler trace of training steps PROFILE_TRACE_STEPS (start, stop); empty: no trace
+    PROFILE_TRACE_DIR = os.getenv('PROFILE_TRACE_DIR', '')
+    PROFILE_TRACE_STEPS = (10, 20)
+    # Hyperparameter sweeps (models/sweep.py): results table and per-trial heads
+    SWEEP_DIR = BASE_DIR / 'models' / 'sweeps'
+    # Distillation: softening temperature, weight of the teacher's soft targets
+    # and the minimum Gemini confidence for reusing a logged upload label
+    DISTILL_TEMPERATURE = 4.0
+    DISTILL_ALPHA = 0.7
+    DISTILL_MIN_GEMINI_CONFIDENCE = 0.8
+    # Incremental head fine-tuning from confirmed uploads (models/incremental.py)
+    MODEL_VERSIONS_DIR = MODEL_DIR / 'versions'
+    INCREMENTAL_MIN_UPLOADS = 20
+    INCREMENTAL_REPLAY_RATIO = 2        # Original training images replayed per new upload
+    INCREMENTAL_VAL_SAMPLES = 500       # Original validation images checked for forgetting
+    INCREMENTAL_EPOCHS = 10
+    INCREMENTAL_LEARNING_RATE = 1e-4
+    INCREMENTAL_MAX_ACCURACY_DROP = 0.02
     
     # Disease classes (example - expand based on dataset)
     DISEASE_CLASSES = [
@@ -49,9 +78,55 @@ class Config:
     # Multilingual support
     SUPPORTED_LANGUAGES = ['en', 'hi', 'te', 'ta', 'kn', 'mr']
     DEFAULT_LANGUAGE = 'en'
+    LANGUAGE_NAMES = {
+        'en': 'English', 'hi': 'Hindi', 'te': 'Telugu',
+        'ta': 'Tamil', 'kn': 'Kannada', 'mr': 'Marathi'
+    }
+    # Translations of recommendations and canned answers, shared by all workers
+    TRANSLATION_CACHE_PATH = BASE_DIR / 'data' / 'cache' / 'translations.sqlite3'
+    # Labels of diagnosed uploads (JSON lines), used as extra training labels
+    DIAGNOSIS_LOG_PATH = BASE_DIR / 'data' / 'history' / 'diagnoses.jsonl'
     
     # Thresholds
     CONFIDENCE_THRESHOLD = 0.3
+
+    # Diagnosis prompt: 'full' (Gemini writes the treatment plan), 'compact' (label only,
+    # treatment from the local engine) or 'ab' (split for comparison). Opt in to compact
+    # after comparing the two with benchmarks/bench_diagnosis_modes.py
+    DIAGNOSIS_MODE = os.getenv('DIAGNOSIS_MODE', 'full')
+    DIAGNOSIS_AB_COMPACT_SHARE = 0.5
+    # Declare a JSON response schema + MIME type on diagnosis requests
+    GEMINI_STRUCTURED_OUTPUT = os.getenv('GEMINI_STRUCTURED_OUTPUT', '1') == '1'
+    # Knowledge base files are re-checked for edits at most this often
+    KNOWLEDGE_RELOAD_SECONDS = 30
+
+    # Stream async diagnoses and publish the label/sections as they arrive
+    DIAGNOSIS_STREAMING = os.getenv('DIAGNOSIS_STREAMING', '1') == '1'
+
+    # Background diagnosis jobs
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+    JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', 32))
+    JOB_TTL_SECONDS = 600
+
+    # Chatbot answer cache
+    CHATBOT_CACHE_TTL = 24 * 3600
+    CHATBOT_CACHE_MAX_ENTRIES = 1000
+    CHATBOT_CACHE_SIMILARITY = 0.75
+
+    # Minimum intent confidence for answering from the rule-based chatbot. Confidence is the
+    # share of content words the intent explains: at 0.5 "is it going to rain" (one of two)
+    # got the weather template, so a canned answer needs at least three quarters explained.
+    CHATBOT_RULE_CONFIDENCE = 0.75
+
+    # Per-session chat history
+    CHAT_HISTORY_TURNS = 20
+    CHAT_SESSION_TTL = 30 * 60
+    CHAT_MAX_SESSIONS = 10000
+    CHAT_MEMORY_BYTES = 32 * 1024 * 1024
+
+    # Multi-turn prompt budget (estimated tokens)
+    CHAT_CONTEXT_TOKENS = 800
+    CHAT_SUMMARY_TOKENS = 200
     
     @staticmethod
     def create_directories():
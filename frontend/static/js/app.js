@@ -46,84 +46,134 @@ document.addEventListener("DOMContentLoaded", () => {
         resultContent.innerHTML = `<p>⏳ Analyzing image... Please wait.</p>`;
 
         try {
-            const response = await fetch("/api/predict", {
+            // Ask for a job when the browser can follow its event stream
+            const url = window.EventSource ? "/api/predict?async=1" : "/api/predict";
+            const response = await fetch(url, {
                 method: "POST",
                 body: formData,
             });
             const data = await response.json();
             console.log("🧠 Backend response:", data);
 
-            if (!data.success) {
-                resultContent.innerHTML = `
-                    <div class="error-msg">
-                        ⚠️ ${data.error || data.message || "Prediction failed!"}
-                    </div>`;
+            if (response.status === 202 && data.events_url) {
+                followDiagnosis(data.events_url);
                 return;
             }
+            renderResult(data);
+        } catch (err) {
+            console.error("⚠️ Prediction error:", err);
+            resultContent.innerHTML = `
+                <div class="error-msg">⚠️ Server error: ${err.message}</div>`;
+        }
+    });
 
-            const disease = data.predicted_disease || "Unknown";
-            const confidence = data.confidence || 0;
-            const isHealthy = disease.toLowerCase().includes("healthy");
-            const rec = data.recommendation || {};
-
-            // Build recommendation HTML
-            let recommendationHTML = '';
-            if (rec.fertilizer) {
-                recommendationHTML += `
-                    <div style="background: #f0f9ff; padding: 1rem; border-radius: 8px; margin: 1rem 0; text-align: left;">
-                        <h4 style="color: #0284c7; margin-top: 0;">💊 Fertilizer Recommendation</h4>
-                        <p style="margin: 0.5rem 0;">${rec.fertilizer}</p>
-                    </div>`;
-            }
-
-            if (rec.immediate_actions && rec.immediate_actions.length > 0) {
-                recommendationHTML += `
-                    <div style="background: #fff7ed; padding: 1rem; border-radius: 8px; margin: 1rem 0; text-align: left;">
-                        <h4 style="color: #ea580c; margin-top: 0;">⚡ Immediate Actions</h4>
-                        <ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
-                            ${rec.immediate_actions.map(action => `<li>${action}</li>`).join('')}
-                        </ul>
-                    </div>`;
-            }
-
-            if (rec.treatment) {
-                if (rec.treatment.organic && rec.treatment.organic.length > 0) {
-                    recommendationHTML += `
-                        <div style="background: #f0fdf4; padding: 1rem; border-radius: 8px; margin: 1rem 0; text-align: left;">
-                            <h4 style="color: #16a34a; margin-top: 0;">🌿 Organic Treatment</h4>
-                            <ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
-                                ${rec.treatment.organic.slice(0, 3).map(t => `<li>${t}</li>`).join('')}
-                            </ul>
-                        </div>`;
-                }
-                if (rec.treatment.chemical && rec.treatment.chemical.length > 0) {
-                    recommendationHTML += `
-                        <div style="background: #fef2f2; padding: 1rem; border-radius: 8px; margin: 1rem 0; text-align: left;">
-                            <h4 style="color: #dc2626; margin-top: 0;">🧪 Chemical Treatment</h4>
-                            <ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
-                                ${rec.treatment.chemical.slice(0, 3).map(t => `<li>${t}</li>`).join('')}
-                            </ul>
-                        </div>`;
-                }
-            }
-
-            if (rec.prevention && rec.prevention.length > 0) {
-                recommendationHTML += `
-                    <div style="background: #fefce8; padding: 1rem; border-radius: 8px; margin: 1rem 0; text-align: left;">
-                        <h4 style="color: #ca8a04; margin-top: 0;">🛡️ Prevention Tips</h4>
-                        <ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
-                            ${rec.prevention.slice(0, 3).map(p => `<li>${p}</li>`).join('')}
-                        </ul>
-                    </div>`;
-            }
+    // Show the label as soon as the server has it, then each section as it completes
+    function followDiagnosis(eventsUrl) {
+        const source = new EventSource(eventsUrl);
+        let finished = false;
 
+        source.addEventListener("diagnosis", (e) => {
+            const d = JSON.parse(e.data);
             resultContent.innerHTML = `
                 <div style="text-align:center;">
+                    ${headerHTML(d.disease, d.confidence)}
+                    <div id="sectionList"></div>
+                    <p id="pendingNote">⏳ Preparing treatment plan...</p>
+                </div>`;
+        });
+
+        source.addEventListener("section", (e) => {
+            const section = JSON.parse(e.data);
+            const list = document.getElementById("sectionList");
+            if (list) list.insertAdjacentHTML("beforeend", sectionHTML(section.name, section.value));
+        });
+
+        // The streamed reply was rejected and is being retried; its label may not be the final one
+        source.addEventListener("reset", () => {
+            resultContent.innerHTML = `<p>⏳ Analyzing image... Please wait.</p>`;
+        });
+
+        // The validated result replaces whatever label and sections were streamed
+        source.addEventListener("done", (e) => {
+            finished = true;
+            source.close();
+            renderResult(JSON.parse(e.data));
+        });
+
+        source.addEventListener("failed", (e) => {
+            finished = true;
+            source.close();
+            const data = JSON.parse(e.data);
+            renderResult({ success: false, error: data.error });
+        });
+
+        source.onerror = () => {
+            if (finished) return;
+            source.close();
+            renderResult({ success: false, error: "Lost connection while analyzing the image." });
+        };
+    }
+
+    function headerHTML(disease, confidence) {
+        const isHealthy = disease.toLowerCase().includes("healthy");
+        return `
                     <h3 style="color:${isHealthy ? "#10b981" : "#ef4444"};">
                         ${isHealthy ? "✅ Healthy Plant!" : "⚠️ Disease Detected"}
                     </h3>
                     <p><strong>Disease:</strong> ${disease}</p>
-                    <p><strong>Confidence:</strong> ${confidence}%</p>
+                    <p><strong>Confidence:</strong> ${confidence}%</p>`;
+    }
+
+    const SECTION_STYLES = {
+        fertilizer: ["#f0f9ff", "#0284c7", "💊 Fertilizer Recommendation"],
+        immediate_actions: ["#fff7ed", "#ea580c", "⚡ Immediate Actions"],
+        organic: ["#f0fdf4", "#16a34a", "🌿 Organic Treatment"],
+        chemical: ["#fef2f2", "#dc2626", "🧪 Chemical Treatment"],
+        prevention: ["#fefce8", "#ca8a04", "🛡️ Prevention Tips"],
+    };
+
+    function sectionHTML(name, value) {
+        const style = SECTION_STYLES[name];
+        if (!style || !value || value.length === 0) return "";
+        const [background, color, title] = style;
+        const content = Array.isArray(value)
+            ? `<ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
+                            ${value.slice(0, name === "immediate_actions" ? value.length : 3).map(item => `<li>${item}</li>`).join('')}
+                        </ul>`
+            : `<p style="margin: 0.5rem 0;">${value}</p>`;
+        return `
+                    <div style="background: ${background}; padding: 1rem; border-radius: 8px; margin: 1rem 0; text-align: left;">
+                        <h4 style="color: ${color}; margin-top: 0;">${title}</h4>
+                        ${content}
+                    </div>`;
+    }
+
+    function renderResult(data) {
+        if (!data.success) {
+            resultContent.innerHTML = `
+                <div class="error-msg">
+                    ⚠️ ${data.error || data.message || "Prediction failed!"}
+                </div>`;
+            return;
+        }
+
+        const disease = data.predicted_disease || "Unknown";
+        const confidence = data.confidence || 0;
+        const rec = data.recommendation || {};
+        const treatment = rec.treatment || {};
+
+        // Build recommendation HTML
+        const recommendationHTML = [
+            sectionHTML("fertilizer", rec.fertilizer),
+            sectionHTML("immediate_actions", rec.immediate_actions),
+            sectionHTML("organic", treatment.organic),
+            sectionHTML("chemical", treatment.chemical),
+            sectionHTML("prevention", rec.prevention),
+        ].join("");
+
+        resultContent.innerHTML = `
+                <div style="text-align:center;">
+                    ${headerHTML(disease, confidence)}
                     
                     ${recommendationHTML}
                     
@@ -133,12 +183,8 @@ document.addEventListener("DOMContentLoaded", () => {
                         </button>
                     </div>
                 </div>`;
-        } catch (err) {
-            console.error("⚠️ Prediction error:", err);
-            resultContent.innerHTML = `
-                <div class="error-msg">⚠️ Server error: ${err.message}</div>`;
-        }
-    });
+    }
+
 });
 
 const style = document.createElement("style");
@@ -56,6 +56,101 @@ function hideTyping() {
     }
 }
 
+// Parse one server-sent event frame into { event, data }
+function parseSSEFrame(frame) {
+    let event = 'message';
+    let data = '';
+    frame.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            data += line.slice(5).trim();
+        }
+    });
+    return { event, data: data ? JSON.parse(data) : null };
+}
+
+// Stream the answer from /api/chatbot/stream, appending chunks as they arrive
+async function streamMessage(message) {
+    const response = await fetch('/api/chatbot/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ message: message })
+    });
+
+    if (!response.ok || !response.body) {
+        throw new Error(`Stream unavailable (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let messageContent = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            if (!frame.trim() || frame.startsWith(':')) continue;
+
+            const { event, data } = parseSSEFrame(frame);
+            if (event === 'chunk') {
+                if (!messageContent) {
+                    hideTyping();
+                    addMessage('');
+                    messageContent = chatMessages.lastElementChild.querySelector('.message-content');
+                }
+                text += data.text;
+                messageContent.innerHTML = text;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (event === 'done') {
+                console.log(`💬 First token ${data.ttft_ms}ms, total ${data.total_ms}ms`);
+            } else if (event === 'error') {
+                if (messageContent) {
+                    // Keep what already arrived rather than re-asking
+                    messageContent.innerHTML = `${text}<br>⚠️ ${data.error}`;
+                    return;
+                }
+                throw new Error(data.error);
+            }
+        }
+    }
+
+    if (!messageContent) {
+        throw new Error('Empty response');
+    }
+}
+
+// Non-streaming fallback
+async function fetchMessage(message) {
+    const response = await fetch('/api/chatbot', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ message: message })
+    });
+
+    const data = await response.json();
+
+    // Hide typing
+    hideTyping();
+
+    if (data.success) {
+        addMessage(data.response);
+    } else {
+        addMessage('Sorry, I encountered an error. Please try again! 😅');
+    }
+}
+
 // Send message to chatbot
 async function sendMessage() {
     const message = userInput.value.trim();
@@ -73,28 +168,16 @@ async function sendMessage() {
     showTyping();
     
     try {
-        const response = await fetch('/api/chatbot', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ message: message })
-        });
-        
-        const data = await response.json();
-        
-        // Hide typing
-        hideTyping();
-        
-        if (data.success) {
-            addMessage(data.response);
-        } else {
-            addMessage('Sorry, I encountered an error. Please try again! 😅');
+        await streamMessage(message);
+    } catch (streamError) {
+        console.warn('Streaming failed, falling back:', streamError);
+        try {
+            await fetchMessage(message);
+        } catch (error) {
+            hideTyping();
+            addMessage('Sorry, I could not connect to the server. Please check your internet connection! 🌐');
+            console.error('Chatbot error:', error);
         }
-    } catch (error) {
-        hideTyping();
-        addMessage('Sorry, I could not connect to the server. Please check your internet connection! 🌐');
-        console.error('Chatbot error:', error);
     }
     
     // Re-enable input
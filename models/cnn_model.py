@@ -1,16 +1,24 @@
 import tensorflow as tf
 from tensorflow.keras import layers, models
-from tensorflow.keras.applications import ResNet50, VGG16, MobileNetV2
+from tensorflow.keras.applications import ResNet50, VGG16, MobileNetV2, EfficientNetB0, MobileNetV3Small
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
 
+try:
+    from models.preprocessing import NORMALIZATION, ImagePreprocessing
+except ImportError:  # imported from inside models/
+    from preprocessing import NORMALIZATION, ImagePreprocessing
+
 class DiseaseDetectionModel:
     """CNN model for crop disease detection"""
     
-    def __init__(self, num_classes, img_size=(224, 224), architecture='resnet50'):
+    def __init__(self, num_classes, img_size=(224, 224), architecture='resnet50', weights='imagenet',
+                 head_units=(512, 256)):
         self.num_classes = num_classes
-        self.img_size = img_size + (3,)
+        self.img_size = tuple(img_size) + (3,)
         self.architecture = architecture
+        self.weights = weights  # None builds a randomly initialised backbone (smoke tests, benchmarks)
+        self.head_units = tuple(head_units)
         self.model = None
         
     def build_model(self):
@@ -19,19 +27,31 @@ class DiseaseDetectionModel:
         # Base model selection
         if self.architecture == 'resnet50':
             base_model = ResNet50(
-                weights='imagenet',
+                weights=self.weights,
                 include_top=False,
                 input_shape=self.img_size
             )
         elif self.architecture == 'vgg16':
             base_model = VGG16(
-                weights='imagenet',
+                weights=self.weights,
                 include_top=False,
                 input_shape=self.img_size
             )
         elif self.architecture == 'mobilenet':
             base_model = MobileNetV2(
-                weights='imagenet',
+                weights=self.weights,
+                include_top=False,
+                input_shape=self.img_size
+            )
+        elif self.architecture == 'efficientnetb0':
+            base_model = EfficientNetB0(
+                weights=self.weights,
+                include_top=False,
+                input_shape=self.img_size
+            )
+        elif self.architecture == 'mobilenetv3small':
+            base_model = MobileNetV3Small(
+                weights=self.weights,
                 include_top=False,
                 input_shape=self.img_size
             )
@@ -41,23 +61,53 @@ class DiseaseDetectionModel:
         # Freeze base model layers
         base_model.trainable = False
         
-        # Build full model
-        inputs = layers.Input(shape=self.img_size)
-        x = base_model(inputs, training=False)
+        # Build full model: raw RGB of any size and dtype in, resize and normalisation in the graph
+        inputs = layers.Input(shape=(None, None, 3))
+        x = ImagePreprocessing(self.img_size[:2], NORMALIZATION[self.architecture])(inputs)
+        x = base_model(x, training=False)
         x = layers.GlobalAveragePooling2D()(x)
-        x = layers.Dense(512, activation='relu')(x)
-        x = layers.Dropout(0.5)(x)
-        x = layers.Dense(256, activation='relu')(x)
-        x = layers.Dropout(0.3)(x)
-        outputs = layers.Dense(self.num_classes, activation='softmax')(x)
+        outputs = self.classification_head(x)
         
         self.model = models.Model(inputs, outputs)
         
         return self.model
     
-    def compile_model(self, learning_rate=0.001):
-        """Compile the model"""
-        self.model.compile(
+    def classification_head(self, x):
+        """Dense layers from pooled features to class probabilities"""
+        for i, units in enumerate(self.head_units):
+            x = layers.Dense(units, activation='relu')(x)
+            x = layers.Dropout(0.5 if i == 0 else 0.3)(x)
+        return layers.Dense(self.num_classes, activation='softmax')(x)
+    
+    def backbone(self):
+        """The pretrained base model inside the full model"""
+        return next(layer for layer in self.model.layers if isinstance(layer, models.Model))
+    
+    def _pooling_index(self):
+        # Models saved before the preprocessing layer have one layer fewer in front of the backbone
+        return next(i for i, layer in enumerate(self.model.layers)
+                    if isinstance(layer, layers.GlobalAveragePooling2D))
+    
+    def feature_extractor(self):
+        """Preprocessing, frozen backbone plus pooling as its own model: images -> embeddings"""
+        return models.Model(self.model.input, self.model.layers[self._pooling_index()].output)
+    
+    def head_model(self):
+        """The layers after pooling as a model on embeddings
+
+        The layers (and so the weights) are shared with the full model, so
+        training the head on cached embeddings trains the full model's head.
+        """
+        pooling = self._pooling_index()
+        inputs = layers.Input(shape=self.model.layers[pooling].output.shape[1:])
+        x = inputs
+        for layer in self.model.layers[pooling + 1:]:
+            x = layer(x)
+        return models.Model(inputs, x)
+    
+    def compile_model(self, learning_rate=0.001, model=None):
+        """Compile the model (or another model built from its layers, such as the head)"""
+        (model or self.model).compile(
             optimizer=Adam(learning_rate=learning_rate),
             loss='categorical_crossentropy',
             metrics=['accuracy', tf.keras.metrics.Precision(), tf.keras.metrics.Recall()]
@@ -91,7 +141,7 @@ class DiseaseDetectionModel:
     
     def fine_tune(self, base_layers_to_unfreeze=30):
         """Fine-tune the model by unfreezing some base layers"""
-        base_model = self.model.layers[1]
+        base_model = self.backbone()
         base_model.trainable = True
         
         # Freeze all layers except the last N
@@ -0,0 +1,178 @@
+import time
+import zlib
+from pathlib import Path
+
+import tensorflow as tf
+
+try:
+    from models.dataset_files import list_dataset
+    from models.dataset_compiler import CompiledDataset
+except ImportError:  # imported from inside models/
+    from dataset_files import list_dataset
+    from dataset_compiler import CompiledDataset
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+class DatasetLoader:
+    """tf.data input pipeline over a class-per-folder image dataset
+
+    Files are listed once in Python; decoding and resizing run inside the
+    tf.data graph with ``num_parallel_calls=AUTOTUNE``, so all cores are
+    used and the GIL is never involved. The decoded, resized images can be
+    cached (in memory, or on disk with ``cache_dir``) so later epochs skip the
+    JPEG decode entirely. Augmentation is applied to whole batches with
+    vectorised ops after batching. Images are float32 in [0, 255].
+
+    ``num_shards``/``shard_index`` give each worker a disjoint, deterministic
+    part of the training files.
+
+    With ``compiled_dir`` pointing at a compiled copy of ``data_dir`` (see
+    dataset_compiler.py) images are read from its uint8 shards instead, with
+    no JPEG decode; file entries are then paths relative to ``data_dir``.
+    """
+
+    def __init__(self, data_dir, img_size=(224, 224), batch_size=32, validation_split=0.2,
+                 seed=42, cache_dir=None, augment=True, num_shards=1, shard_index=0, compiled_dir=None):
+        self.data_dir = Path(data_dir)
+        self.img_size = tuple(img_size)
+        self.batch_size = batch_size
+        self.validation_split = validation_split
+        self.seed = seed
+        self.cache_dir = cache_dir
+        self.augment = augment
+        self.num_shards = num_shards
+        self.shard_index = shard_index
+        self.compiled = None
+        if compiled_dir and CompiledDataset.available(compiled_dir, data_dir):
+            self.compiled = CompiledDataset(compiled_dir)
+        self.class_indices = {}
+        self.samples = {'train': 0, 'val': 0}
+        self.files = None
+
+    # -- File listing ------------------------------------------------------
+
+    def list_files(self):
+        """{'train': [(path, label)], 'val': [(path, label)]} and sets ``class_indices``"""
+        if self.compiled is not None:
+            self.class_indices, files = self.compiled.class_indices, self.compiled.files()
+            print(f"📦 Reading pre-resized shards from {self.compiled.directory}")
+        else:
+            self.class_indices, files = list_dataset(self.data_dir, self.validation_split)
+        if not files['train']:
+            raise ValueError(f"No training images found in {self.data_dir}")
+        self.samples = {split: len(items) for split, items in files.items()}
+        self.files = files
+        return files
+
+    # -- Pipeline ----------------------------------------------------------
+
+    def _decode(self, path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        image = tf.image.resize(image, self.img_size)
+        image.set_shape(self.img_size + (3,))
+        return image, tf.one_hot(label, len(self.class_indices))
+
+    def _read_compiled(self, shard_ids, rows, labels):
+        """A whole batch of pre-resized images copied out of the shard memmaps"""
+        images = tf.numpy_function(self.compiled.read, [shard_ids, rows], tf.uint8)
+        images.set_shape((None,) + self.compiled.img_size + (3,))
+        images = tf.cast(images, tf.float32)
+        if self.compiled.img_size != self.img_size:
+            images = tf.image.resize(images, self.img_size)
+        return images, tf.one_hot(labels, len(self.class_indices))
+
+    def _augment_batch(self, images, labels):
+        """Random flips, zoom, brightness and contrast, drawn per image but applied batch-wide"""
+        batch = tf.shape(images)[0]
+        flip = tf.random.uniform([batch, 1, 1, 1]) < 0.5
+        images = tf.where(flip, tf.reverse(images, axis=[2]), images)
+        flip = tf.random.uniform([batch, 1, 1, 1]) < 0.5
+        images = tf.where(flip, tf.reverse(images, axis=[1]), images)
+
+        # Zoom in by up to 20% around a random centre in a single crop_and_resize
+        scale = tf.random.uniform([batch, 1], 0.8, 1.0)
+        offset = tf.random.uniform([batch, 2]) * (1.0 - scale)
+        boxes = tf.concat([offset, offset + scale], axis=1)
+        images = tf.image.crop_and_resize(images, boxes, tf.range(batch), self.img_size)
+
+        brightness = tf.random.uniform([batch, 1, 1, 1], -0.1, 0.1) * 255.0
+        contrast = tf.random.uniform([batch, 1, 1, 1], 0.8, 1.2)
+        mean = tf.reduce_mean(images, axis=[1, 2, 3], keepdims=True)
+        images = (images - mean) * contrast + mean + brightness
+        return tf.clip_by_value(images, 0.0, 255.0), labels
+
+    def _cache(self, dataset, split, paths):
+        if not self.cache_dir:
+            return dataset
+        if self.cache_dir == 'memory':
+            return dataset.cache()
+        cache_dir = Path(self.cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # The file list is part of the name, so adding or removing images starts a fresh cache
+        fingerprint = zlib.crc32('\n'.join(paths).encode('utf-8'))
+        name = f"{split}-{self.img_size[0]}x{self.img_size[1]}-{fingerprint:08x}-shard{self.shard_index}of{self.num_shards}"
+        return dataset.cache(str(cache_dir / name))
+
+    def build(self, items, split, cache=True, training=None):
+        """tf.data.Dataset of (image batch, one-hot label batch) for a list of (path, label)
+
+        Training pipelines are sharded, shuffled and augmented; pass
+        ``training=False`` for the files of the train split in their listed order.
+        """
+        training = split == 'train' if training is None else training
+        paths = [path for path, _ in items]
+        labels = [label for _, label in items]
+        if self.compiled is not None:
+            dataset = tf.data.Dataset.from_tensor_slices((*self.compiled.locate(paths), labels))
+        else:
+            dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+        if training and self.num_shards > 1:
+            # Shard file names before any decode so each worker reads only its own images
+            dataset = dataset.shard(self.num_shards, self.shard_index)
+
+        if self.compiled is not None:
+            # Already decoded and resized: shuffle the row references and read whole batches
+            if training:
+                dataset = dataset.shuffle(min(len(paths), 100000), seed=self.seed, reshuffle_each_iteration=True)
+            dataset = dataset.batch(self.batch_size).map(self._read_compiled, num_parallel_calls=AUTOTUNE)
+        else:
+            dataset = dataset.map(self._decode, num_parallel_calls=AUTOTUNE)
+            if cache:
+                dataset = self._cache(dataset, split, paths)
+            if training:
+                dataset = dataset.shuffle(min(len(paths), 10000), seed=self.seed, reshuffle_each_iteration=True)
+            dataset = dataset.batch(self.batch_size, num_parallel_calls=AUTOTUNE)
+        if training and self.augment:
+            dataset = dataset.map(self._augment_batch, num_parallel_calls=AUTOTUNE)
+
+        options = tf.data.Options()
+        # Order within an epoch does not matter for training; let fast elements overtake slow ones
+        options.deterministic = not training
+        options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+        return dataset.with_options(options).prefetch(AUTOTUNE)
+
+    def load_from_directory(self):
+        """(train_dataset, val_dataset); class_indices and samples are set on the loader"""
+        files = self.list_files()
+        train_ds = self.build(files['train'], 'train')
+        val_ds = self.build(files['val'], 'val') if files['val'] else None
+        return train_ds, val_ds
+
+    # -- Throughput --------------------------------------------------------
+
+    @staticmethod
+    def measure_throughput(dataset, steps=50, warmup=5):
+        """Images per second the pipeline alone can deliver, with no model attached"""
+        iterator = iter(dataset)
+        for _ in range(warmup):
+            next(iterator, None)
+        images = 0
+        started = time.perf_counter()
+        for _ in range(steps):
+            batch = next(iterator, None)
+            if batch is None:
+                break
+            images += int(tf.shape(batch[0])[0])
+        elapsed = time.perf_counter() - started
+        return images / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,267 @@
+"""Compile a class-per-folder image dataset into pre-resized uint8 shards.
+
+Every training run otherwise decodes the full-resolution JPEGs and resizes
+them again. The compiler does that once:
+
+    python models/dataset_compiler.py --data-dir data/datasets --out data/compiled
+
+Each shard is an ``(N, H, W, 3)`` uint8 .npy file that training reads by
+memory map, so there is no JPEG decode at all. ``manifest.json`` maps every
+source image (by path and content hash) to its class, split, shard and row.
+A rerun only converts new or changed images, and a run that was interrupted
+resumes from the last finished shard.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from models.dataset_files import list_dataset
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def file_hash(path):
+    """SHA-1 of a file's bytes"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_resized(path, img_size):
+    """RGB uint8 array of ``img_size`` (height, width); JPEGs are decoded at reduced scale when possible"""
+    height, width = img_size
+    with Image.open(path) as img:
+        img.draft('RGB', (width, height))  # JPEG only: let the decoder skip detail we would throw away
+        img = img.convert('RGB').resize((width, height), Image.BILINEAR)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def write_shard(out_dir, shard_name, paths, img_size):
+    """Worker: resize ``paths`` into one shard; returns (shard_name, rows written, failed paths)"""
+    out_dir = Path(out_dir)
+    temp_path = out_dir / f".{shard_name}.tmp.npy"
+    images = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.uint8, shape=(len(paths),) + tuple(img_size) + (3,))
+    rows = {}
+    failed = []
+    for path in paths:
+        try:
+            images[len(rows)] = load_resized(path, img_size)
+            rows[path] = len(rows)
+        except (OSError, ValueError) as e:
+            failed.append((path, str(e)))
+    images.flush()
+    del images
+
+    if len(rows) < len(paths):
+        # Drop the unused tail rows left by unreadable images
+        data = np.array(np.load(temp_path, mmap_mode='r')[:len(rows)])
+        np.save(temp_path, data)
+    os.replace(temp_path, out_dir / shard_name)
+    return shard_name, rows, failed
+
+
+class DatasetCompiler:
+    """Incremental, resumable conversion of a dataset into uint8 shards"""
+
+    def __init__(self, data_dir, out_dir, img_size=(224, 224), validation_split=0.2, shard_size=1024, workers=None):
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir)
+        self.img_size = tuple(img_size)
+        self.validation_split = validation_split
+        self.shard_size = shard_size
+        self.workers = workers or os.cpu_count() or 1
+
+    # -- Manifest ----------------------------------------------------------
+
+    def load_manifest(self):
+        try:
+            with open(self.out_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('format') != FORMAT_VERSION or tuple(manifest.get('img_size', ())) != self.img_size:
+            return None
+        return manifest
+
+    def save_manifest(self, manifest):
+        temp = self.out_dir / f".{MANIFEST_NAME}.tmp"
+        temp.write_text(json.dumps(manifest, indent=1) + '\n', encoding='utf-8')
+        os.replace(temp, self.out_dir / MANIFEST_NAME)
+
+    # -- Compilation -------------------------------------------------------
+
+    def _hash_sources(self, sources, previous):
+        """{relative path: (hash, size, mtime_ns)}; unchanged files reuse the stored hash"""
+        def fingerprint(relative):
+            stat = os.stat(self.data_dir / relative)
+            old = previous.get(relative)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                return relative, (old['hash'], stat.st_size, stat.st_mtime_ns)
+            return relative, (file_hash(self.data_dir / relative), stat.st_size, stat.st_mtime_ns)
+
+        with ThreadPoolExecutor(max_workers=self.workers * 2) as pool:
+            return dict(pool.map(fingerprint, sources))
+
+    def compile(self, rebuild=False):
+        """Convert new or changed images; returns the manifest"""
+        started = time.perf_counter()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        for leftover in self.out_dir.glob('.shard-*.tmp.npy'):
+            leftover.unlink()  # From a run that was interrupted mid-shard
+        manifest = None if rebuild else self.load_manifest()
+        if manifest is None:
+            for old_shard in self.out_dir.glob('shard-*.npy'):
+                old_shard.unlink()
+            manifest = {'format': FORMAT_VERSION, 'img_size': list(self.img_size), 'shards': {}, 'images': {}}
+
+        class_indices, files = list_dataset(self.data_dir, self.validation_split)
+        class_names = {label: name for name, label in class_indices.items()}
+        sources = {}
+        for split, items in files.items():
+            for path, label in items:
+                relative = Path(path).relative_to(self.data_dir).as_posix()
+                sources[relative] = (class_names[label], split)
+
+        previous = manifest['images']
+        hashes = self._hash_sources(sources, previous)
+        images = {}
+        todo = []
+        for relative, (class_name, split) in sources.items():
+            content_hash, size, mtime_ns = hashes[relative]
+            entry = {'hash': content_hash, 'size': size, 'mtime_ns': mtime_ns, 'class': class_name, 'split': split}
+            old = previous.get(relative)
+            if old and old['hash'] == content_hash and old.get('shard') in manifest['shards']:
+                entry.update(shard=old['shard'], row=old['row'])
+            elif old and old['hash'] == content_hash and 'error' in old:
+                entry['error'] = old['error']  # Unreadable last time and unchanged since
+            else:
+                todo.append(relative)
+            images[relative] = entry
+
+        manifest['images'] = images
+        manifest['class_indices'] = class_indices
+        manifest['source'] = str(self.data_dir.resolve())
+        self.save_manifest(manifest)
+
+        failed = self._convert(manifest, todo)
+
+        self._report(manifest, len(todo), failed, time.perf_counter() - started)
+        return manifest
+
+    def _convert(self, manifest, todo):
+        """Resize ``todo`` into new shards in parallel, saving the manifest after each one"""
+        if not todo:
+            return []
+        next_id = max((int(name[6:11]) for name in manifest['shards']), default=-1) + 1
+        batches = [todo[i:i + self.shard_size] for i in range(0, len(todo), self.shard_size)]
+        failed = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(write_shard, self.out_dir, f"shard-{next_id + i:05d}.npy",
+                            [str(self.data_dir / relative) for relative in batch], self.img_size)
+                for i, batch in enumerate(batches)
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                shard_name, rows, shard_failed = future.result()
+                for path, row in rows.items():
+                    entry = manifest['images'][Path(path).relative_to(self.data_dir).as_posix()]
+                    entry.update(shard=shard_name, row=row)
+                for path, error in shard_failed:
+                    print(f"⚠️ Skipping unreadable image {path}: {error}")
+                    manifest['images'][Path(path).relative_to(self.data_dir).as_posix()]['error'] = error
+                    failed.append(path)
+                manifest['shards'][shard_name] = len(rows)
+                # Finished shards survive an interruption; the next run resumes after them
+                self.save_manifest(manifest)
+                print(f"  [{done}/{len(batches)}] {shard_name}: {len(rows)} images")
+        return failed
+
+    def _report(self, manifest, converted, failed, elapsed):
+        live = sum(1 for entry in manifest['images'].values() if 'shard' in entry)
+        rows = sum(manifest['shards'].values())
+        size = sum((self.out_dir / name).stat().st_size for name in manifest['shards'])
+        print(f"✅ {live} images in {len(manifest['shards'])} shards ({size / 1e9:.2f} GB), "
+              f"{converted - len(failed)} converted in {elapsed:.0f}s")
+        if rows > live:
+            print(f"ℹ️ {rows - live} stale rows from removed or changed images; --rebuild reclaims the space")
+
+
+class CompiledDataset:
+    """Read side of a compiled dataset: entries from the manifest, pixels by memory map"""
+
+    @staticmethod
+    def available(directory, data_dir):
+        """True when ``directory`` holds a compiled copy of ``data_dir``"""
+        try:
+            with open(Path(directory) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return manifest.get('source') == str(Path(data_dir).resolve())
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled dataset format: {self.manifest.get('format')}")
+        self.img_size = tuple(self.manifest['img_size'])
+        self.class_indices = self.manifest['class_indices']
+        self.shard_names = sorted(self.manifest['shards'])
+        self._shards = {}
+
+    def files(self):
+        """{'train': [(relative path, label)], 'val': [...]} for every converted image"""
+        files = {'train': [], 'val': []}
+        for relative, entry in sorted(self.manifest['images'].items()):
+            if 'shard' in entry:
+                files[entry['split']].append((relative, self.class_indices[entry['class']]))
+        return files
+
+    def locate(self, relative_paths):
+        """(shard ids, rows) for a list of relative paths"""
+        shard_ids = {name: i for i, name in enumerate(self.shard_names)}
+        images = self.manifest['images']
+        return ([shard_ids[images[path]['shard']] for path in relative_paths],
+                [images[path]['row'] for path in relative_paths])
+
+    def shard(self, shard_id):
+        memmap = self._shards.get(shard_id)
+        if memmap is None:
+            memmap = self._shards[shard_id] = np.load(self.directory / self.shard_names[shard_id], mmap_mode='r')
+        return memmap
+
+    def read(self, shard_ids, rows):
+        """uint8 batch (N, H, W, 3) for parallel arrays of shard ids and rows"""
+        batch = np.empty((len(rows),) + self.img_size + (3,), dtype=np.uint8)
+        for i, (shard_id, row) in enumerate(zip(shard_ids, rows)):
+            batch[i] = self.shard(int(shard_id))[row]
+        return batch
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile the training images into pre-resized uint8 shards')
+    parser.add_argument('--data-dir', default=str(Config.DATA_DIR))
+    parser.add_argument('--out', default=str(Config.COMPILED_DATA_DIR))
+    parser.add_argument('--shard-size', type=int, default=1024)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rebuild', action='store_true', help='Discard existing shards and convert everything')
+    args = parser.parse_args()
+
+    compiler = DatasetCompiler(args.data_dir, args.out, img_size=Config.IMG_SIZE,
+                               validation_split=Config.VALIDATION_SPLIT,
+                               shard_size=args.shard_size, workers=args.workers)
+    compiler.compile(rebuild=args.rebuild)
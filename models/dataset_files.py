@@ -0,0 +1,80 @@
+import json
+import zlib
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
+
+# Folder pairs used by datasets that ship with a fixed split
+PRESPLIT_DIRS = (('train', 'val'), ('train', 'valid'), ('train', 'validation'))
+
+# Written into the dataset folder by models/dedup.py
+DEDUP_MANIFEST = 'dedup.json'
+
+
+def list_images(class_dir):
+    """Image files under one class folder, sorted so every machine sees the same order"""
+    return sorted(str(p) for p in Path(class_dir).rglob('*') if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def is_validation(relative_path, validation_split):
+    """Stable train/val assignment from a hash of the path inside the dataset
+
+    Unlike a shuffled split this does not depend on a seed, the file count or
+    the machine, so an image stays on the same side of the split across runs,
+    workers and newly added images.
+    """
+    bucket = zlib.crc32(relative_path.replace('\\', '/').encode('utf-8')) % 10000
+    return bucket < validation_split * 10000
+
+
+def split_dirs(data_dir):
+    """(train_dir, val_dir) when the dataset ships already split, else None"""
+    data_dir = Path(data_dir)
+    for train_name, val_name in PRESPLIT_DIRS:
+        if (data_dir / train_name).is_dir() and (data_dir / val_name).is_dir():
+            return data_dir / train_name, data_dir / val_name
+    return None
+
+
+def load_dedup(data_dir):
+    """(dropped relative paths, {relative path: cluster key}) from the last dedup pass, or empty ones"""
+    try:
+        with open(Path(data_dir) / DEDUP_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return set(), {}
+    return set(manifest.get('dropped', [])), manifest.get('groups', {})
+
+
+def list_dataset(data_dir, validation_split=0.2, apply_dedup=True):
+    """(class_indices, {'train': [(path, label)], 'val': [(path, label)]}) for a class-per-folder dataset
+
+    When models/dedup.py has been run, duplicates it dropped are left out and
+    the images of one duplicate cluster share the split of its cluster key,
+    so near-identical photos never end up on both sides.
+    """
+    data_dir = Path(data_dir)
+    dropped, groups = load_dedup(data_dir) if apply_dedup else (set(), {})
+    presplit = split_dirs(data_dir)
+    root = presplit[0] if presplit else data_dir
+    class_names = sorted(p.name for p in root.iterdir() if p.is_dir()) if root.is_dir() else []
+    if not class_names:
+        raise ValueError(f"No class folders found in {root}")
+    # Same mapping as Keras flow_from_directory: sorted folder names
+    class_indices = {name: index for index, name in enumerate(class_names)}
+
+    files = {'train': [], 'val': []}
+    if presplit:
+        for split, directory in zip(('train', 'val'), presplit):
+            for name, label in class_indices.items():
+                files[split].extend((path, label) for path in list_images(directory / name)
+                                    if Path(path).relative_to(data_dir).as_posix() not in dropped)
+    else:
+        for name, label in class_indices.items():
+            for path in list_images(data_dir / name):
+                relative = Path(path).relative_to(data_dir).as_posix()
+                if relative in dropped:
+                    continue
+                split = 'val' if is_validation(groups.get(relative, relative), validation_split) else 'train'
+                files[split].append((path, label))
+    return class_indices, files
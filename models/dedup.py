@@ -0,0 +1,291 @@
+"""Find exact and near-duplicate training images and keep each cluster on one side of the split.
+
+    python models/dedup.py [--data-dir data/datasets] [--threshold 4] [--dry-run]
+
+Every image gets a content hash (SHA-1, exact copies) and a 64-bit
+difference hash (dHash: re-encoded, resized or lightly edited copies).
+Images whose dHashes differ in at most ``threshold`` bits are clustered
+together with their exact copies. Within each class only the largest file
+of a cluster is kept; clusters spanning classes are reported as label
+conflicts and keep one image per class.
+
+Nothing is deleted: the result is written to ``dedup.json`` in the dataset
+folder, which ``list_dataset`` (and so training, the compiler and the
+feature cache) applies. Dropped images are skipped, and all kept images of
+a cluster take the train/val side of the cluster's key. In a dataset that
+ships ``train/`` and ``val/`` folders the split is kept as is, and a
+cluster spanning both keeps its representative on the train side. Hashes
+are stored too, so a rerun only hashes new or changed files.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from models.dataset_compiler import file_hash
+from models.dataset_files import DEDUP_MANIFEST, is_validation, list_dataset, split_dirs
+
+FORMAT_VERSION = 1
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dhash(path, size=8):
+    """64-bit difference hash: whether each pixel of a 9x8 greyscale thumbnail is brighter than its neighbour"""
+    with Image.open(path) as img:
+        img.draft('L', (size * 8, size * 8))
+        pixels = np.asarray(img.convert('L').resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hash_image(path):
+    """Worker: (sha1, dhash) for one image, or (None, error message)"""
+    try:
+        return file_hash(path), dhash(path)
+    except (OSError, ValueError) as e:
+        return None, str(e)
+
+
+def popcount(values):
+    """Set bits of each uint64"""
+    return POPCOUNT[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+
+def near_duplicate_pairs(hashes, threshold):
+    """(i, j) index pairs whose 64-bit hashes differ in at most ``threshold`` bits
+
+    The hashes are cut into ``threshold + 1`` bands: two hashes within the
+    threshold agree exactly on at least one band, so only hashes sharing a
+    band value are compared.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    bands = threshold + 1
+    width = 64 // bands
+    pairs = set()
+    for band in range(bands):
+        shift = band * width
+        bits = 64 - shift if band == bands - 1 else width
+        keys = (hashes >> np.uint64(shift)) & np.uint64((1 << bits) - 1)
+        order = np.argsort(keys, kind='stable')
+        boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group) < 2:
+                continue
+            # In row blocks, so a huge bucket (e.g. many flat images) stays within memory
+            for start in range(0, len(group), 1024):
+                rows = group[start:start + 1024]
+                distances = popcount(hashes[rows][:, None] ^ hashes[group][None, :])
+                for a, b in zip(*np.nonzero(distances <= threshold)):
+                    i, j = int(rows[a]), int(group[b])
+                    if i < j:
+                        pairs.add((i, j))
+    return pairs
+
+
+class DisjointSets:
+    """Union-find over 0..n-1"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+    def groups(self):
+        groups = {}
+        for i in range(len(self.parent)):
+            groups.setdefault(self.find(i), []).append(i)
+        return [members for members in groups.values() if len(members) > 1]
+
+
+class DatasetDeduplicator:
+    """One dedup pass over a class-per-folder dataset"""
+
+    def __init__(self, data_dir, threshold=4, validation_split=0.2, workers=None):
+        self.data_dir = Path(data_dir)
+        self.threshold = threshold
+        self.validation_split = validation_split
+        self.workers = workers or os.cpu_count() or 1
+
+    def load_manifest(self):
+        try:
+            with open(self.data_dir / DEDUP_MANIFEST, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if manifest.get('format') == FORMAT_VERSION else {}
+
+    def hash_all(self, relatives, previous):
+        """{relative path: {'size', 'mtime_ns', 'sha1', 'dhash'}}; unchanged files keep their stored hashes"""
+        hashes = {}
+        todo = []
+        for relative in relatives:
+            stat = os.stat(self.data_dir / relative)
+            old = previous.get(relative)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                hashes[relative] = old
+            else:
+                hashes[relative] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                todo.append(relative)
+
+        if todo:
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                paths = [str(self.data_dir / relative) for relative in todo]
+                for relative, (sha1, result) in zip(todo, pool.map(hash_image, paths, chunksize=64)):
+                    if sha1 is None:
+                        print(f"⚠️ Skipping unreadable image {relative}: {result}")
+                        hashes.pop(relative)
+                    else:
+                        hashes[relative].update(sha1=sha1, dhash=f"{result:016x}")
+            elapsed = time.perf_counter() - started
+            print(f"#️⃣ Hashed {len(todo)} images in {elapsed:.0f}s ({len(todo) / elapsed if elapsed else 0:,.0f} images/sec)")
+        return hashes
+
+    def run(self, dry_run=False):
+        """Cluster duplicates, write dedup.json (unless ``dry_run``) and return the report"""
+        class_indices, files = list_dataset(self.data_dir, self.validation_split, apply_dedup=False)
+        classes = {label: name for name, label in class_indices.items()}
+        entries = {}  # relative path -> (class name, split before dedup)
+        for split, items in files.items():
+            for path, label in items:
+                entries[Path(path).relative_to(self.data_dir).as_posix()] = (classes[label], split)
+
+        hashes = self.hash_all(sorted(entries), self.load_manifest().get('hashes', {}))
+        relatives = sorted(hashes)
+        sets = DisjointSets(len(relatives))
+        first_by_sha1 = {}
+        exact = 0
+        for i, relative in enumerate(relatives):
+            sha1 = hashes[relative]['sha1']
+            if sha1 in first_by_sha1:
+                sets.union(first_by_sha1[sha1], i)
+                exact += 1
+            else:
+                first_by_sha1[sha1] = i
+        dhashes = [int(hashes[relative]['dhash'], 16) for relative in relatives]
+        for a, b in near_duplicate_pairs(dhashes, self.threshold):
+            sets.union(a, b)
+
+        presplit = split_dirs(self.data_dir) is not None
+        clusters = sets.groups()
+        dropped, groups, conflicts, leaks = [], {}, [], 0
+        for members in clusters:
+            paths = [relatives[i] for i in members]
+            spans = len({entries[p][1] for p in paths}) > 1
+            leaks += spans
+            by_class = {}
+            for path in paths:
+                by_class.setdefault(entries[path][0], []).append(path)
+            if len(by_class) > 1:
+                conflicts.append(sorted(paths))
+
+            if presplit:
+                # The shipped split is kept; a cluster spanning it keeps only train copies
+                if spans:
+                    by_class = {name: [p for p in class_paths if entries[p][1] == 'train']
+                                for name, class_paths in by_class.items()}
+                keep = [self.largest(hashes, class_paths) for class_paths in by_class.values() if class_paths]
+            else:
+                keep = [self.largest(hashes, class_paths) for class_paths in by_class.values()]
+                key = min(keep)
+                groups.update({path: key for path in keep if path != key})
+            dropped += [path for path in paths if path not in keep]
+
+        # Training set size once the manifest applies: dropped images go, cluster members follow their key
+        dropped_set = set(dropped)
+        train_after = sum(
+            1 for path in relatives if path not in dropped_set and
+            (entries[path][1] if presplit else
+             'val' if is_validation(groups.get(path, path), self.validation_split) else 'train') == 'train'
+        )
+        train_before = sum(1 for _, split in entries.values() if split == 'train')
+        report = {
+            'images': len(entries),
+            'clusters': len(clusters),
+            'exact_duplicates': exact,
+            'dropped': len(dropped),
+            'shrinkage': round(len(dropped) / len(entries), 4) if entries else 0.0,
+            'train_images': {'before': train_before, 'after': train_after},
+            'train_val_leaks': leaks,
+            'label_conflicts': len(conflicts),
+            'epoch_time_saving': round(1 - train_after / train_before, 4) if train_before else 0.0,
+        }
+        images_per_sec = measured_throughput(Config.MODEL_DIR / 'training_throughput.csv')
+        if images_per_sec:
+            report['epoch_seconds_saved'] = round((train_before - train_after) / images_per_sec, 1)
+        if not dry_run:
+            manifest = {
+                'format': FORMAT_VERSION,
+                'threshold': self.threshold,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'report': report,
+                'dropped': sorted(dropped),
+                'groups': groups,
+                'conflicts': conflicts,
+                'hashes': hashes,
+            }
+            temp = self.data_dir / f".{DEDUP_MANIFEST}.tmp"
+            temp.write_text(json.dumps(manifest, indent=1) + '\n', encoding='utf-8')
+            os.replace(temp, self.data_dir / DEDUP_MANIFEST)
+        return report
+
+    @staticmethod
+    def largest(hashes, paths):
+        """The member to keep: the biggest file (most detail), then the first path"""
+        return min(paths, key=lambda path: (-hashes[path]['size'], path))
+
+
+def measured_throughput(csv_path):
+    """Median images/sec of the last training run's image phases (training_throughput.csv), or None"""
+    try:
+        with open(csv_path, newline='') as f:
+            rates = [float(row['images_per_sec']) for row in csv.DictReader(f) if float(row['images_per_sec']) > 0]
+    except (OSError, ValueError, KeyError):
+        return None
+    return float(np.median(rates)) if rates else None
+
+
+def print_report(report, dry_run=False):
+    print(f"\n{report['images']:,} images, {report['clusters']:,} duplicate clusters "
+          f"({report['exact_duplicates']:,} exact copies)")
+    train = report['train_images']
+    print(f"{'Would drop' if dry_run else 'Dropped'} {report['dropped']:,} images ({report['shrinkage']:.1%} of the "
+          f"dataset); training images {train['before']:,} -> {train['after']:,}")
+    print(f"Clusters that spanned train and val: {report['train_val_leaks']:,} (now on one side)")
+    if report['label_conflicts']:
+        print(f"⚠️ {report['label_conflicts']} clusters hold near-identical images under different classes "
+              f"(listed under 'conflicts' in {DEDUP_MANIFEST})")
+    change = f"Training epoch time: {-report['epoch_time_saving']:+.1%}"
+    if 'epoch_seconds_saved' in report:
+        change += f" ({-report['epoch_seconds_saved']:+.0f}s at the last run's measured throughput)"
+    print(change)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Collapse duplicate and near-duplicate training images')
+    parser.add_argument('--data-dir', default=str(Config.DATA_DIR))
+    parser.add_argument('--threshold', type=int, default=4, help='Max differing dHash bits for a near duplicate')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dry-run', action='store_true', help='Report only; do not write dedup.json')
+    args = parser.parse_args()
+
+    deduplicator = DatasetDeduplicator(args.data_dir, args.threshold, Config.VALIDATION_SPLIT, args.workers)
+    print_report(deduplicator.run(dry_run=args.dry_run), dry_run=args.dry_run)
@@ -0,0 +1,231 @@
+"""Distil the served ResNet50 into a MobileNetV2 student for fast CPU serving.
+
+The teacher's softened class probabilities (temperature ``T``) are the
+main training signal; the folder label, or Gemini's label for logged
+uploads, adds a small hard-label term:
+
+    loss = alpha * T^2 * KL(teacher_T || student_T) + (1 - alpha) * CE(label, student)
+
+    python models/distill.py [--epochs 15] [--fine-tune-epochs 10] [--gemini-labels]
+
+Writes ``student_mobilenet.h5`` and ``distillation_report.json`` (accuracy
+and latency of teacher and student) to Config.MODEL_DIR.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+from config.config import Config
+from cnn_model import DiseaseDetectionModel
+from data_loader import DatasetLoader
+from utils.diagnosis_log import DiagnosisLog
+from utils.disease_labels import disease_labels
+
+EPSILON = 1e-7
+
+
+def softened(probabilities, temperature):
+    """Re-soften softmax outputs: softmax(log(p) / T)"""
+    return tf.nn.softmax(tf.math.log(probabilities + EPSILON) / temperature, axis=-1)
+
+
+class Distiller(tf.keras.Model):
+    """Trains ``student`` against a frozen ``teacher``; both output softmax probabilities"""
+
+    def __init__(self, student, teacher, temperature=4.0, alpha=0.7, teacher_order=None):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.temperature = temperature
+        self.alpha = alpha
+        # Teacher output index for each student class, when the two were trained on differently named folders
+        self.teacher_order = None if teacher_order is None else tf.constant(teacher_order, dtype=tf.int32)
+        self.kl = tf.keras.losses.KLDivergence()
+        self.cross_entropy = tf.keras.losses.CategoricalCrossentropy()
+        self.loss_tracker = tf.keras.metrics.Mean(name='loss')
+        self.accuracy_tracker = tf.keras.metrics.CategoricalAccuracy(name='accuracy')
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.accuracy_tracker]
+
+    def call(self, inputs, training=False):
+        return self.student(inputs, training=training)
+
+    def teacher_probabilities(self, images):
+        probabilities = self.teacher(images, training=False)
+        if self.teacher_order is not None:
+            probabilities = tf.gather(probabilities, self.teacher_order, axis=-1)
+        return probabilities
+
+    def distillation_loss(self, labels, teacher_probs, student_probs):
+        soft = self.kl(softened(teacher_probs, self.temperature), softened(student_probs, self.temperature))
+        hard = self.cross_entropy(labels, student_probs)
+        # T^2 keeps the soft-target gradients on the same scale as the hard-label ones
+        return self.alpha * self.temperature ** 2 * soft + (1 - self.alpha) * hard
+
+    def train_step(self, data):
+        images, labels = data
+        teacher_probs = self.teacher_probabilities(images)
+        with tf.GradientTape() as tape:
+            student_probs = self.student(images, training=True)
+            loss = self.distillation_loss(labels, teacher_probs, student_probs)
+        variables = self.student.trainable_variables
+        self.optimizer.apply_gradients(zip(tape.gradient(loss, variables), variables))
+        self.loss_tracker.update_state(loss)
+        self.accuracy_tracker.update_state(labels, student_probs)
+        return {m.name: m.result() for m in self.metrics}
+
+    def test_step(self, data):
+        images, labels = data
+        student_probs = self.student(images, training=False)
+        loss = self.distillation_loss(labels, self.teacher_probabilities(images), student_probs)
+        self.loss_tracker.update_state(loss)
+        self.accuracy_tracker.update_state(labels, student_probs)
+        return {m.name: m.result() for m in self.metrics}
+
+
+def class_permutation(teacher_indices, student_indices):
+    """Teacher output index for each student class, matched by canonical disease label"""
+    teacher_labels = disease_labels.from_class_indices(teacher_indices)
+    student_labels = disease_labels.from_class_indices(student_indices)
+    missing = set(student_labels) - set(teacher_labels)
+    if missing:
+        raise ValueError(f"The teacher was not trained on: {', '.join(sorted(missing))}")
+    return [teacher_labels.index(label) for label in student_labels]
+
+
+def evaluate_accuracy(model, dataset):
+    correct = total = 0
+    for images, labels in dataset:
+        predictions = model(images, training=False)
+        correct += int(tf.reduce_sum(tf.cast(tf.argmax(predictions, -1) == tf.argmax(labels, -1), tf.int32)))
+        total += int(labels.shape[0])
+    return correct / total if total else 0.0
+
+
+def measure_latency(model, img_size, runs=50, batch_size=32):
+    """Median single-image latency (ms) and batch throughput (images/sec) on this CPU"""
+    single = tf.random.uniform((1,) + tuple(img_size) + (3,), 0, 255)
+    batch = tf.random.uniform((batch_size,) + tuple(img_size) + (3,), 0, 255)
+    predict = tf.function(lambda x: model(x, training=False))
+    predict(single)
+    predict(batch)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        predict(single).numpy()
+        timings.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    for _ in range(max(runs // 5, 1)):
+        predict(batch).numpy()
+    throughput = max(runs // 5, 1) * batch_size / (time.perf_counter() - started)
+    return float(np.median(timings)), throughput
+
+
+def distill(data_dir, teacher_path, class_indices_path, student_path, epochs=15, fine_tune_epochs=10,
+            use_gemini_labels=False, temperature=Config.DISTILL_TEMPERATURE, alpha=Config.DISTILL_ALPHA):
+    print("=" * 60)
+    print("Distilling teacher into MobileNetV2 student")
+    print("=" * 60)
+
+    teacher = load_model(teacher_path, compile=False, safe_mode=False)
+    teacher.trainable = False
+    with open(class_indices_path, 'r') as f:
+        teacher_indices = json.load(f)
+
+    extra = []
+    if use_gemini_labels:
+        extra = DiagnosisLog(Config.DIAGNOSIS_LOG_PATH).labelled_uploads(
+            Config.UPLOAD_DIR, disease_labels, Config.DISTILL_MIN_GEMINI_CONFIDENCE
+        )
+    loader = DatasetLoader(
+        data_dir,
+        img_size=Config.IMG_SIZE,
+        batch_size=Config.BATCH_SIZE,
+        validation_split=Config.VALIDATION_SPLIT,
+        seed=Config.DATA_SEED,
+        cache_dir=Config.DATA_CACHE_DIR or None,
+        # Uploads are plain files, so the compiled shards only serve runs without them
+        compiled_dir=None if extra else Config.COMPILED_DATA_DIR
+    )
+    files = loader.list_files()
+    train_items = list(files['train'])
+    if extra:
+        label_index = {disease_labels.get(name): index for name, index in loader.class_indices.items()}
+        uploads = [(path, label_index[label]) for path, label in extra if label in label_index]
+        train_items += uploads
+        print(f"Adding {len(uploads)} Gemini-labelled uploads to {len(files['train'])} training images")
+    train_ds = loader.build(train_items, 'train')
+    val_ds = loader.build(files['val'], 'val')
+
+    student_model = DiseaseDetectionModel(len(loader.class_indices), Config.IMG_SIZE, architecture='mobilenet')
+    student = student_model.build_model()
+    distiller = Distiller(student, teacher, temperature, alpha,
+                          teacher_order=class_permutation(teacher_indices, loader.class_indices))
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_accuracy', mode='max', patience=5,
+                                                      restore_best_weights=True, verbose=1)
+
+    distiller.compile(optimizer=tf.keras.optimizers.Adam(Config.LEARNING_RATE))
+    distiller.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=[early_stopping], verbose=1)
+    if fine_tune_epochs:
+        student_model.fine_tune(base_layers_to_unfreeze=30)
+        distiller.compile(optimizer=tf.keras.optimizers.Adam(1e-5))
+        distiller.fit(train_ds, validation_data=val_ds, epochs=fine_tune_epochs, callbacks=[early_stopping], verbose=1)
+
+    student.save(student_path)
+    with open(Path(student_path).with_name(Path(student_path).stem + '_class_indices.json'), 'w') as f:
+        json.dump(loader.class_indices, f)
+
+    report = {'temperature': temperature, 'alpha': alpha, 'gemini_labelled_uploads': len(train_items) - len(files['train'])}
+    for name, model in (('teacher', lambda x, training=False: distiller.teacher_probabilities(x)), ('student', student)):
+        accuracy = evaluate_accuracy(model, val_ds)
+        latency_ms, throughput = measure_latency(model, Config.IMG_SIZE)
+        report[name] = {'accuracy': round(accuracy, 4), 'latency_ms': round(latency_ms, 2),
+                        'images_per_sec': round(throughput, 1)}
+    report['teacher']['parameters'] = teacher.count_params()
+    report['student']['parameters'] = student.count_params()
+    report['speedup'] = round(report['teacher']['latency_ms'] / report['student']['latency_ms'], 2)
+    report['accuracy_drop'] = round(report['teacher']['accuracy'] - report['student']['accuracy'], 4)
+
+    report_path = Path(student_path).parent / 'distillation_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'':10} {'accuracy':>9} {'latency':>10} {'images/sec':>11} {'params':>12}")
+    for name in ('teacher', 'student'):
+        row = report[name]
+        print(f"{name:10} {row['accuracy']:>9.4f} {row['latency_ms']:>8.1f}ms {row['images_per_sec']:>11.1f} "
+              f"{row['parameters']:>12,}")
+    print(f"\n✓ Student is {report['speedup']}x faster per image, accuracy drop {report['accuracy_drop']:+.4f}")
+    print(f"✓ Student saved to: {student_path}")
+    print(f"✓ Report saved to: {report_path}")
+    return student, report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Distil the ResNet50 model into a MobileNetV2 student')
+    parser.add_argument('--data-dir', default=str(Config.DATA_DIR))
+    parser.add_argument('--teacher', default=str(Config.MODEL_DIR / 'best_model.h5'))
+    parser.add_argument('--class-indices', default=str(Config.MODEL_DIR / 'class_indices.json'))
+    parser.add_argument('--student', default=str(Config.MODEL_DIR / 'student_mobilenet.h5'))
+    parser.add_argument('--epochs', type=int, default=15)
+    parser.add_argument('--fine-tune-epochs', type=int, default=10)
+    parser.add_argument('--temperature', type=float, default=Config.DISTILL_TEMPERATURE)
+    parser.add_argument('--alpha', type=float, default=Config.DISTILL_ALPHA)
+    parser.add_argument('--gemini-labels', action='store_true',
+                        help='Also train on logged uploads, with Gemini\'s label as the hard target')
+    args = parser.parse_args()
+
+    distill(args.data_dir, args.teacher, args.class_indices, args.student, args.epochs, args.fine_tune_epochs,
+            args.gemini_labels, args.temperature, args.alpha)
@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+try:
+    from models.preprocessing import NORMALIZATION
+except ImportError:  # imported from inside models/
+    from preprocessing import NORMALIZATION
+
+META_NAME = 'meta.json'
+
+
+def feature_key(architecture, img_size, items):
+    """Identifies one set of embeddings: backbone, its input normalisation, input size and the exact file list"""
+    listing = '\n'.join(f"{path}\t{label}" for path, label in items)
+    normalization = NORMALIZATION.get(architecture, 'none')
+    return f"{architecture}-{normalization}-{img_size[0]}x{img_size[1]}-{zlib.crc32(listing.encode('utf-8')):08x}"
+
+
+class FeatureCache:
+    """Pooled backbone embeddings stored on disk as float16 .npy memmaps
+
+    While the backbone is frozen its output for an image never changes, so
+    it is computed once per image and phase-1 epochs only run the small
+    Dense head. Each split is stored as ``<split>-features.npy`` (N x D,
+    float16) and ``<split>-labels.npy``; ``meta.json`` records the key they
+    were built for, and a changed key (another backbone, input size or file
+    list) rebuilds them.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _meta(self):
+        try:
+            with open(self.directory / META_NAME, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _paths(self, split):
+        return self.directory / f"{split}-features.npy", self.directory / f"{split}-labels.npy"
+
+    def load(self, split, key):
+        """(features memmap, labels) when the cached split matches ``key``, else None"""
+        if self._meta().get(split, {}).get('key') != key:
+            return None
+        features_path, labels_path = self._paths(split)
+        try:
+            return np.load(features_path, mmap_mode='r'), np.load(labels_path)
+        except (OSError, ValueError):
+            return None
+
+    def build(self, split, key, extractor, dataset, items):
+        """Run ``extractor`` over ``dataset`` (unshuffled, in ``items`` order) and store the embeddings"""
+        features_path, labels_path = self._paths(split)
+        temp_path = features_path.with_suffix('.tmp.npy')
+        dim = int(extractor.output.shape[-1])
+        features = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.float16, shape=(len(items), dim))
+
+        started = time.perf_counter()
+        offset = 0
+        for images, _ in dataset:
+            batch = extractor(images, training=False).numpy()
+            features[offset:offset + len(batch)] = batch
+            offset += len(batch)
+        features.flush()
+        del features
+        if offset != len(items):
+            os.remove(temp_path)
+            raise ValueError(f"Extracted {offset} embeddings for {len(items)} images")
+
+        os.replace(temp_path, features_path)
+        np.save(labels_path, np.array([label for _, label in items], dtype=np.int32))
+        elapsed = time.perf_counter() - started
+        print(f"🧊 Cached {len(items)} {split} embeddings ({dim}-d float16) in {elapsed:.0f}s "
+              f"({len(items) / elapsed if elapsed else 0:,.0f} images/sec)")
+
+        meta = self._meta()
+        meta[split] = {'key': key, 'count': len(items), 'dim': dim}
+        temp_meta = self.directory / f".{META_NAME}.tmp"
+        temp_meta.write_text(json.dumps(meta, indent=2) + '\n')
+        os.replace(temp_meta, self.directory / META_NAME)
+        return np.load(features_path, mmap_mode='r'), np.load(labels_path)
+
+    def get(self, split, architecture, extractor, loader, items):
+        """Cached embeddings for ``items``, computing them first when missing or stale"""
+        key = feature_key(architecture, loader.img_size, items)
+        cached = self.load(split, key)
+        if cached is not None:
+            print(f"🧊 Reusing cached {split} embeddings ({len(items)} images)")
+            return cached
+        dataset = loader.build(items, split, cache=False, training=False)
+        return self.build(split, key, extractor, dataset, items)
+
+
+class FeatureSequence(tf.keras.utils.PyDataset):
+    """Batches of (float32 embeddings, one-hot labels) read from a feature memmap"""
+
+    def __init__(self, features, labels, num_classes, batch_size=32, shuffle=True, seed=42, **kwargs):
+        super().__init__(**kwargs)
+        self.features = features
+        self.labels = labels
+        self.num_classes = num_classes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.order = np.arange(len(labels))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.labels) / self.batch_size)
+
+    def __getitem__(self, index):
+        # Sorted indices keep each batch's reads from the memmap in file order
+        batch = np.sort(self.order[index * self.batch_size:(index + 1) * self.batch_size])
+        x = np.asarray(self.features[batch], dtype=np.float32)
+        y = np.eye(self.num_classes, dtype=np.float32)[self.labels[batch]]
+        return x, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
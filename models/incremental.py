@@ -0,0 +1,184 @@
+"""Fine-tune the classification head on newly confirmed uploads, without a full retrain.
+
+Takes the uploads users confirmed (or corrected) since the served model
+was made, and trains only the Dense head of ``best_model.h5`` on them:
+
+    python models/incremental.py [--epochs 10] [--replay-ratio 2] [--promote]
+
+The frozen backbone runs once per image to give embeddings, so the update
+takes minutes on CPU. A replay buffer of original training images, sampled
+evenly across classes, is mixed in so the head does not forget the classes
+the new photos do not cover. Accuracy on a sample of the original
+validation images is checked before and after; the new model is written as
+``versions/model_vNNN.h5`` and only replaces ``best_model.h5`` with
+``--promote`` when that accuracy dropped by no more than
+Config.INCREMENTAL_MAX_ACCURACY_DROP.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tensorflow.keras.models import load_model
+from config.config import Config
+from cnn_model import DiseaseDetectionModel
+from data_loader import DatasetLoader
+from dataset_files import is_validation, list_dataset
+from feature_cache import FeatureSequence
+from model_versions import ModelVersions
+from utils.diagnosis_log import DiagnosisLog
+from utils.disease_labels import disease_labels
+
+
+def replay_sample(items, size, seed=42):
+    """Up to ``size`` of ``items`` (path, label), drawn round-robin across classes"""
+    rng = random.Random(seed)
+    by_label = {}
+    for item in items:
+        by_label.setdefault(item[1], []).append(item)
+    for group in by_label.values():
+        rng.shuffle(group)
+    sample = []
+    groups = [by_label[label] for label in sorted(by_label)]
+    while len(sample) < size and any(groups):
+        for group in groups:
+            if group and len(sample) < size:
+                sample.append(group.pop())
+    return sample
+
+
+def embed(extractor, dataset):
+    """(float32 embeddings, int labels) for every batch of ``dataset``"""
+    features, labels = [], []
+    for images, one_hot in dataset:
+        features.append(extractor(images, training=False).numpy())
+        labels.append(np.argmax(one_hot.numpy(), axis=-1))
+    if not features:
+        return np.zeros((0, int(extractor.output.shape[-1])), np.float32), np.zeros((0,), np.int32)
+    return np.concatenate(features), np.concatenate(labels).astype(np.int32)
+
+
+def head_accuracy(head, features, labels):
+    if not len(labels):
+        return None
+    predictions = head.predict(features, batch_size=256, verbose=0)
+    return round(float(np.mean(np.argmax(predictions, axis=-1) == labels)), 4)
+
+
+def incremental_update(base_path, class_indices_path, data_dir, epochs=Config.INCREMENTAL_EPOCHS,
+                       replay_ratio=Config.INCREMENTAL_REPLAY_RATIO, augment_passes=2, promote=False):
+    """Train a new model version; returns its manifest entry, or None when there is nothing new"""
+    print("=" * 60)
+    print("Incremental head fine-tuning from confirmed uploads")
+    print("=" * 60)
+    started = time.perf_counter()
+
+    versions = ModelVersions(Config.MODEL_VERSIONS_DIR)
+    current = versions.current()
+    since = current['confirmed_until'] if current else 0.0
+    with open(class_indices_path, 'r') as f:
+        class_indices = json.load(f)
+
+    # -- New uploads --------------------------------------------------------
+    confirmed = DiagnosisLog(Config.DIAGNOSIS_LOG_PATH).confirmed_uploads(Config.UPLOAD_DIR, disease_labels, since)
+    label_index = {disease_labels.get(name): index for name, index in class_indices.items()}
+    uploads = [(path, label_index[label]) for path, label, _ in confirmed if label in label_index]
+    if len(confirmed) > len(uploads):
+        print(f"⚠️ {len(confirmed) - len(uploads)} confirmed uploads are of classes this model does not have")
+    if len(uploads) < Config.INCREMENTAL_MIN_UPLOADS:
+        print(f"ℹ️ {len(uploads)} new confirmed uploads; waiting for {Config.INCREMENTAL_MIN_UPLOADS}")
+        return None
+    new_train, new_val = [], []
+    for item in uploads:
+        (new_val if is_validation(os.path.basename(item[0]), Config.VALIDATION_SPLIT) else new_train).append(item)
+
+    # -- Replay buffer ------------------------------------------------------
+    data_indices, files = list_dataset(data_dir, Config.VALIDATION_SPLIT)
+    if data_indices != class_indices:
+        raise ValueError(f"The classes in {data_dir} do not match {class_indices_path}")
+    replay = replay_sample(files['train'], replay_ratio * len(new_train), seed=Config.DATA_SEED)
+    original_val = replay_sample(files['val'], Config.INCREMENTAL_VAL_SAMPLES, seed=Config.DATA_SEED)
+    print(f"New uploads: {len(new_train)} train / {len(new_val)} val; replay: {len(replay)} original images")
+
+    # -- Embeddings ---------------------------------------------------------
+    model = load_model(base_path, compile=False, safe_mode=False)
+    disease_model = DiseaseDetectionModel(len(class_indices), Config.IMG_SIZE, Config.MODEL_ARCHITECTURE)
+    disease_model.model = model
+    extractor = disease_model.feature_extractor()
+    head = disease_model.head_model()
+
+    loader = DatasetLoader(data_dir, img_size=Config.IMG_SIZE, batch_size=Config.BATCH_SIZE, seed=Config.DATA_SEED)
+    loader.class_indices = class_indices
+    # The few new photos are seen once as they are and ``augment_passes`` times augmented
+    parts = [embed(extractor, loader.build(new_train + replay, 'train', cache=False, training=False))]
+    for _ in range(augment_passes):
+        parts.append(embed(extractor, loader.build(new_train, 'train', cache=False)))
+    train_x = np.concatenate([features for features, _ in parts])
+    train_y = np.concatenate([labels for _, labels in parts])
+    val_sets = {
+        'original_val': embed(extractor, loader.build(original_val, 'val', cache=False)),
+        'uploads_val': embed(extractor, loader.build(new_val, 'val', cache=False)),
+    }
+    accuracy = {name: {'before': head_accuracy(head, *data)} for name, data in val_sets.items()}
+
+    # -- Head fine-tuning ---------------------------------------------------
+    disease_model.compile_model(learning_rate=Config.INCREMENTAL_LEARNING_RATE, model=head)
+    head.fit(FeatureSequence(train_x, train_y, len(class_indices), Config.BATCH_SIZE, seed=Config.DATA_SEED),
+             epochs=epochs, verbose=1)
+    for name, data in val_sets.items():
+        accuracy[name]['after'] = head_accuracy(head, *data)
+
+    drop = accuracy['original_val']['before'] - accuracy['original_val']['after'] if original_val else 0.0
+    accepted = drop <= Config.INCREMENTAL_MAX_ACCURACY_DROP
+
+    # -- Versioned artefact -------------------------------------------------
+    version, path = versions.next_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model.save(path)
+    with open(path.with_name(path.stem + '_class_indices.json'), 'w') as f:
+        json.dump(class_indices, f)
+    entry = versions.add({
+        'version': version,
+        'path': str(path),
+        'parent': current['version'] if current else None,
+        'base_model': str(base_path),
+        'confirmed_until': max(timestamp for _, _, timestamp in confirmed),
+        'new_uploads': {'train': len(new_train), 'val': len(new_val)},
+        'replay': len(replay),
+        'epochs': epochs,
+        'accuracy': accuracy,
+        'accepted': accepted,
+        'seconds': round(time.perf_counter() - started, 1),
+    })
+
+    for name, values in accuracy.items():
+        print(f"  {name:13} before {values['before']}  after {values['after']}")
+    print(f"\n✓ Model {version} saved to: {path} ({entry['seconds'] / 60:.1f} min)")
+    if not accepted:
+        print(f"⚠️ Original validation accuracy dropped by {drop:.4f}; {version} was not promoted")
+    elif promote:
+        versions.promote(version, base_path)
+        print(f"✓ Promoted {version} to: {base_path}")
+    return entry
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fine-tune the classification head on newly confirmed uploads')
+    parser.add_argument('--model', default=str(Config.MODEL_DIR / 'best_model.h5'))
+    parser.add_argument('--class-indices', default=str(Config.MODEL_DIR / 'class_indices.json'))
+    parser.add_argument('--data-dir', default=str(Config.DATA_DIR))
+    parser.add_argument('--epochs', type=int, default=Config.INCREMENTAL_EPOCHS)
+    parser.add_argument('--replay-ratio', type=int, default=Config.INCREMENTAL_REPLAY_RATIO,
+                        help='Original training images per new upload')
+    parser.add_argument('--promote', action='store_true', help='Replace the served model when the check passes')
+    args = parser.parse_args()
+
+    incremental_update(args.model, args.class_indices, args.data_dir, args.epochs, args.replay_ratio,
+                       promote=args.promote)
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+MANIFEST_NAME = 'versions.json'
+
+
+class ModelVersions:
+    """Numbered model artefacts and their lineage in ``versions.json``
+
+    Each incremental update writes ``model_vNNN.h5`` (plus its class
+    indices) into the versions folder and a manifest entry describing it.
+    ``current`` names the version last promoted to the served model path,
+    or None while that is still the output of a full training run.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def load(self):
+        try:
+            with open(self.directory / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'current': None, 'versions': []}
+
+    def save(self, manifest):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp = self.directory / f".{MANIFEST_NAME}.tmp"
+        temp.write_text(json.dumps(manifest, indent=2) + '\n', encoding='utf-8')
+        os.replace(temp, self.directory / MANIFEST_NAME)
+
+    def current(self):
+        """Manifest entry of the served version, or None"""
+        manifest = self.load()
+        return self.get(manifest['current'], manifest)
+
+    def get(self, version, manifest=None):
+        manifest = manifest or self.load()
+        return next((entry for entry in manifest['versions'] if entry['version'] == version), None)
+
+    def next_path(self):
+        """(version id, artefact path) for the next version"""
+        number = len(self.load()['versions']) + 1
+        version = f"v{number:03d}"
+        return version, self.directory / f"model_{version}.h5"
+
+    def add(self, entry):
+        manifest = self.load()
+        entry.setdefault('created', time.strftime('%Y-%m-%dT%H:%M:%S'))
+        manifest['versions'].append(entry)
+        self.save(manifest)
+        return entry
+
+    def promote(self, version, served_path):
+        """Copy a version over the served model file and mark it current"""
+        manifest = self.load()
+        entry = self.get(version, manifest)
+        if entry is None:
+            raise ValueError(f"Unknown model version: {version}")
+        served_path = Path(served_path)
+        temp = served_path.with_name(f".{served_path.name}.tmp")
+        shutil.copy2(entry['path'], temp)
+        os.replace(temp, served_path)
+        manifest['current'] = version
+        self.save(manifest)
+        return entry
@@ -7,8 +7,14 @@ from tensorflow.keras.models import load_model
 import cv2
 import json
 from config.config import Config
+from utils.disease_labels import disease_labels
 from pathlib import Path
 
+try:
+    from models.preprocessing import has_preprocessing
+except ImportError:  # imported from inside models/
+    from preprocessing import has_preprocessing
+
 
 class DiseasePredictor:
     """Handle disease prediction from images"""
@@ -42,25 +48,28 @@ class DiseasePredictor:
         with open(class_indices_path, 'r') as f:
             self.class_indices = json.load(f)
 
-        # ✅ Build ordered class list (sorted by index value)
-        self.class_names = [cls for cls, idx in sorted(self.class_indices.items(), key=lambda x: x[1])]
+        # ✅ Ordered class list in canonical spelling, whatever the training folders were called
+        self.class_names = disease_labels.from_class_indices(self.class_indices)
+
+        # ✅ Models built by DiseaseDetectionModel resize and normalise inside the graph;
+        # older ones take float [0, 255] pixels at their fixed input size
+        self.in_graph_preprocessing = has_preprocessing(self.model)
+        height, width = self.model.input_shape[1:3]
+        self.img_size = (width, height) if height and width else tuple(reversed(Config.IMG_SIZE))
 
         print(f"✅ Model loaded: {model_path}")
         print(f"✅ Classes loaded ({len(self.class_names)}): {self.class_names}")
 
     def preprocess_image(self, image_path):
-        """Preprocess image for EfficientNet model"""
+        """Image as a batch of one for the model: raw RGB uint8, resized here only for older models"""
         img = cv2.imread(str(image_path))
         if img is None:
             raise ValueError(f"Cannot read image: {image_path}")
 
         img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = cv2.resize(img, self.img_size)
-
-        from tensorflow.keras.applications.efficientnet import preprocess_input
-        img = preprocess_input(img.astype(np.float32))
-        img = np.expand_dims(img, axis=0)
-        return img
+        if not self.in_graph_preprocessing:
+            img = cv2.resize(img, self.img_size).astype(np.float32)
+        return np.expand_dims(img, axis=0)
 
     def predict(self, image_path, top_k=3):
         """Predict disease from image"""
@@ -88,7 +97,44 @@ class DiseasePredictor:
 
         return results
     
-   def is_likely_leaf(path, debug=False):
+    def predict_with_context(self, image_path, weather_data=None, soil_data=None):
+        """Enhanced prediction with environmental context"""
+        base_predictions = self.predict(image_path)
+
+        if weather_data or soil_data:
+            adjusted_predictions = self._adjust_predictions(
+                base_predictions, weather_data, soil_data
+            )
+            return adjusted_predictions
+
+        return base_predictions
+
+    def _adjust_predictions(self, predictions, weather_data, soil_data):
+        """Adjust predictions based on environmental context"""
+        adjusted = predictions.copy()
+
+        if weather_data:
+            humidity = weather_data.get('humidity', 50)
+            temp = weather_data.get('temperature', 25)
+
+            for pred in adjusted:
+                disease = pred['disease']
+
+                if 'blight' in disease.lower() and humidity > 70:
+                    pred['confidence'] = min(pred['confidence'] * 1.1, 1.0)
+                elif 'virus' in disease.lower() and temp > 30:
+                    pred['confidence'] = min(pred['confidence'] * 1.05, 1.0)
+
+        # Re-normalize confidences
+        total = sum(p['confidence'] for p in adjusted)
+        for pred in adjusted:
+            pred['confidence'] /= total
+            pred['percentage'] = pred['confidence'] * 100
+
+        return sorted(adjusted, key=lambda x: x['confidence'], reverse=True)
+
+
+def is_likely_leaf(path, debug=False):
     """
     Returns (is_leaf: bool, score: float, details: dict)
     Score is in [0,1] — higher => more leaf-like.
@@ -232,45 +278,6 @@ class DiseasePredictor:
         return False, 0.0, {'error': str(e)}
 
 
-
-
-    def predict_with_context(self, image_path, weather_data=None, soil_data=None):
-        """Enhanced prediction with environmental context"""
-        base_predictions = self.predict(image_path)
-
-        if weather_data or soil_data:
-            adjusted_predictions = self._adjust_predictions(
-                base_predictions, weather_data, soil_data
-            )
-            return adjusted_predictions
-
-        return base_predictions
-
-    def _adjust_predictions(self, predictions, weather_data, soil_data):
-        """Adjust predictions based on environmental context"""
-        adjusted = predictions.copy()
-
-        if weather_data:
-            humidity = weather_data.get('humidity', 50)
-            temp = weather_data.get('temperature', 25)
-
-            for pred in adjusted:
-                disease = pred['disease']
-
-                if 'blight' in disease.lower() and humidity > 70:
-                    pred['confidence'] = min(pred['confidence'] * 1.1, 1.0)
-                elif 'virus' in disease.lower() and temp > 30:
-                    pred['confidence'] = min(pred['confidence'] * 1.05, 1.0)
-
-        # Re-normalize confidences
-        total = sum(p['confidence'] for p in adjusted)
-        for pred in adjusted:
-            pred['confidence'] /= total
-            pred['percentage'] = pred['confidence'] * 100
-
-        return sorted(adjusted, key=lambda x: x['confidence'], reverse=True)
-
-
 if __name__ == '__main__':
     print("Testing Disease Predictor...")
     print("=" * 60)
@@ -0,0 +1,55 @@
+import tensorflow as tf
+
+# Input normalisation each ImageNet backbone was trained with, applied to RGB pixels in [0, 255]
+#   caffe: RGB -> BGR and subtract the ImageNet channel means (ResNet50, VGG16)
+#   tf:    scale to [-1, 1] (MobileNetV2)
+#   none:  the backbone rescales internally (EfficientNet, MobileNetV3)
+NORMALIZATION = {
+    'resnet50': 'caffe',
+    'vgg16': 'caffe',
+    'mobilenet': 'tf',
+    'efficientnetb0': 'none',
+    'mobilenetv3small': 'none',
+}
+CAFFE_BGR_MEAN = (103.939, 116.779, 123.68)
+
+
+@tf.keras.utils.register_keras_serializable(package='CropGuardian')
+class ImagePreprocessing(tf.keras.layers.Layer):
+    """Resize and normalisation as the first layer of the model
+
+    Takes RGB images of any size and dtype (uint8 straight from the decoder,
+    or the float32 batches of the training pipeline) and outputs float32 at
+    ``img_size``, normalised for the backbone. Because it is part of the
+    saved model, serving feeds raw pixels and cannot get it wrong.
+    """
+
+    def __init__(self, img_size=(224, 224), mode='none', **kwargs):
+        super().__init__(**kwargs)
+        if mode not in ('caffe', 'tf', 'none'):
+            raise ValueError(f"Unknown normalisation: {mode}")
+        self.img_size = tuple(img_size)
+        self.mode = mode
+
+    def call(self, images):
+        images = tf.cast(images, tf.float32)
+        if tuple(images.shape[1:3]) != self.img_size:
+            images = tf.image.resize(images, self.img_size)
+        if self.mode == 'caffe':
+            images = images[..., ::-1] - tf.constant(CAFFE_BGR_MEAN)
+        elif self.mode == 'tf':
+            images = images / 127.5 - 1.0
+        return images
+
+    def compute_output_shape(self, input_shape):
+        return (input_shape[0],) + self.img_size + (input_shape[-1],)
+
+    def get_config(self):
+        config = super().get_config()
+        config.update(img_size=list(self.img_size), mode=self.mode)
+        return config
+
+
+def has_preprocessing(model):
+    """True when ``model`` resizes and normalises its own input"""
+    return any(isinstance(layer, ImagePreprocessing) for layer in model.layers)
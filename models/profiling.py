@@ -0,0 +1,169 @@
+import csv
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+# Waiting on input for more than this share of the step time makes a run input-bound
+INPUT_BOUND_SHARE = 0.2
+
+CSV_FIELDS = ['phase', 'epoch', 'steps', 'images', 'train_seconds', 'images_per_sec',
+              'step_ms', 'compute_ms', 'input_wait_ms', 'input_wait_share', 'overhead_ms']
+
+
+class StepProfiler(tf.keras.callbacks.Callback):
+    """Per-step wall time of ``fit``, split into input wait and compute
+
+    Keras fetches the next batch inside the compiled train step, so the two
+    cannot be timed apart from a callback. ``start_phase`` therefore first
+    times the same train step on one batch already in memory (the weights
+    and optimizer state are restored afterwards): that is the compute time,
+    and whatever a real step takes beyond it was spent waiting on the input
+    pipeline. Time between steps (callbacks, logging) is reported as overhead.
+
+    Every epoch adds a row (images/sec, median step, compute and input wait)
+    to ``csv_path``. With ``trace_dir`` set, a TensorFlow profiler trace is
+    captured over the global steps ``trace_steps`` (start, stop) for
+    TensorBoard's Profile tab.
+    """
+
+    def __init__(self, batch_size, csv_path=None, trace_dir=None, trace_steps=(10, 20), calibration_steps=10):
+        super().__init__()
+        self.batch_size = batch_size
+        self.csv_path = Path(csv_path) if csv_path else None
+        self.trace_dir = trace_dir
+        self.trace_steps = trace_steps
+        self.calibration_steps = calibration_steps
+        self.rows = []
+        self.phase = 'train'
+        self.samples = None
+        self.compute_seconds = 0.0
+        self._global_step = 0
+        self._tracing = False
+
+    # -- Calibration -------------------------------------------------------
+
+    def start_phase(self, phase, model, dataset, samples=None):
+        """Name the next ``fit`` and time its train step on an in-memory batch"""
+        self.phase = phase
+        self.samples = samples
+        self.compute_seconds = self.calibrate(model, dataset)
+        print(f"⏱️ {phase}: compute {self.compute_seconds * 1000:.0f} ms/step on a batch already in memory")
+
+    def calibrate(self, model, dataset):
+        """Median seconds per train step with no input pipeline involved; leaves the model unchanged"""
+        images, labels = next(iter(dataset))[:2]
+        if not getattr(model.optimizer, 'built', True):
+            model.optimizer.build(model.trainable_variables)  # So its slots exist to be saved and restored
+        variables = model.variables + model.optimizer.variables
+        saved = [v.numpy() for v in variables]
+        try:
+            model.train_on_batch(images, labels)  # trace and warm up
+            timings = []
+            for _ in range(self.calibration_steps):
+                started = time.perf_counter()
+                model.train_on_batch(images, labels)
+                timings.append(time.perf_counter() - started)
+        finally:
+            for variable, value in zip(variables, saved):
+                variable.assign(value)
+        return float(np.median(timings))
+
+    # -- Keras hooks -------------------------------------------------------
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_started = time.perf_counter()
+        self._last_end = None
+        self._steps = []
+        self._gaps = []
+
+    def on_train_batch_begin(self, batch, logs=None):
+        now = time.perf_counter()
+        if self._last_end is not None:
+            self._gaps.append(now - self._last_end)
+        if self.trace_dir and self._global_step == self.trace_steps[0] and not self._tracing:
+            tf.profiler.experimental.start(self.trace_dir)
+            self._tracing = True
+        self._step_started = now
+
+    def on_train_batch_end(self, batch, logs=None):
+        if logs and 'loss' in logs:
+            float(logs['loss'])  # Wait for the step to finish before reading the clock
+        self._last_end = time.perf_counter()
+        self._steps.append(self._last_end - self._step_started)
+        self._global_step += 1
+        if self._tracing and self._global_step >= self.trace_steps[1]:
+            self._stop_trace()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self._steps:
+            return
+        steps = len(self._steps)
+        images = steps * self.batch_size
+        if self.samples:
+            images = min(images, self.samples)
+        train_seconds = self._last_end - self._epoch_started
+        step = float(np.median(self._steps))
+        compute = min(self.compute_seconds, step)
+        row = {
+            'phase': self.phase,
+            'epoch': epoch + 1,
+            'steps': steps,
+            'images': images,
+            'train_seconds': round(train_seconds, 3),
+            'images_per_sec': round(images / train_seconds, 1) if train_seconds > 0 else 0.0,
+            'step_ms': round(step * 1000, 2),
+            'compute_ms': round(compute * 1000, 2),
+            'input_wait_ms': round((step - compute) * 1000, 2),
+            'input_wait_share': round((step - compute) / step, 3) if step > 0 else 0.0,
+            'overhead_ms': round(float(np.median(self._gaps)) * 1000, 2) if self._gaps else 0.0,
+        }
+        self.rows.append(row)
+        self.write_csv()
+        print(f"\n⏱️ {row['images_per_sec']:,.0f} images/sec, step {row['step_ms']:.0f} ms "
+              f"(compute {row['compute_ms']:.0f} ms, input wait {row['input_wait_ms']:.0f} ms)")
+
+    def on_train_end(self, logs=None):
+        if self._tracing:
+            self._stop_trace()
+        self.print_summary(self.phase)
+
+    def _stop_trace(self):
+        tf.profiler.experimental.stop()
+        self._tracing = False
+        print(f"✓ Profiler trace saved to: {self.trace_dir}")
+
+    # -- Reporting ---------------------------------------------------------
+
+    def write_csv(self):
+        if not self.csv_path:
+            return
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.csv_path.with_suffix('.tmp')
+        with open(temp, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        os.replace(temp, self.csv_path)
+
+    def verdict(self, phase=None):
+        """('input-bound' | 'compute-bound', share of step time spent waiting on input), or None"""
+        rows = [row for row in self.rows if phase is None or row['phase'] == phase]
+        total_step = sum(row['step_ms'] * row['steps'] for row in rows)
+        if not total_step:
+            return None
+        share = sum(row['input_wait_ms'] * row['steps'] for row in rows) / total_step
+        return ('input-bound' if share > INPUT_BOUND_SHARE else 'compute-bound'), share
+
+    def print_summary(self, phase=None):
+        verdict = self.verdict(phase)
+        if verdict is None:
+            return
+        bound, share = verdict
+        print(f"\n⏱️ {phase or 'Training'} was {bound}: {share:.0%} of the step time was spent waiting on input")
+        if bound == 'input-bound':
+            print("   Compile the dataset (models/dataset_compiler.py), set DATA_CACHE_DIR or add CPU cores")
+        else:
+            print("   The model step dominates: a smaller backbone or FEATURE_CACHE_DIR for phase 1 will help more")
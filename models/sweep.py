@@ -0,0 +1,370 @@
+"""Parallel hyperparameter sweep over the phase-1 head with asynchronous successive halving.
+
+While the backbone is frozen its embeddings never change, so each
+architecture's embeddings are computed once (FeatureCache) and every trial
+only trains the Dense head on them. Trials run in a process pool, one
+worker per slice of the CPU cores, and ASHA stops weak trials early: a
+trial advances from one rung (epoch budget) to the next only while it is in
+the top ``1/eta`` of the trials that reached that rung.
+
+    python models/sweep.py --architectures resnet50 mobilenet \\
+        --learning-rates 1e-3 3e-4 1e-4 --batch-sizes 32 64 --head-units 512,256 256 1024,512
+
+Every result is written to ``results.sqlite3`` in the sweep directory
+(Config.SWEEP_DIR); ``--show`` prints the table of an earlier sweep.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import Config
+
+# TensorFlow is imported inside the functions below: a pool worker has to pin
+# its cores and thread counts before TensorFlow starts its thread pools.
+
+
+def parse_head_units(text):
+    """'512,256' -> (512, 256); 'none' -> () (softmax straight on the embeddings)"""
+    if text.lower() in ('', 'none'):
+        return ()
+    return tuple(int(units) for units in text.split(','))
+
+
+def search_space(architectures, learning_rates, batch_sizes, head_units, samples=None, seed=42):
+    """Trial specs for the full grid, or ``samples`` of them drawn at random"""
+    grid = list(itertools.product(architectures, learning_rates, batch_sizes, head_units))
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return [{'trial': f"t{i:03d}", 'architecture': architecture, 'learning_rate': learning_rate,
+             'batch_size': batch_size, 'head_units': list(units)}
+            for i, (architecture, learning_rate, batch_size, units) in enumerate(grid)]
+
+
+def core_sets(workers, cores=None):
+    """Split the usable cores into ``workers`` disjoint, near-equal sets"""
+    if cores is None:
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    workers = max(min(workers, len(cores)), 1)
+    size, extra = divmod(len(cores), workers)
+    sets, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        sets.append(cores[start:end])
+        start = end
+    return sets
+
+
+class AshaScheduler:
+    """Asynchronous successive halving: decides which trial segment to run next
+
+    Rungs are epoch budgets ``min_epochs * eta**k`` capped at ``max_epochs``.
+    A job is ``(trial, rung, start_epoch, stop_epoch)``: either a promotion
+    (the best unpromoted trial of a rung, when it is in that rung's top
+    ``1/eta``) or, failing that, a fresh trial up to the first rung. Nothing
+    waits for a rung to fill up, so no worker idles while others finish.
+    """
+
+    def __init__(self, trials, min_epochs=1, max_epochs=27, eta=3):
+        self.eta = eta
+        self.rungs = []
+        epochs = min_epochs
+        while epochs < max_epochs:
+            self.rungs.append(epochs)
+            epochs *= eta
+        self.rungs.append(max_epochs)
+        self.pending = list(trials)
+        self.scores = [{} for _ in self.rungs]      # rung -> {trial: val_accuracy}
+        self.promoted = [set() for _ in self.rungs]
+        self.running = set()
+
+    def next_job(self):
+        """(trial, rung, start_epoch, stop_epoch), or None when nothing can start now"""
+        for rung in reversed(range(len(self.rungs) - 1)):
+            ranked = sorted(self.scores[rung].items(), key=lambda item: item[1], reverse=True)
+            for trial, _ in ranked[:len(ranked) // self.eta]:
+                if trial not in self.promoted[rung]:
+                    self.promoted[rung].add(trial)
+                    self.running.add(trial)
+                    return trial, rung + 1, self.rungs[rung], self.rungs[rung + 1]
+        if self.pending:
+            trial = self.pending.pop(0)
+            self.running.add(trial)
+            return trial, 0, 0, self.rungs[0]
+        return None
+
+    def report(self, trial, rung, score):
+        self.running.discard(trial)
+        if score is not None:
+            self.scores[rung][trial] = score
+
+    def status(self, trial):
+        """'completed', 'stopped' (lost at a rung) or 'failed'"""
+        reached = [rung for rung, scores in enumerate(self.scores) if trial in scores]
+        if not reached:
+            return 'failed'
+        return 'completed' if reached[-1] == len(self.rungs) - 1 else 'stopped'
+
+
+class SweepResults:
+    """One row per trial and sweep in a local SQLite table"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS trials ('
+            ' sweep TEXT NOT NULL, trial TEXT NOT NULL, architecture TEXT NOT NULL,'
+            ' learning_rate REAL NOT NULL, batch_size INTEGER NOT NULL, head_units TEXT NOT NULL,'
+            ' status TEXT NOT NULL, epochs INTEGER NOT NULL DEFAULT 0, val_accuracy REAL, val_loss REAL,'
+            ' seconds REAL NOT NULL DEFAULT 0, PRIMARY KEY (sweep, trial))'
+        )
+        self.db.commit()
+
+    def add(self, sweep, spec):
+        self.db.execute(
+            'INSERT OR REPLACE INTO trials (sweep, trial, architecture, learning_rate, batch_size, head_units, status)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (sweep, spec['trial'], spec['architecture'], spec['learning_rate'], spec['batch_size'],
+             json.dumps(spec['head_units']), 'pending')
+        )
+        self.db.commit()
+
+    def update(self, sweep, trial, status, epochs=None, val_accuracy=None, val_loss=None, seconds=0.0):
+        self.db.execute(
+            'UPDATE trials SET status = ?, epochs = COALESCE(?, epochs), val_accuracy = COALESCE(?, val_accuracy),'
+            ' val_loss = COALESCE(?, val_loss), seconds = seconds + ? WHERE sweep = ? AND trial = ?',
+            (status, epochs, val_accuracy, val_loss, seconds, sweep, trial)
+        )
+        self.db.commit()
+
+    def rows(self, sweep):
+        """Trials of ``sweep``: the longest-trained first, then by validation accuracy"""
+        cursor = self.db.execute(
+            'SELECT trial, architecture, learning_rate, batch_size, head_units, status, epochs,'
+            ' val_accuracy, val_loss, seconds FROM trials WHERE sweep = ?'
+            ' ORDER BY val_accuracy IS NULL, epochs DESC, val_accuracy DESC', (sweep,)
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def latest_sweep(self):
+        row = self.db.execute('SELECT sweep FROM trials ORDER BY sweep DESC LIMIT 1').fetchone()
+        return row[0] if row else None
+
+    def print_table(self, sweep):
+        print(f"\n{'trial':6} {'arch':16} {'lr':>8} {'batch':>5} {'head':12} {'status':10} "
+              f"{'epochs':>6} {'val_acc':>8} {'seconds':>8}")
+        for row in self.rows(sweep):
+            accuracy = '-' if row['val_accuracy'] is None else f"{row['val_accuracy']:.4f}"
+            head = ','.join(str(u) for u in json.loads(row['head_units'])) or 'none'
+            print(f"{row['trial']:6} {row['architecture']:16} {row['learning_rate']:>8.0e} {row['batch_size']:>5} "
+                  f"{head:12} {row['status']:10} {row['epochs']:>6} {accuracy:>8} {row['seconds']:>8.0f}")
+
+
+# -- Workers ----------------------------------------------------------------
+
+def pin_worker(core_queue):
+    """Pool initializer: take one core set, pin this process to it and size the thread pools to match"""
+    cores = core_queue.get()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(len(cores))
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ['OMP_NUM_THREADS'] = str(len(cores))
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+
+def run_segment(spec, start_epoch, stop_epoch, features, num_classes, trial_dir, seed):
+    """Worker: train one trial's head from ``start_epoch`` to ``stop_epoch``; returns its metrics
+
+    The head (with its optimizer state) is saved after every segment, so a
+    promoted trial continues where it stopped instead of starting over.
+    """
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+    from cnn_model import DiseaseDetectionModel
+    from feature_cache import FeatureCache, FeatureSequence
+
+    started = time.perf_counter()
+    cache = FeatureCache(features['dir'])
+    train_x, train_y = cache.load('train', features['train'])
+    val_x, val_y = cache.load('val', features['val'])
+
+    head_path = Path(trial_dir) / f"{spec['trial']}.keras"
+    if start_epoch:
+        head = tf.keras.models.load_model(head_path)
+    else:
+        tf.keras.utils.set_random_seed(seed)
+        disease_model = DiseaseDetectionModel(num_classes, architecture=spec['architecture'],
+                                              head_units=spec['head_units'])
+        inputs = layers.Input(shape=(train_x.shape[1],))
+        head = models.Model(inputs, disease_model.classification_head(inputs))
+        disease_model.compile_model(learning_rate=spec['learning_rate'], model=head)
+
+    history = head.fit(
+        FeatureSequence(train_x, train_y, num_classes, spec['batch_size'], seed=seed + start_epoch),
+        validation_data=FeatureSequence(val_x, val_y, num_classes, spec['batch_size'], shuffle=False),
+        initial_epoch=start_epoch,
+        epochs=stop_epoch,
+        verbose=0
+    )
+    head.save(head_path)
+    return {'val_accuracy': float(history.history['val_accuracy'][-1]),
+            'val_loss': float(history.history['val_loss'][-1]),
+            'seconds': time.perf_counter() - started}
+
+
+# -- Driver -----------------------------------------------------------------
+
+def prepare_features(data_dir, architectures, features_root):
+    """Embeddings for every architecture, computed here once; returns ({arch: features}, num_classes)"""
+    from cnn_model import DiseaseDetectionModel
+    from data_loader import DatasetLoader
+    from feature_cache import FeatureCache, feature_key
+
+    loader = DatasetLoader(
+        data_dir,
+        img_size=Config.IMG_SIZE,
+        batch_size=Config.BATCH_SIZE,
+        validation_split=Config.VALIDATION_SPLIT,
+        seed=Config.DATA_SEED,
+        compiled_dir=Config.COMPILED_DATA_DIR
+    )
+    files = loader.list_files()
+    if not files['val']:
+        raise ValueError("The sweep ranks trials on validation accuracy; the dataset has no validation images")
+
+    prepared = {}
+    for architecture in architectures:
+        disease_model = DiseaseDetectionModel(len(loader.class_indices), Config.IMG_SIZE, architecture)
+        disease_model.build_model()
+        extractor = disease_model.feature_extractor()
+        cache_dir = Path(features_root) / architecture
+        cache = FeatureCache(cache_dir)
+        features = {'dir': str(cache_dir)}
+        for split in ('train', 'val'):
+            cache.get(split, architecture, extractor, loader, files[split])
+            features[split] = feature_key(architecture, loader.img_size, files[split])
+        prepared[architecture] = features
+    return prepared, len(loader.class_indices)
+
+
+def run_sweep(data_dir, specs, workers=None, min_epochs=1, max_epochs=27, eta=3, sweep_dir=None, name=None):
+    """Run ``specs`` under ASHA; returns (sweep name, result rows best first)"""
+    sweep_dir = Path(sweep_dir or Config.SWEEP_DIR)
+    name = name or time.strftime('%Y%m%d-%H%M%S')
+    trial_dir = sweep_dir / name
+    trial_dir.mkdir(parents=True, exist_ok=True)
+    results = SweepResults(sweep_dir / 'results.sqlite3')
+
+    features_root = Config.FEATURE_CACHE_DIR or sweep_dir / 'features'
+    architectures = sorted({spec['architecture'] for spec in specs})
+    print(f"🧊 Preparing embeddings for {', '.join(architectures)}")
+    features, num_classes = prepare_features(data_dir, architectures, features_root)
+
+    by_trial = {spec['trial']: spec for spec in specs}
+    for spec in specs:
+        results.add(name, spec)
+    scheduler = AshaScheduler(list(by_trial), min_epochs, max_epochs, eta)
+    cores = core_sets(workers or os.cpu_count() or 1)
+    print(f"🔎 Sweep {name}: {len(specs)} trials, rungs {scheduler.rungs} epochs, "
+          f"{len(cores)} workers x {len(cores[0])} cores")
+
+    context = multiprocessing.get_context('spawn')
+    core_queue = context.Queue()
+    for core_set in cores:
+        core_queue.put(core_set)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(cores), mp_context=context,
+                             initializer=pin_worker, initargs=(core_queue,)) as pool:
+        running = {}
+
+        def submit_ready():
+            while len(running) < len(cores):
+                job = scheduler.next_job()
+                if job is None:
+                    return
+                trial, rung, start_epoch, stop_epoch = job
+                spec = by_trial[trial]
+                results.update(name, trial, 'running')
+                future = pool.submit(run_segment, spec, start_epoch, stop_epoch, features[spec['architecture']],
+                                     num_classes, str(trial_dir), Config.DATA_SEED)
+                running[future] = job
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial, rung, _, stop_epoch = running.pop(future)
+                try:
+                    metrics = future.result()
+                except Exception as e:
+                    print(f"⚠️ Trial {trial} failed: {e}")
+                    scheduler.report(trial, rung, None)
+                    results.update(name, trial, 'failed')
+                    continue
+                scheduler.report(trial, rung, metrics['val_accuracy'])
+                results.update(name, trial, 'running', stop_epoch, metrics['val_accuracy'],
+                               metrics['val_loss'], metrics['seconds'])
+                print(f"  {trial} epoch {stop_epoch}: val_accuracy {metrics['val_accuracy']:.4f}")
+            submit_ready()
+
+    for trial in by_trial:
+        results.update(name, trial, scheduler.status(trial))
+    results.print_table(name)
+    rows = results.rows(name)
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ Sweep finished in {elapsed / 60:.1f} min; results in {results.path}")
+    if rows and rows[0]['val_accuracy'] is not None:
+        best = rows[0]
+        print(f"Best: {best['architecture']}, learning rate {best['learning_rate']:g}, batch {best['batch_size']}, "
+              f"head {json.loads(best['head_units'])} -> val_accuracy {best['val_accuracy']:.4f}")
+    return name, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep with early stopping (ASHA)')
+    parser.add_argument('--data-dir', default=str(Config.DATA_DIR))
+    parser.add_argument('--architectures', nargs='+', default=[Config.MODEL_ARCHITECTURE])
+    parser.add_argument('--learning-rates', type=float, nargs='+', default=[Config.LEARNING_RATE])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[Config.BATCH_SIZE])
+    parser.add_argument('--head-units', type=parse_head_units, nargs='+', default=[(512, 256)],
+                        help="Dense layer sizes, e.g. 512,256 (or 'none')")
+    parser.add_argument('--samples', type=int, default=None, help='Random trials from the grid (default: all)')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel trials (default: one per core)')
+    parser.add_argument('--min-epochs', type=int, default=1)
+    parser.add_argument('--max-epochs', type=int, default=Config.EPOCHS)
+    parser.add_argument('--eta', type=int, default=3, help='Keep the top 1/eta of the trials at each rung')
+    parser.add_argument('--sweep-dir', default=str(Config.SWEEP_DIR))
+    parser.add_argument('--name', default=None)
+    parser.add_argument('--show', nargs='?', const='latest', help='Print the table of an earlier sweep and exit')
+    args = parser.parse_args()
+
+    if args.show:
+        results = SweepResults(Path(args.sweep_dir) / 'results.sqlite3')
+        name = results.latest_sweep() if args.show == 'latest' else args.show
+        if name:
+            results.print_table(name)
+        return
+
+    specs = search_space(args.architectures, args.learning_rates, args.batch_sizes, args.head_units,
+                         samples=args.samples, seed=Config.DATA_SEED)
+    run_sweep(args.data_dir, specs, args.workers, args.min_epochs, args.max_epochs, args.eta,
+              args.sweep_dir, args.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,12 @@
 
 import sys
+import time
 from pathlib import Path
 import tensorflow as tf
 from cnn_model import DiseaseDetectionModel
 from data_loader import DatasetLoader
+from feature_cache import FeatureCache, FeatureSequence
+from profiling import StepProfiler
 import matplotlib.pyplot as plt
 
 class ModelTrainer:
@@ -26,18 +29,22 @@ class ModelTrainer:
         loader = DatasetLoader(
             data_dir,
             img_size=self.config.IMG_SIZE,
-            batch_size=self.config.BATCH_SIZE
+            batch_size=self.config.BATCH_SIZE,
+            validation_split=self.config.VALIDATION_SPLIT,
+            seed=self.config.DATA_SEED,
+            cache_dir=self.config.DATA_CACHE_DIR or None,
+            compiled_dir=self.config.COMPILED_DATA_DIR
         )
         train_gen, val_gen = loader.load_from_directory()
         
-        print(f"Training samples: {train_gen.samples}")
-        print(f"Validation samples: {val_gen.samples}")
-        print(f"Classes: {len(train_gen.class_indices)}")
+        print(f"Training samples: {loader.samples['train']}")
+        print(f"Validation samples: {loader.samples['val']}")
+        print(f"Classes: {len(loader.class_indices)}")
         
         # Build model
         print("\n[2/5] Building model...")
         disease_model = DiseaseDetectionModel(
-            num_classes=len(train_gen.class_indices),
+            num_classes=len(loader.class_indices),
             img_size=self.config.IMG_SIZE,
             architecture=self.config.MODEL_ARCHITECTURE
         )
@@ -46,30 +53,38 @@ class ModelTrainer:
         
         print(f"Model architecture: {self.config.MODEL_ARCHITECTURE}")
         print(f"Total parameters: {self.model.count_params():,}")
+        self.report_throughput(loader)
         
         # Train
         print("\n[3/5] Training model...")
         callbacks = disease_model.get_callbacks(model_save_path)
-        
-        self.history = self.model.fit(
-            train_gen,
-            validation_data=val_gen,
-            epochs=self.config.EPOCHS,
-            callbacks=callbacks,
-            verbose=1
-        )
+        profiler = self.make_profiler(model_save_path)
+        
+        if self.config.FEATURE_CACHE_DIR:
+            self.history = self.train_head_from_features(disease_model, loader, model_save_path)
+        else:
+            profiler.start_phase('train', self.model, train_gen, loader.samples['train'])
+            self.history = self.model.fit(
+                train_gen,
+                validation_data=val_gen,
+                epochs=self.config.EPOCHS,
+                callbacks=callbacks + [profiler],
+                verbose=1
+            )
         
         # Fine-tune
         print("\n[4/5] Fine-tuning model...")
         disease_model.fine_tune(base_layers_to_unfreeze=30)
         
+        profiler.start_phase('fine_tune', self.model, train_gen, loader.samples['train'])
         self.history_fine = self.model.fit(
             train_gen,
             validation_data=val_gen,
             epochs=20,
-            callbacks=callbacks,
+            callbacks=callbacks + [profiler],
             verbose=1
         )
+        profiler.print_summary()
         
         # Evaluate
         print("\n[5/5] Evaluating model...")
@@ -84,13 +99,85 @@ class ModelTrainer:
         import json
         class_indices_path = Path(model_save_path).parent / 'class_indices.json'
         with open(class_indices_path, 'w') as f:
-            json.dump(train_gen.class_indices, f)
+            json.dump(loader.class_indices, f)
         
         print(f"\n✓ Model saved to: {model_save_path}")
         print(f"✓ Class indices saved to: {class_indices_path}")
+        print(f"✓ Throughput per epoch saved to: {profiler.csv_path}")
         
         return self.model, self.history
     
+    def make_profiler(self, model_save_path):
+        """Step-time profiler writing training_throughput.csv next to class_indices.json"""
+        return StepProfiler(
+            self.config.BATCH_SIZE,
+            csv_path=Path(model_save_path).parent / 'training_throughput.csv',
+            trace_dir=self.config.PROFILE_TRACE_DIR or None,
+            trace_steps=self.config.PROFILE_TRACE_STEPS
+        )
+    
+    def train_head_from_features(self, disease_model, loader, model_save_path):
+        """Phase 1 on cached embeddings: the frozen backbone runs once per image, not once per epoch
+
+        Augmentation is not applied in this phase, since each image has a
+        single cached embedding; fine-tuning still trains on augmented images.
+        """
+        cache = FeatureCache(self.config.FEATURE_CACHE_DIR)
+        extractor = disease_model.feature_extractor()
+        architecture = self.config.MODEL_ARCHITECTURE
+        train_x, train_y = cache.get('train', architecture, extractor, loader, loader.files['train'])
+        num_classes = len(loader.class_indices)
+        train_seq = FeatureSequence(train_x, train_y, num_classes, self.config.BATCH_SIZE, seed=self.config.DATA_SEED)
+        val_seq = None
+        if loader.files['val']:
+            val_x, val_y = cache.get('val', architecture, extractor, loader, loader.files['val'])
+            val_seq = FeatureSequence(val_x, val_y, num_classes, self.config.BATCH_SIZE, shuffle=False)
+
+        head = disease_model.head_model()
+        disease_model.compile_model(learning_rate=self.config.LEARNING_RATE, model=head)
+        # The checkpoint callback would save the head alone; keep early stopping and LR decay
+        callbacks = [c for c in disease_model.get_callbacks(model_save_path)
+                     if not isinstance(c, tf.keras.callbacks.ModelCheckpoint)]
+        history = head.fit(
+            train_seq,
+            validation_data=val_seq,
+            epochs=self.config.EPOCHS,
+            callbacks=callbacks,
+            verbose=1
+        )
+        # The head shares its layers with the full model, which now holds the trained weights
+        self.model.save(model_save_path)
+        return history
+    
+    def report_throughput(self, loader, steps=20):
+        """Compare what the input pipeline delivers with what a training step consumes"""
+        # An uncached copy, so a partial pass never leaves a half-written cache behind
+        dataset = loader.build(loader.files['train'], 'train', cache=False)
+        input_rate = loader.measure_throughput(dataset, steps=steps)
+
+        images, labels = next(iter(dataset))
+        loss_fn = tf.keras.losses.CategoricalCrossentropy()
+
+        @tf.function
+        def step(x, y):
+            # Forward and backward pass without applying the gradients
+            with tf.GradientTape() as tape:
+                loss = loss_fn(y, self.model(x, training=True))
+            return tape.gradient(loss, self.model.trainable_variables)
+
+        step(images, labels)  # trace
+        started = time.perf_counter()
+        for _ in range(steps):
+            step(images, labels)
+        step_seconds = (time.perf_counter() - started) / steps
+        model_rate = int(images.shape[0]) / step_seconds
+
+        print(f"Input pipeline: {input_rate:,.0f} images/sec")
+        print(f"Model step:     {step_seconds * 1000:.0f} ms/batch ({model_rate:,.0f} images/sec)")
+        if input_rate < model_rate:
+            print("⚠️ Input-bound: set DATA_CACHE_DIR or add CPU cores for decoding")
+        return input_rate, model_rate
+    
     def plot_training_history(self, save_path='training_history.png'):
         """Plot training metrics"""
         fig, axes = plt.subplots(2, 2, figsize=(12, 10))
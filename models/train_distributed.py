@@ -0,0 +1,293 @@
+"""Data-parallel training across several CPU machines with MultiWorkerMirroredStrategy.
+
+Every worker runs this script with its own TF_CONFIG, e.g. on worker 1 of 2:
+
+    TF_CONFIG='{"cluster": {"worker": ["10.0.0.1:12345", "10.0.0.2:12345"]},
+                "task": {"type": "worker", "index": 1}}' python models/train_distributed.py
+
+Without TF_CONFIG it trains in a single process. ``--local-workers N``
+starts N workers on this machine (localhost ports) to try out a cluster
+configuration or measure scaling:
+
+    python models/train_distributed.py --local-workers 2 --epochs 1 --steps 20
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tensorflow as tf
+from config.config import Config
+from cnn_model import DiseaseDetectionModel
+from data_loader import DatasetLoader
+from train import ModelTrainer
+
+
+@dataclass
+class WorkerContext:
+    """This process's place in the cluster described by TF_CONFIG"""
+    num_workers: int = 1
+    index: int = 0
+
+    @property
+    def is_chief(self):
+        return self.index == 0
+
+    @classmethod
+    def from_env(cls):
+        tf_config = json.loads(os.environ.get('TF_CONFIG') or '{}')
+        workers = tf_config.get('cluster', {}).get('worker', [])
+        index = tf_config.get('task', {}).get('index', 0)
+        return cls(num_workers=max(len(workers), 1), index=index)
+
+
+def make_strategy(context):
+    """MultiWorkerMirroredStrategy with ring all-reduce (the CPU implementation) when clustered"""
+    if context.num_workers == 1:
+        return tf.distribute.get_strategy()
+    options = tf.distribute.experimental.CommunicationOptions(
+        implementation=tf.distribute.experimental.CommunicationImplementation.RING
+    )
+    return tf.distribute.MultiWorkerMirroredStrategy(communication_options=options)
+
+
+def scaled_hyperparameters(batch_size, learning_rate, num_workers):
+    """(global batch, learning rate): every replica keeps ``batch_size``, lr grows linearly with the global batch"""
+    return batch_size * num_workers, learning_rate * num_workers
+
+
+def replica_batch_size(strategy, dataset):
+    """Batch size one replica receives from ``dataset`` once ``fit`` distributes it"""
+    images, _ = strategy.experimental_local_results(next(iter(strategy.experimental_distribute_dataset(dataset))))[0]
+    return int(images.shape[0])
+
+
+def worker_path(path, context, name):
+    """Where this worker writes ``path``: the real location on the chief, a scratch copy elsewhere
+
+    Every worker has to run the save (the weights are gathered collectively),
+    but only the chief's copy is kept.
+    """
+    if context.is_chief:
+        return str(path)
+    return os.path.join(tempfile.gettempdir(), f"{name}-worker{context.index}", os.path.basename(str(path)))
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Global images/sec per epoch, measured on each worker"""
+
+    def __init__(self, global_batch):
+        super().__init__()
+        self.global_batch = global_batch
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+        self._steps = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._steps += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._started
+        self.epochs.append({'epoch': epoch, 'steps': self._steps, 'seconds': round(elapsed, 3),
+                            'images_per_sec': round(self._steps * self.global_batch / elapsed, 1)})
+
+
+class DistributedTrainer(ModelTrainer):
+    """ModelTrainer on a MultiWorkerMirroredStrategy cluster
+
+    Each worker reads a disjoint shard of the training files batched by the
+    global batch ``BATCH_SIZE * workers``; Keras splits every batch across the
+    replicas, so each one trains on ``BATCH_SIZE`` images per step and the
+    learning rate is scaled to the global batch.
+    Progress is backed up every epoch per worker (BackupAndRestore): a worker
+    that dies and is restarted with the same TF_CONFIG resumes from the last
+    finished epoch together with the rest of the cluster.
+    """
+
+    def __init__(self, config, context=None, weights='imagenet'):
+        super().__init__(config)
+        self.context = context or WorkerContext.from_env()
+        self.weights = weights
+        self.strategy = make_strategy(self.context)
+        self.throughput = None
+        self.replica_batch = None
+
+    def train(self, data_dir, model_save_path, epochs=None, fine_tune_epochs=20, steps_per_epoch=None):
+        context = self.context
+        global_batch, learning_rate = scaled_hyperparameters(
+            self.config.BATCH_SIZE, self.config.LEARNING_RATE, context.num_workers
+        )
+        print(f"Worker {context.index + 1}/{context.num_workers}: global batch {global_batch}, "
+              f"learning rate {learning_rate:g}")
+
+        loader = DatasetLoader(
+            data_dir,
+            img_size=self.config.IMG_SIZE,
+            batch_size=global_batch,
+            validation_split=self.config.VALIDATION_SPLIT,
+            seed=self.config.DATA_SEED,
+            cache_dir=self.config.DATA_CACHE_DIR or None,
+            num_shards=context.num_workers,
+            shard_index=context.index,
+            compiled_dir=self.config.COMPILED_DATA_DIR
+        )
+        train_ds, val_ds = loader.load_from_directory()
+        # Every worker must run the same number of steps, whatever the size of its shard
+        steps_per_epoch = steps_per_epoch or max(loader.samples['train'] // global_batch, 1)
+        train_ds = train_ds.repeat()
+        self.replica_batch = replica_batch_size(self.strategy, train_ds)
+        print(f"Worker {context.index + 1}/{context.num_workers}: {self.replica_batch} images per replica "
+              f"and step, {steps_per_epoch} steps per epoch")
+
+        with self.strategy.scope():
+            disease_model = DiseaseDetectionModel(
+                num_classes=len(loader.class_indices),
+                img_size=self.config.IMG_SIZE,
+                architecture=self.config.MODEL_ARCHITECTURE,
+                weights=self.weights
+            )
+            self.model = disease_model.build_model()
+            disease_model.compile_model(learning_rate=learning_rate)
+
+        self.throughput = ThroughputLogger(global_batch)
+        backup_root = Path(self.config.DISTRIBUTED_BACKUP_DIR) / f"worker-{context.index}"
+        save_path = worker_path(model_save_path, context, 'checkpoint')
+
+        def callbacks(phase):
+            return [tf.keras.callbacks.BackupAndRestore(str(backup_root / phase)), self.throughput,
+                    *disease_model.get_callbacks(save_path)]
+
+        self.history = self.model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=epochs or self.config.EPOCHS,
+            steps_per_epoch=steps_per_epoch,
+            callbacks=callbacks('phase1'),
+            verbose=1 if context.is_chief else 0
+        )
+
+        if fine_tune_epochs:
+            with self.strategy.scope():
+                disease_model.fine_tune(base_layers_to_unfreeze=30)
+            self.history_fine = self.model.fit(
+                train_ds,
+                validation_data=val_ds,
+                epochs=fine_tune_epochs,
+                steps_per_epoch=steps_per_epoch,
+                callbacks=callbacks('phase2'),
+                verbose=1 if context.is_chief else 0
+            )
+
+        if context.is_chief:
+            class_indices_path = Path(model_save_path).parent / 'class_indices.json'
+            with open(class_indices_path, 'w') as f:
+                json.dump(loader.class_indices, f)
+            print(f"\n✓ Model saved to: {model_save_path}")
+        else:
+            shutil.rmtree(os.path.dirname(save_path), ignore_errors=True)
+        return self.model, self.history
+
+
+# -- Local clusters ---------------------------------------------------------
+
+def free_ports(count):
+    sockets = [socket.socket() for _ in range(count)]
+    for s in sockets:
+        s.bind(('localhost', 0))
+    ports = [s.getsockname()[1] for s in sockets]
+    for s in sockets:
+        s.close()
+    return ports
+
+
+def local_tf_configs(num_workers):
+    """One TF_CONFIG per worker for a cluster on this machine"""
+    workers = [f"localhost:{port}" for port in free_ports(num_workers)]
+    return [json.dumps({'cluster': {'worker': workers}, 'task': {'type': 'worker', 'index': i}})
+            for i in range(num_workers)]
+
+
+def without_option(argv, name):
+    """``argv`` minus ``name`` and its value"""
+    kept = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == name:
+            skip = True
+        elif not arg.startswith(name + '='):
+            kept.append(arg)
+    return kept
+
+
+def run_local_cluster(num_workers, worker_args, threads_per_worker=None):
+    """Run this script as ``num_workers`` local processes; returns the chief's report"""
+    report_dir = Path(tempfile.mkdtemp(prefix='multiworker-'))
+    processes = []
+    for tf_config in local_tf_configs(num_workers):
+        env = dict(os.environ, TF_CONFIG=tf_config)
+        if threads_per_worker:
+            # Split the cores between workers instead of every worker assuming it owns all of them
+            env['TF_NUM_INTRAOP_THREADS'] = str(threads_per_worker)
+            env['TF_NUM_INTEROP_THREADS'] = '2'
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), *worker_args, '--report-dir', str(report_dir)], env=env
+        ))
+    codes = [p.wait() for p in processes]
+    if any(codes):
+        raise RuntimeError(f"Local cluster of {num_workers} failed with exit codes {codes}")
+    with open(report_dir / 'worker-0.json') as f:
+        report = json.load(f)
+    shutil.rmtree(report_dir, ignore_errors=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-worker CPU training (configure workers with TF_CONFIG)')
+    parser.add_argument('--data-dir', default=str(Config.DATA_DIR))
+    parser.add_argument('--model-path', default=str(Config.MODEL_DIR / 'best_model.h5'))
+    parser.add_argument('--epochs', type=int, default=None)
+    parser.add_argument('--fine-tune-epochs', type=int, default=20)
+    parser.add_argument('--steps', type=int, default=None, help='Steps per epoch (default: one pass over the training set)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Per-replica batch (default: Config.BATCH_SIZE)')
+    parser.add_argument('--no-pretrained', action='store_true', help='Random backbone weights (smoke runs)')
+    parser.add_argument('--local-workers', type=int, default=0, help='Start this many workers on this machine')
+    parser.add_argument('--report-dir', help=argparse.SUPPRESS)
+    args, _ = parser.parse_known_args()
+
+    if args.local_workers:
+        report = run_local_cluster(args.local_workers, without_option(sys.argv[1:], '--local-workers'),
+                                   threads_per_worker=max((os.cpu_count() or 1) // args.local_workers, 1))
+        print(json.dumps(report, indent=2))
+        return
+
+    if args.batch_size:
+        Config.BATCH_SIZE = args.batch_size
+    trainer = DistributedTrainer(Config, weights=None if args.no_pretrained else 'imagenet')
+    trainer.train(args.data_dir, args.model_path, epochs=args.epochs,
+                  fine_tune_epochs=args.fine_tune_epochs, steps_per_epoch=args.steps)
+    if args.report_dir:
+        global_batch, learning_rate = scaled_hyperparameters(Config.BATCH_SIZE, Config.LEARNING_RATE,
+                                                             trainer.context.num_workers)
+        report = {'workers': trainer.context.num_workers, 'global_batch': global_batch,
+                  'replica_batch': trainer.replica_batch,
+                  'learning_rate': learning_rate, 'epochs': trainer.throughput.epochs}
+        with open(Path(args.report_dir) / f"worker-{trainer.context.index}.json", 'w') as f:
+            json.dump(report, f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import unittest
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.chatbot import CropDiseaseChatbot
+from config.config import Config
+from backend.intent_matcher import IntentMatcher
+from backend.conversation_memory import ConversationMemory
+from backend.conversation_context import RollingContext, estimate_tokens, format_turn
+
+class TestIntentMatching(unittest.TestCase):
+    """Test rule-based intent matching"""
+
+    def setUp(self):
+        self.chatbot = CropDiseaseChatbot()
+
+    def test_focused_messages_are_confident(self):
+        """Test short messages fully explained by an intent"""
+        self.assertEqual(self.chatbot.match_intent('Hello!'), ('greeting', 1.0))
+        self.assertEqual(self.chatbot.match_intent('upload photo'), ('upload', 1.0))
+
+    def test_open_ended_questions_score_low(self):
+        """Test questions that only contain a keyword"""
+        intent, confidence = self.chatbot.match_intent('how to treat potato late blight organically in rainy season')
+        self.assertEqual(intent, 'treatment')
+        self.assertLess(confidence, 0.5)
+
+    def test_near_misses_go_upstream(self):
+        """Test questions that only half match an intent stay below the rule threshold"""
+        for message in ('is it going to rain', 'will it rain tomorrow', 'is neem oil organic',
+                        'organic treatment', 'how do i prevent blight', 'organic farming'):
+            with self.subTest(message=message):
+                self.assertLess(self.chatbot.match_intent(message)[1], Config.CHATBOT_RULE_CONFIDENCE)
+        for message in ('hello', 'upload photo', 'what is the weather', 'help'):
+            with self.subTest(message=message):
+                self.assertGreaterEqual(self.chatbot.match_intent(message)[1], Config.CHATBOT_RULE_CONFIDENCE)
+
+    def test_no_match(self):
+        """Test unmatched messages"""
+        self.assertEqual(self.chatbot.match_intent('what is npk 19-19-19'), (None, 0.0))
+        self.assertEqual(self.chatbot.get_response('what is npk 19-19-19')['intent'], 'unknown')
+
+class TestIntentMatcher(unittest.TestCase):
+    """Test the compiled single-scan matcher"""
+
+    def test_best_match_wins_over_declaration_order(self):
+        """Test all intents are scored rather than first match"""
+        matcher = IntentMatcher({
+            'treatment': {'patterns': [r'\b(how to)\b']},
+            'organic': {'patterns': [r'\b(organic|neem oil)\b']},
+        })
+        self.assertEqual(matcher.scores('how to use neem oil'), {'treatment': 0.4, 'organic': 0.4})
+        self.assertEqual(IntentMatcher({'organic': {'patterns': [r'\b(neem oil)\b']}}, {'how', 'to'}).best('how to use neem oil'),
+                         ('organic', 0.667))
+
+    def test_chained_groups_must_appear_in_order(self):
+        """Test patterns joined with .* require their groups in sequence"""
+        matcher = IntentMatcher({'symptoms': {'patterns': [r'\b(symptoms|signs)\b.*\b(disease)\b']}})
+        self.assertIn('symptoms', matcher.scores('signs of this disease'))
+        self.assertNotIn('symptoms', matcher.scores('disease signs'))
+
+    def test_free_form_regex_fallback(self):
+        """Test patterns outside the keyword form are still matched"""
+        matcher = IntentMatcher({'npk': {'patterns': [r'npk\s*\d+-\d+-\d+']}})
+        self.assertEqual(matcher.best('what is NPK 19-19-19'), ('npk', 0.5))
+
+class TestConversationMemory(unittest.TestCase):
+    """Test bounded per-session chat history"""
+
+    def test_sessions_are_isolated_and_bounded(self):
+        """Test each session keeps only its most recent turns"""
+        memory = ConversationMemory(max_turns=3)
+        for i in range(5):
+            memory.append('farmer-a', f'question {i}', f'answer {i}')
+        memory.append('farmer-b', 'hello', 'hi')
+
+        self.assertEqual([t['user'] for t in memory.history('farmer-a')], ['question 2', 'question 3', 'question 4'])
+        self.assertEqual(len(memory.history('farmer-b')), 1)
+        self.assertEqual(memory.stats()['live_sessions'], 2)
+
+    def test_chatbot_records_per_session(self):
+        """Test get_response writes to the caller's session"""
+        chatbot = CropDiseaseChatbot()
+        chatbot.get_response('hello', session_id='s1')
+        self.assertEqual(chatbot.memory.history('s1')[0]['user'], 'hello')
+        self.assertEqual(chatbot.memory.history('s2'), [])
+
+    def test_memory_stays_flat(self):
+        """Test byte and session caps hold under many sessions"""
+        memory = ConversationMemory(max_turns=5, max_sessions=100, max_bytes=64 * 1024)
+        for i in range(20000):
+            memory.append(f'session-{i % 500}', 'how do I treat early blight?' * 3, 'Use copper fungicide.' * 5)
+
+        stats = memory.stats()
+        self.assertLessEqual(stats['bytes_used'], 64 * 1024)
+        self.assertLessEqual(stats['live_sessions'], 100)
+        self.assertGreater(stats['evicted_capacity'], 0)
+
+        for session_id in list(memory._sessions):
+            memory.clear(session_id)
+        self.assertEqual(memory.stats()['bytes_used'], 0)
+
+    def test_idle_sessions_expire(self):
+        """Test sessions idle longer than the TTL are evicted"""
+        memory = ConversationMemory(session_ttl=0.01)
+        memory.append('old', 'hi', 'hello')
+        time.sleep(0.02)
+        self.assertEqual(memory.history('old'), [])
+        self.assertEqual(memory.stats()['live_sessions'], 0)
+
+class TestRollingContext(unittest.TestCase):
+    """Test multi-turn context folding"""
+
+    def test_context_stays_bounded(self):
+        """Test older turns are folded into a capped summary"""
+        memory = ConversationMemory(max_turns=50)
+        calls = []
+
+        def summarize(summary, transcript, max_tokens):
+            calls.append(len(transcript))
+            return (summary + ' ' + ' '.join(t[:40] for t in transcript)).strip()
+
+        context = RollingContext(memory, summarize, token_budget=200, summary_tokens=50)
+        for i in range(40):
+            summary, turns = context.build('farmer')
+            size = estimate_tokens(summary) + sum(estimate_tokens(format_turn(t)) for t in turns)
+            self.assertLessEqual(size, 250)
+            memory.append('farmer', f'question {i} about tomato blight ' * 4, f'answer {i} use mancozeb ' * 6, source='gemini')
+
+        self.assertTrue(summary)
+        self.assertLess(len(calls), 40)
+
+    def test_extractive_fallback(self):
+        """Test folding still works when the summariser fails"""
+        memory = ConversationMemory()
+
+        def broken(summary, transcript, max_tokens):
+            raise RuntimeError('quota exceeded')
+
+        context = RollingContext(memory, broken, token_budget=20, summary_tokens=30)
+        memory.append('farmer', 'my potato leaves have dark spots', 'That may be early blight.')
+        memory.append('farmer', 'what should I spray', 'Mancozeb at 2g/L.')
+
+        summary, turns = context.build('farmer')
+        self.assertIn('Farmer asked: my potato leaves', summary)
+        self.assertEqual(len(turns), 1)
+        self.assertEqual(memory.context('farmer')[0], summary)
+
+    def test_stale_fold_is_discarded(self):
+        """Test a fold is dropped when the turns it summarised changed during the summary call"""
+        memory = ConversationMemory(max_turns=3)
+        for i in range(3):
+            memory.append('farmer', f'question {i}', f'answer {i}')
+        summary, turns = memory.context('farmer')
+
+        memory.append('farmer', 'question 3', 'answer 3')  # the ring buffer drops question 0
+        self.assertFalse(memory.fold('farmer', turns[0]['seq'], turns[1]['seq'], 'stale summary', summary))
+        self.assertEqual([t['user'] for t in memory.history('farmer')], ['question 1', 'question 2', 'question 3'])
+
+        summary, turns = memory.context('farmer')
+        self.assertTrue(memory.fold('farmer', turns[0]['seq'], turns[0]['seq'], 'asked q1', summary))
+        self.assertFalse(memory.fold('farmer', turns[0]['seq'], turns[0]['seq'], 'asked q1 again', summary))
+        self.assertEqual(memory.context('farmer')[0], 'asked q1')
+        self.assertEqual(len(memory.history('farmer')), 2)
+
+    def test_background_fold(self):
+        """Test the summary call is handed to ``submit`` and lands for the next prompt"""
+        memory = ConversationMemory()
+        pending = []
+        context = RollingContext(memory, lambda summary, transcript, max_tokens: 'potato blight talk',
+                                 token_budget=20, summary_tokens=30, submit=pending.append)
+        memory.append('farmer', 'my potato leaves have dark spots', 'That may be early blight.')
+        memory.append('farmer', 'what should I spray', 'Mancozeb at 2g/L.')
+
+        summary, turns = context.build('farmer')
+        self.assertEqual((summary, len(turns)), ('', 1))
+        context.build('farmer')
+        self.assertEqual(len(pending), 1)  # one fold in flight per session
+
+        self.assertTrue(pending.pop()())
+        summary, turns = context.build('farmer')
+        self.assertEqual((summary, len(turns)), ('potato blight talk', 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.chatbot_cache import ChatbotAnswerCache, key_terms, normalize_question, TfidfVectorizer
+
+class TestChatbotAnswerCache(unittest.TestCase):
+    """Test the chatbot answer cache"""
+
+    def test_normalized_exact_hit(self):
+        """Test punctuation and case differences share an entry"""
+        cache = ChatbotAnswerCache()
+        cache.set('What is NPK 19-19-19?', 'Balanced fertilizer')
+
+        self.assertEqual(normalize_question('What is NPK 19-19-19?'), 'what is npk 19 19 19')
+        self.assertEqual(cache.get('what is npk 19 19 19'), 'Balanced fertilizer')
+        self.assertIsNone(cache.get('what is npk 19 19 19', lang='hi'))
+        self.assertEqual(cache.stats()['exact_hits'], 1)
+
+    def test_ttl_and_capacity(self):
+        """Test expired and least-recently-used entries are dropped"""
+        cache = ChatbotAnswerCache(ttl=0.05, max_entries=2, similarity_threshold=1.1)
+        cache.set('one', '1')
+        cache.set('two', '2')
+        cache.set('three', '3')
+
+        self.assertIsNone(cache.get('one'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('two'))
+        stats = cache.stats()
+        self.assertEqual(stats['expirations'], 1)
+        self.assertEqual(stats['hit_rate'], 0.0)
+
+    @unittest.skipIf(TfidfVectorizer is None, 'scikit-learn not installed')
+    def test_similar_question_hit(self):
+        """Test nearest-neighbour fallback for reworded questions"""
+        cache = ChatbotAnswerCache(similarity_threshold=0.6)
+        cache.set('where can I buy urea fertilizer', 'Krishi Kendra')
+        cache.set('how to use the app', 'Go to /upload')
+
+        self.assertEqual(cache.get('where to buy urea fertilizer?'), 'Krishi Kendra')
+        self.assertIsNone(cache.get('tomato leaves turning yellow'))
+        self.assertEqual(cache.stats()['similar_hits'], 1)
+
+    @unittest.skipIf(TfidfVectorizer is None, 'scikit-learn not installed')
+    def test_different_crop_disease_product_or_method_misses(self):
+        """Test similar wording about another crop, disease, product or method is not served"""
+        cache = ChatbotAnswerCache()
+        cache.set('how to treat tomato early blight', 'Tomato early blight plan')
+        cache.set('where to buy urea', 'Urea dealers')
+        cache.set('what is the price of urea', 'Urea price')
+        cache.set('how to treat potato late blight organically', 'Organic plan')
+
+        for question in ('how to treat potato early blight', 'how to treat tomato late blight',
+                         'where to buy dap', 'what is the price of potash',
+                         'how to treat potato late blight chemically'):
+            with self.subTest(question=question):
+                self.assertIsNone(cache.get(question))
+        self.assertEqual(cache.get('how do I cure early blight on tomatoes?'), 'Tomato early blight plan')
+        self.assertEqual(cache.stats()['similar_hits'], 1)
+
+    def test_key_terms(self):
+        """Test synonyms share a key term and grades stay distinct"""
+        self.assertEqual(key_terms('how to cure capsicum bacterial spots organically'),
+                         {'treat', 'pepper', 'bacterial', 'spot', 'organic'})
+        self.assertNotEqual(key_terms('what is npk 19 19 19'), key_terms('what is npk 12 32 16'))
+
+    @unittest.skipIf(TfidfVectorizer is None, 'scikit-learn not installed')
+    def test_store_appends_to_index(self):
+        """Test a store adds its row to the fitted index and refits only after many stores"""
+        cache = ChatbotAnswerCache(similarity_threshold=0.6)
+        for i in range(8):
+            cache.set(f'how to grow crop number {i}', str(i))
+        cache.set('where can I buy urea fertilizer', 'Krishi Kendra')
+        self.assertIsNone(cache.get('how to use the app'))
+        vectorizer = cache._index['en'].vectorizer
+
+        cache.set('where can I buy urea fertilizer today', 'Krishi Kendra today')
+        self.assertIs(cache._index['en'].vectorizer, vectorizer)
+        self.assertEqual(cache._index['en'].appended, 1)
+        self.assertEqual(cache.get('where to buy urea fertilizer today?'), 'Krishi Kendra today')
+
+        for i in range(3):
+            cache.set(f'question number {i}', str(i))
+        cache.get('where to buy urea fertilizer?')
+        self.assertIsNot(cache._index['en'].vectorizer, vectorizer)
+        self.assertEqual(cache._index['en'].appended, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+from PIL import Image
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import tensorflow as tf
+    from models.data_loader import DatasetLoader
+    from models.dataset_compiler import DatasetCompiler
+except ImportError:
+    tf = None
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestDatasetLoader(unittest.TestCase):
+    """Test the tf.data training input pipeline"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for name, color in (('Tomato___healthy', 'green'), ('Tomato___Late_blight', 'brown')):
+            class_dir = Path(self.temp_dir) / name
+            class_dir.mkdir()
+            for i in range(10):
+                Image.new('RGB', (64, 48), color=color).save(class_dir / f'{i}.jpg')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def loader(self, **kwargs):
+        return DatasetLoader(self.temp_dir, img_size=(32, 32), batch_size=4, **kwargs)
+
+    def test_class_indices_follow_sorted_folders(self):
+        """Test the mapping written to class_indices.json"""
+        loader = self.loader()
+        loader.load_from_directory()
+        self.assertEqual(loader.class_indices, {'Tomato___Late_blight': 0, 'Tomato___healthy': 1})
+        self.assertEqual(loader.samples['train'] + loader.samples['val'], 20)
+
+    def test_split_is_stable(self):
+        """Test the same files land in validation on every run"""
+        first = self.loader().list_files()['val']
+        second = self.loader(seed=7).list_files()['val']
+        self.assertEqual(first, second)
+
+    def test_batches_are_resized_and_augmented_in_range(self):
+        """Test batch shapes, one-hot labels and pixel range"""
+        train_ds, _ = self.loader().load_from_directory()
+        images, labels = next(iter(train_ds))
+        self.assertEqual(tuple(images.shape[1:]), (32, 32, 3))
+        self.assertEqual(tuple(labels.shape[1:]), (2,))
+        self.assertGreaterEqual(float(tf.reduce_min(images)), 0.0)
+        self.assertLessEqual(float(tf.reduce_max(images)), 255.0)
+
+    def test_shards_are_disjoint(self):
+        """Test each worker reads its own part of the training files"""
+        seen = []
+        for index in range(2):
+            loader = self.loader(augment=False, num_shards=2, shard_index=index)
+            train_ds, _ = loader.load_from_directory()
+            seen.append(sum(int(images.shape[0]) for images, _ in train_ds))
+        self.assertEqual(sum(seen), loader.samples['train'])
+
+    def test_disk_cache(self):
+        """Test a cached pipeline yields the same number of images twice"""
+        train_ds, _ = self.loader(cache_dir=str(Path(self.temp_dir) / 'cache'), augment=False).load_from_directory()
+        counts = [sum(int(images.shape[0]) for images, _ in train_ds) for _ in range(2)]
+        self.assertEqual(counts[0], counts[1])
+        self.assertTrue(any((Path(self.temp_dir) / 'cache').iterdir()))
+
+    def test_compiled_shards_replace_decoding(self):
+        """Test a compiled copy gives the same classes, split and batch shapes"""
+        compiled_dir = Path(tempfile.mkdtemp())
+        try:
+            DatasetCompiler(self.temp_dir, compiled_dir, img_size=(32, 32), workers=1).compile()
+            decoded = self.loader()
+            decoded.list_files()
+            compiled = self.loader(compiled_dir=compiled_dir)
+            train_ds, _ = compiled.load_from_directory()
+            self.assertIsNotNone(compiled.compiled)
+            self.assertEqual(compiled.class_indices, decoded.class_indices)
+            self.assertEqual(compiled.samples, decoded.samples)
+            images, labels = next(iter(train_ds))
+            self.assertEqual(tuple(images.shape[1:]), (32, 32, 3))
+        finally:
+            shutil.rmtree(compiled_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+from PIL import Image
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.dataset_compiler import DatasetCompiler, CompiledDataset, MANIFEST_NAME
+
+class TestDatasetCompiler(unittest.TestCase):
+    """Test pre-resized dataset shards"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data_dir = self.temp_dir / 'data'
+        self.out_dir = self.temp_dir / 'compiled'
+        for name, color in (('Pepper_bell___healthy', 'green'), ('Pepper_bell___Bacterial_spot', 'yellow')):
+            (self.data_dir / name).mkdir(parents=True)
+            for i in range(5):
+                Image.new('RGB', (120, 90), color=color).save(self.data_dir / name / f'{i}.jpg')
+        self.compiler = DatasetCompiler(self.data_dir, self.out_dir, img_size=(24, 32), shard_size=4, workers=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def converted(self, manifest):
+        return sum(1 for entry in manifest['images'].values() if 'shard' in entry)
+
+    def test_shards_hold_resized_uint8_images(self):
+        """Test every image is stored once at the target size"""
+        manifest = self.compiler.compile()
+        self.assertEqual(self.converted(manifest), 10)
+        dataset = CompiledDataset(self.out_dir)
+        files = dataset.files()
+        self.assertEqual(len(files['train']) + len(files['val']), 10)
+        batch = dataset.read(*dataset.locate([path for path, _ in files['train']]))
+        self.assertEqual(batch.shape, (len(files['train']), 24, 32, 3))
+        self.assertEqual(str(batch.dtype), 'uint8')
+
+    def test_rerun_converts_only_new_or_changed_images(self):
+        """Test the content-hash manifest makes reruns incremental"""
+        manifest = self.compiler.compile()
+        shards = dict(manifest['shards'])
+        Image.new('RGB', (120, 90), color='red').save(self.data_dir / 'Pepper_bell___healthy' / '0.jpg')
+        Image.new('RGB', (120, 90), color='blue').save(self.data_dir / 'Pepper_bell___healthy' / 'new.jpg')
+
+        manifest = self.compiler.compile()
+        new_shards = set(manifest['shards']) - set(shards)
+        self.assertEqual(sum(manifest['shards'][name] for name in new_shards), 2)
+        self.assertEqual(self.converted(manifest), 11)
+        self.assertIn(manifest['images']['Pepper_bell___healthy/0.jpg']['shard'], new_shards)
+
+    def test_unreadable_images_are_skipped_and_remembered(self):
+        """Test a broken file is reported once, not reconverted on every run"""
+        (self.data_dir / 'Pepper_bell___healthy' / 'broken.jpg').write_bytes(b'not an image')
+        manifest = self.compiler.compile()
+        self.assertIn('error', manifest['images']['Pepper_bell___healthy/broken.jpg'])
+        shards = len(manifest['shards'])
+        self.assertEqual(len(self.compiler.compile()['shards']), shards)
+
+    def test_interrupted_run_resumes_after_finished_shards(self):
+        """Test images whose shard was recorded are not converted again"""
+        manifest = self.compiler.compile()
+        # Simulate a crash after the first shard: forget the rest
+        first = sorted(manifest['shards'])[0]
+        manifest['shards'] = {first: manifest['shards'][first]}
+        for entry in manifest['images'].values():
+            if entry.get('shard') != first:
+                entry.pop('shard', None)
+                entry.pop('row', None)
+        (self.out_dir / MANIFEST_NAME).write_text(json.dumps(manifest))
+
+        manifest = self.compiler.compile()
+        self.assertEqual(self.converted(manifest), 10)
+        self.assertIn(first, manifest['shards'])
+
+    def test_compiled_copy_is_tied_to_its_source(self):
+        """Test training only uses shards compiled from the same data directory"""
+        self.compiler.compile()
+        self.assertTrue(CompiledDataset.available(self.out_dir, self.data_dir))
+        self.assertFalse(CompiledDataset.available(self.out_dir, self.temp_dir))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.dataset_files import is_validation, list_dataset
+from models.dedup import DatasetDeduplicator, dhash, near_duplicate_pairs
+
+def photo(seed, size=(96, 96)):
+    """A random smooth image, so resized copies keep their dHash"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (6, 6, 3), dtype=np.uint8)
+    return Image.fromarray(small).resize(size, Image.BICUBIC)
+
+class TestDedup(unittest.TestCase):
+    """Test duplicate clustering and the split it imposes"""
+
+    def setUp(self):
+        self.data_dir = Path(tempfile.mkdtemp())
+        for name in ('Tomato___healthy', 'Tomato___Late_blight'):
+            (self.data_dir / name).mkdir()
+        healthy = self.data_dir / 'Tomato___healthy'
+        blight = self.data_dir / 'Tomato___Late_blight'
+        for i in range(12):
+            photo(i).save(healthy / f'{i:02d}.png')
+            photo(100 + i).save(blight / f'{i:02d}.png')
+        shutil.copy(healthy / '00.png', healthy / 'copy-of-00.png')                # exact copy
+        photo(1, size=(80, 80)).save(healthy / 'small-01.jpg', quality=85)         # resized re-encode
+        shutil.copy(blight / '05.png', healthy / 'mislabelled-05.png')            # same photo, other class
+        self.deduplicator = DatasetDeduplicator(self.data_dir, threshold=4, workers=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def test_near_duplicate_pairs(self):
+        """Test hashes within the threshold pair up and distant ones do not"""
+        hashes = [0, 0b111, 0xFF, 0xFFFF << 48]
+        self.assertEqual(near_duplicate_pairs(hashes, 3), {(0, 1)})
+        self.assertEqual(near_duplicate_pairs(hashes, 8), {(0, 1), (0, 2), (1, 2)})
+        self.assertLessEqual(bin(dhash(self.data_dir / 'Tomato___healthy' / '01.png') ^
+                                 dhash(self.data_dir / 'Tomato___healthy' / 'small-01.jpg')).count('1'), 4)
+
+    def test_duplicates_are_dropped_and_clusters_share_a_split(self):
+        """Test copies are collapsed, conflicts kept per class and no cluster spans train and val"""
+        report = self.deduplicator.run()
+        self.assertEqual(report['images'], 27)
+        self.assertEqual(report['dropped'], 2)
+        self.assertEqual(report['label_conflicts'], 1)
+        self.assertEqual(report['clusters'], 3)
+
+        _, files = list_dataset(self.data_dir, 0.2)
+        listed = {Path(path).relative_to(self.data_dir).as_posix(): split
+                  for split, items in files.items() for path, _ in items}
+        self.assertEqual(len(listed), 25)
+        self.assertEqual(report['train_images']['after'], len(files['train']))
+        self.assertEqual(len([p for p in ('Tomato___healthy/00.png', 'Tomato___healthy/copy-of-00.png') if p in listed]), 1)
+        self.assertEqual(len([p for p in ('Tomato___healthy/01.png', 'Tomato___healthy/small-01.jpg') if p in listed]), 1)
+        self.assertEqual(listed['Tomato___healthy/mislabelled-05.png'], listed['Tomato___Late_blight/05.png'])
+
+    def test_presplit_clusters_keep_the_train_copy(self):
+        """Test a cluster spanning shipped train/val folders keeps one train image and is reported"""
+        presplit = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, presplit)
+        for split in ('train', 'val'):
+            (presplit / split / 'Tomato___healthy').mkdir(parents=True)
+        for i in range(4):
+            photo(i).save(presplit / 'train' / 'Tomato___healthy' / f'{i:02d}.png')
+            photo(50 + i).save(presplit / 'val' / 'Tomato___healthy' / f'{i:02d}.png')
+        photo(0, size=(80, 80)).save(presplit / 'val' / 'Tomato___healthy' / 'small-00.jpg', quality=85)
+        shutil.copy(presplit / 'val' / 'Tomato___healthy' / '01.png',
+                    presplit / 'val' / 'Tomato___healthy' / 'copy-of-01.png')   # val-only cluster
+
+        report = DatasetDeduplicator(presplit, threshold=4, workers=2).run()
+        self.assertEqual(report['clusters'], 2)
+        self.assertEqual(report['train_val_leaks'], 1)
+        self.assertEqual(report['dropped'], 2)
+        self.assertEqual(report['train_images'], {'before': 4, 'after': 4})
+
+        _, files = list_dataset(presplit, 0.2)
+        listed = {Path(path).relative_to(presplit).as_posix(): split
+                  for split, items in files.items() for path, _ in items}
+        self.assertEqual(listed['train/Tomato___healthy/00.png'], 'train')
+        self.assertNotIn('val/Tomato___healthy/small-00.jpg', listed)
+        self.assertEqual(len([p for p in ('val/Tomato___healthy/01.png', 'val/Tomato___healthy/copy-of-01.png')
+                              if p in listed]), 1)
+
+    def test_dry_run_and_hash_reuse(self):
+        """Test a dry run writes nothing and a rerun does not hash unchanged files"""
+        self.deduplicator.run(dry_run=True)
+        self.assertFalse((self.data_dir / 'dedup.json').exists())
+        first = self.deduplicator.run()
+        self.assertEqual(self.deduplicator.hash_all([], {}), {})
+        manifest = self.deduplicator.load_manifest()
+        self.assertEqual(len(manifest['hashes']), 27)
+        self.assertEqual(self.deduplicator.run(), first)
+
+if __name__ == '__main__':
+    unittest.main()
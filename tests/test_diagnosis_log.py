@@ -0,0 +1,68 @@
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.diagnosis_log import DiagnosisLog
+from utils.disease_labels import disease_labels
+
+class TestDiagnosisLog(unittest.TestCase):
+    """Test the record of diagnosed uploads"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.log = DiagnosisLog(self.temp_dir / 'history' / 'diagnoses.jsonl')
+        for name in ('a.jpg', 'b.jpg', 'c.jpg'):
+            (self.temp_dir / name).write_bytes(b'jpeg')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_labelled_uploads_use_canonical_labels(self):
+        """Test Gemini spellings resolve and unknown or missing images are dropped"""
+        self.log.append(image_filename='a.jpg', disease='Tomato_Early_blight', confidence=92)
+        self.log.append(image_filename='b.jpg', disease='Mango___Anthracnose', confidence=95)
+        self.log.append(image_filename='gone.jpg', disease='Potato___healthy', confidence=0.9)
+        uploads = self.log.labelled_uploads(self.temp_dir, disease_labels)
+        self.assertEqual(uploads, [(str(self.temp_dir / 'a.jpg'), 'Tomato___Early_blight')])
+
+    def test_confidence_threshold_and_latest_record(self):
+        """Test low-confidence labels are skipped and re-diagnoses replace older labels"""
+        self.log.append(image_filename='a.jpg', disease='Potato___Late_blight', confidence=0.95)
+        self.log.append(image_filename='a.jpg', disease='Potato___Early_blight', confidence=0.5)
+        self.log.append(image_filename='c.jpg', disease='Potato___Late_blight', confidence=0.6)
+        self.log.append(image_filename='c.jpg', disease='Potato___Early_blight', confidence=85)
+        uploads = self.log.labelled_uploads(self.temp_dir, disease_labels, min_confidence=0.8)
+        self.assertEqual(uploads, [(str(self.temp_dir / 'c.jpg'), 'Potato___Early_blight')])
+
+    def test_torn_last_line_is_ignored(self):
+        """Test a crash mid-write does not break reading"""
+        self.log.append(image_filename='a.jpg', disease='Potato___healthy', confidence=99)
+        with open(self.log.path, 'a') as f:
+            f.write('{"image_filename": "b.jp')
+        self.assertEqual(len(self.log.entries()), 1)
+
+    def test_confirmed_uploads(self):
+        """Test only user confirmations after the watermark count, corrections replacing Gemini's label"""
+        self.log.append(image_filename='a.jpg', disease='Potato___Late_blight', confidence=95)
+        self.log.confirm('a.jpg', 'Potato___Early_blight')
+        self.log.append(image_filename='b.jpg', disease='Potato___healthy', confidence=99)
+        uploads = self.log.confirmed_uploads(self.temp_dir, disease_labels)
+        self.assertEqual([(path, label) for path, label, _ in uploads],
+                         [(str(self.temp_dir / 'a.jpg'), 'Potato___Early_blight')])
+        self.assertEqual(self.log.confirmed_uploads(self.temp_dir, disease_labels, since=uploads[0][2]), [])
+        self.assertEqual(self.log.latest('a.jpg')['disease'], 'Potato___Early_blight')
+
+    def test_confirmation_outranks_confidence(self):
+        """Test a confirmed label passes any Gemini confidence threshold"""
+        self.log.append(image_filename='a.jpg', disease='Potato___Late_blight', confidence=40)
+        self.log.confirm('a.jpg', 'Potato___Late_blight')
+        uploads = self.log.labelled_uploads(self.temp_dir, disease_labels, min_confidence=0.8)
+        self.assertEqual(uploads, [(str(self.temp_dir / 'a.jpg'), 'Potato___Late_blight')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.config import Config
+from utils.disease_labels import DiseaseLabelRegistry, disease_labels
+from utils.recommendation import DiseaseRecommendationEngine
+
+class TestDiseaseLabelRegistry(unittest.TestCase):
+    """Test canonical disease label resolution"""
+
+    def test_canonical_labels_match_knowledge_base(self):
+        """Test every canonical label has a knowledge-base entry"""
+        self.assertEqual(set(disease_labels), set(DiseaseRecommendationEngine.DISEASE_INFO))
+
+    def test_spelling_variants_resolve(self):
+        """Test app, model, display and synonym spellings resolve to one label"""
+        for alias in ('Tomato_Early_blight', 'tomato___early_blight', 'Tomato - Early blight', 'TOMATO EARLY BLIGHT'):
+            self.assertEqual(disease_labels[alias], 'Tomato___Early_blight')
+        for alias in ('Pepper__bell___Bacterial_spot', 'Bell pepper - Bacterial spot', 'capsicum bacterial spot'):
+            self.assertEqual(disease_labels[alias], 'Pepper_bell___Bacterial_spot')
+
+    def test_unknown_labels_are_not_guessed(self):
+        """Test ambiguous or unknown names resolve to nothing"""
+        self.assertIsNone(disease_labels.get('Early blight'))
+        self.assertIsNone(disease_labels.get('Maize rust'))
+        self.assertNotIn('', disease_labels)
+        with self.assertRaises(KeyError):
+            disease_labels['Tomato mosaic virus']
+
+    def test_model_class_indices(self):
+        """Test the saved class_indices.json maps onto canonical labels in index order"""
+        path = Path(Config.MODEL_DIR) / 'class_indices.json'
+        if not path.exists():
+            self.skipTest('No saved class indices')
+        with open(path) as f:
+            class_indices = json.load(f)
+        names = disease_labels.from_class_indices(class_indices)
+        self.assertEqual(sorted(names), sorted(Config.DISEASE_CLASSES))
+        self.assertEqual(names[class_indices['Tomato_Early_blight']], 'Tomato___Early_blight')
+
+    def test_ambiguous_aliases_are_rejected(self):
+        """Test two labels sharing a normalised key fail at build time"""
+        with self.assertRaises(ValueError):
+            DiseaseLabelRegistry(['Corn___Rust', 'corn_rust'])
+
+    def test_recommendation_accepts_any_spelling(self):
+        """Test the recommendation engine resolves model spellings"""
+        rec = DiseaseRecommendationEngine.get_recommendation('Tomato_Early_blight', 0.8)
+        self.assertEqual(rec['disease_code'], 'Tomato___Early_blight')
+        self.assertNotEqual(rec['severity'], 'uncertain')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import tensorflow as tf
+    from models.distill import Distiller, class_permutation, softened
+except ImportError:
+    tf = None
+
+def tiny_model(num_classes=3, seed=0):
+    tf.keras.utils.set_random_seed(seed)
+    inputs = tf.keras.layers.Input(shape=(8, 8, 3))
+    x = tf.keras.layers.GlobalAveragePooling2D()(inputs)
+    outputs = tf.keras.layers.Dense(num_classes, activation='softmax')(x)
+    return tf.keras.Model(inputs, outputs)
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestDistillation(unittest.TestCase):
+    """Test the teacher-student loss and training step"""
+
+    def test_softening_flattens_but_keeps_order(self):
+        """Test temperature-scaled probabilities still sum to one and keep the ranking"""
+        probs = tf.constant([[0.7, 0.2, 0.1]])
+        soft = softened(probs, 4.0).numpy()[0]
+        self.assertAlmostEqual(float(soft.sum()), 1.0, places=5)
+        self.assertLess(soft[0], 0.7)
+        self.assertEqual(list(soft.argsort()), [2, 1, 0])
+
+    def test_matching_student_has_no_soft_loss(self):
+        """Test the KL term vanishes when the student copies the teacher"""
+        distiller = Distiller(tiny_model(), tiny_model(), temperature=4.0, alpha=1.0)
+        probs = tf.constant([[0.6, 0.3, 0.1]])
+        self.assertAlmostEqual(float(distiller.distillation_loss(probs, probs, probs)), 0.0, places=5)
+
+    def test_class_permutation_matches_by_label(self):
+        """Test teacher outputs are reordered for a student trained on other folder names"""
+        teacher = {'Tomato_Early_blight': 0, 'Tomato_healthy': 1, 'Potato___healthy': 2}
+        student = {'Potato___healthy': 0, 'Tomato___Early_blight': 1, 'Tomato___healthy': 2}
+        self.assertEqual(class_permutation(teacher, student), [2, 0, 1])
+        with self.assertRaises(ValueError):
+            class_permutation({'Potato___healthy': 0}, student)
+
+    def test_fit_updates_only_the_student(self):
+        """Test a training step moves the student and leaves the teacher alone"""
+        teacher, student = tiny_model(seed=1), tiny_model(seed=2)
+        teacher_weights = [w.copy() for w in teacher.get_weights()]
+        student_weights = [w.copy() for w in student.get_weights()]
+        distiller = Distiller(student, teacher)
+        distiller.compile(optimizer=tf.keras.optimizers.Adam(0.1))
+        images = tf.random.uniform((6, 8, 8, 3), 0, 255)
+        labels = tf.one_hot([0, 1, 2, 0, 1, 2], 3)
+        history = distiller.fit(images, labels, epochs=1, batch_size=3, verbose=0)
+        self.assertIn('loss', history.history)
+        for before, after in zip(teacher_weights, teacher.get_weights()):
+            self.assertTrue((before == after).all())
+        self.assertTrue(any((before != after).any() for before, after in zip(student_weights, student.get_weights())))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import unittest
+import subprocess
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from PIL import Image
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import tensorflow as tf
+    from models.train_distributed import (WorkerContext, local_tf_configs, replica_batch_size,
+                                          scaled_hyperparameters, without_option)
+except ImportError:
+    tf = None
+
+SCRIPT = Path(__file__).parent.parent / 'models' / 'train_distributed.py'
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestClusterConfiguration(unittest.TestCase):
+    """Test TF_CONFIG handling and hyperparameter scaling"""
+
+    def test_worker_context_from_tf_config(self):
+        """Test worker count, index and chief from TF_CONFIG"""
+        tf_config = local_tf_configs(3)[2]
+        with mock.patch.dict(os.environ, {'TF_CONFIG': tf_config}):
+            context = WorkerContext.from_env()
+        self.assertEqual((context.num_workers, context.index, context.is_chief), (3, 2, False))
+        with mock.patch.dict(os.environ, {'TF_CONFIG': ''}):
+            self.assertTrue(WorkerContext.from_env().is_chief)
+
+    def test_linear_scaling(self):
+        """Test global batch and learning rate grow with the worker count"""
+        self.assertEqual(scaled_hyperparameters(32, 0.001, 4), (128, 0.004))
+
+    def test_replica_batch_without_a_cluster(self):
+        """Test a single worker's replica receives the whole batch"""
+        dataset = tf.data.Dataset.from_tensor_slices((tf.zeros([12, 2]), tf.zeros([12]))).batch(4).repeat()
+        self.assertEqual(replica_batch_size(tf.distribute.get_strategy(), dataset), 4)
+
+    def test_local_cluster_arguments(self):
+        """Test workers are not told to start clusters of their own"""
+        self.assertEqual(without_option(['--local-workers', '2', '--steps', '3'], '--local-workers'), ['--steps', '3'])
+        self.assertEqual(without_option(['--local-workers=2'], '--local-workers'), [])
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestLocalMultiWorkerTraining(unittest.TestCase):
+    """Test a real two-process cluster on this machine"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for name, color in (('Tomato___healthy', 'green'), ('Tomato___Early_blight', 'brown')):
+            (self.temp_dir / 'data' / name).mkdir(parents=True)
+            for i in range(8):
+                Image.new('RGB', (64, 64), color=color).save(self.temp_dir / 'data' / name / f'{i}.jpg')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_two_workers_train_and_chief_saves(self):
+        """Test both workers finish, replicas train on the per-replica batch and only the chief saves"""
+        model_path = self.temp_dir / 'model' / 'best_model.h5'
+        model_path.parent.mkdir()
+        result = subprocess.run(
+            [sys.executable, str(SCRIPT), '--local-workers', '2', '--data-dir', str(self.temp_dir / 'data'),
+             '--model-path', str(model_path), '--epochs', '1', '--fine-tune-epochs', '0', '--steps', '1',
+             '--batch-size', '4', '--no-pretrained'],
+            capture_output=True, text=True, timeout=900,
+            env=dict(os.environ, DISTRIBUTED_BACKUP_DIR=str(self.temp_dir / 'backup'))
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        report = json.loads(result.stdout[result.stdout.rindex('\n{'):])
+        self.assertEqual((report['workers'], len(report['epochs'])), (2, 1))
+        # Each worker's pipeline yields the global batch; Keras hands every replica its share of it
+        self.assertEqual((report['global_batch'], report['replica_batch']), (8, 4))
+        self.assertTrue(model_path.exists())
+        self.assertEqual(json.loads((model_path.parent / 'class_indices.json').read_text()),
+                         {'Tomato___Early_blight': 0, 'Tomato___healthy': 1})
+
+if __name__ == '__main__':
+    unittest.main()
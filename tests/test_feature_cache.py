@@ -0,0 +1,66 @@
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import tensorflow as tf
+    from models.data_loader import DatasetLoader
+    from models.feature_cache import FeatureCache, FeatureSequence
+except ImportError:
+    tf = None
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestFeatureCache(unittest.TestCase):
+    """Test cached backbone embeddings"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.temp_dir) / 'data'
+        for name, color in (('Potato___healthy', 'green'), ('Potato___Early_blight', 'brown')):
+            class_dir = self.data_dir / name
+            class_dir.mkdir(parents=True)
+            for i in range(6):
+                Image.new('RGB', (40, 40), color=color).save(class_dir / f'{i}.jpg')
+        self.loader = DatasetLoader(self.data_dir, img_size=(16, 16), batch_size=4, validation_split=0.0)
+        self.loader.list_files()
+        inputs = tf.keras.layers.Input(shape=(16, 16, 3))
+        self.extractor = tf.keras.Model(inputs, tf.keras.layers.GlobalAveragePooling2D()(inputs))
+        self.cache = FeatureCache(Path(self.temp_dir) / 'features')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_embeddings_are_float16_memmaps_in_file_order(self):
+        """Test one embedding per image, stored as float16 and labelled in listing order"""
+        features, labels = self.cache.get('train', 'gap', self.extractor, self.loader, self.loader.files['train'])
+        self.assertIsInstance(features, np.memmap)
+        self.assertEqual(features.dtype, np.float16)
+        self.assertEqual(features.shape, (12, 3))
+        self.assertEqual(list(labels), [label for _, label in self.loader.files['train']])
+
+    def test_cache_is_reused_until_the_file_list_changes(self):
+        """Test the key covers the file list"""
+        items = self.loader.files['train']
+        self.cache.get('train', 'gap', self.extractor, self.loader, items)
+        self.assertIsNotNone(self.cache.load('train', self.cache._meta()['train']['key']))
+        features, _ = self.cache.get('train', 'gap', self.extractor, self.loader, items[:-1])
+        self.assertEqual(len(features), len(items) - 1)
+
+    def test_feature_sequence_batches(self):
+        """Test float32 batches with one-hot labels cover every sample once per epoch"""
+        features, labels = self.cache.get('train', 'gap', self.extractor, self.loader, self.loader.files['train'])
+        sequence = FeatureSequence(features, labels, num_classes=2, batch_size=5)
+        self.assertEqual(len(sequence), 3)
+        seen = sum(len(sequence[i][0]) for i in range(len(sequence)))
+        x, y = sequence[0]
+        self.assertEqual((x.dtype, y.shape[1], seen), (np.float32, 2, 12))
+
+if __name__ == '__main__':
+    unittest.main()
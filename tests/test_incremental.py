@@ -0,0 +1,66 @@
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.model_versions import ModelVersions
+
+try:
+    import tensorflow as tf
+    from models.incremental import replay_sample
+except ImportError:
+    tf = None
+
+class TestModelVersions(unittest.TestCase):
+    """Test numbered model artefacts and promotion"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.versions = ModelVersions(self.temp_dir / 'versions')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def add_version(self, content):
+        version, path = self.versions.next_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return self.versions.add({'version': version, 'path': str(path), 'confirmed_until': 1.0})
+
+    def test_versions_are_numbered(self):
+        """Test each artefact gets the next version number"""
+        self.assertIsNone(self.versions.current())
+        self.assertEqual(self.add_version(b'one')['version'], 'v001')
+        self.assertEqual(self.add_version(b'two')['version'], 'v002')
+        self.assertEqual(len(self.versions.load()['versions']), 2)
+
+    def test_promote_replaces_the_served_model(self):
+        """Test promotion copies the artefact and marks it current"""
+        served = self.temp_dir / 'best_model.h5'
+        served.write_bytes(b'full training run')
+        self.add_version(b'one')
+        self.add_version(b'two')
+        self.versions.promote('v002', served)
+        self.assertEqual(served.read_bytes(), b'two')
+        self.assertEqual(self.versions.current()['version'], 'v002')
+        with self.assertRaises(ValueError):
+            self.versions.promote('v009', served)
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestReplaySample(unittest.TestCase):
+    """Test the replay buffer of original images"""
+
+    def test_classes_are_balanced(self):
+        """Test a small buffer still covers every class"""
+        items = [(f"a{i}.jpg", 0) for i in range(100)] + [(f"b{i}.jpg", 1) for i in range(3)] + [('c.jpg', 2)]
+        sample = replay_sample(items, 9)
+        self.assertEqual(sorted(label for _, label in sample), [0, 0, 0, 0, 0, 1, 1, 1, 2])
+        self.assertEqual(sample, replay_sample(items, 9))
+        self.assertEqual(len(replay_sample(items, 1000)), len(items))
+
+if __name__ == '__main__':
+    unittest.main()
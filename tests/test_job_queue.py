@@ -0,0 +1,66 @@
+import unittest
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.job_queue import JobQueue, QueueFullError, sse_event
+
+class TestJobQueue(unittest.TestCase):
+    """Test the bounded background job queue"""
+
+    def test_job_runs_and_publishes_result(self):
+        """Test a submitted job finishes with its result"""
+        jobs = JobQueue('test', workers=1, max_pending=4)
+        job = jobs.submit(lambda job, x: {'value': x * 2}, 21)
+
+        frames = list(job.iter_events(keepalive=1.0))
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.result, {'value': 42})
+        self.assertTrue(frames[-1].startswith('event: done'))
+        self.assertIs(jobs.get(job.id), job)
+
+    def test_status_events_in_order(self):
+        """Test 'queued' is published before the worker's 'running' even for instant jobs"""
+        jobs = JobQueue('test', workers=4, max_pending=64)
+        submitted = [jobs.submit(lambda job: None) for _ in range(50)]
+        for job in submitted:
+            list(job.iter_events(keepalive=1.0))
+            self.assertEqual([event for event, _ in job.events], ['status', 'status', 'done'])
+            self.assertEqual(job.events[0][1], {'status': 'queued'})
+
+    def test_failed_job(self):
+        """Test exceptions are captured as failed jobs"""
+        def boom(job):
+            raise RuntimeError('upstream timeout')
+
+        jobs = JobQueue('test', workers=1, max_pending=4)
+        job = jobs.submit(boom)
+        list(job.iter_events(keepalive=1.0))
+
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('upstream timeout', job.error)
+
+    def test_backpressure(self):
+        """Test submissions are rejected once the queue is saturated"""
+        release = threading.Event()
+        jobs = JobQueue('test', workers=1, max_pending=1)
+
+        first = jobs.submit(lambda job: release.wait(5))
+        first.wait_events(since=1, timeout=2)  # wait until the worker picks it up
+        jobs.submit(lambda job: None)
+
+        with self.assertRaises(QueueFullError):
+            jobs.submit(lambda job: None)
+        self.assertEqual(jobs.stats()['rejected'], 1)
+        release.set()
+
+    def test_sse_format(self):
+        """Test server-sent event framing"""
+        self.assertEqual(sse_event('status', {'a': 1}), 'event: status\ndata: {"a": 1}\n\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.json_parsing import (IncrementalObjectParser, extract_json_text, invalid_fields, parse_model_json,
+                                repair_truncated_json)
+
+class TestModelJsonParsing(unittest.TestCase):
+    """Test parsing and repair of JSON replies from Gemini"""
+
+    def test_fenced_reply_with_prose(self):
+        """Test markdown fences and leading prose are stripped"""
+        text = 'Here is the result:\n```json\n{"is_leaf": true, "confidence": 91}\n```'
+        self.assertEqual(extract_json_text(text), '{"is_leaf": true, "confidence": 91}')
+        value, repaired = parse_model_json(text)
+        self.assertEqual(value['confidence'], 91)
+        self.assertFalse(repaired)
+
+    def test_truncated_array_is_closed(self):
+        """Test a reply cut off inside a list keeps the complete items"""
+        text = '{"is_leaf": true, "disease": "Potato___Late_blight", "prevention": ["Rotate crops", "Remove debr'
+        value, repaired = parse_model_json(text)
+        self.assertTrue(repaired)
+        self.assertEqual(value['disease'], 'Potato___Late_blight')
+        self.assertEqual(value['prevention'][0], 'Rotate crops')
+
+    def test_partial_key_is_dropped(self):
+        """Test a dangling key is cut back to the last complete field"""
+        value = repair_truncated_json('{"is_leaf": true, "confidence": 88, "reas')
+        self.assertEqual(value, {'is_leaf': True, 'confidence': 88})
+
+    def test_truncated_reply_without_diagnosis_is_invalid(self):
+        """Test a reply cut off after is_leaf repairs to an object that lacks the diagnosis fields"""
+        value, repaired = parse_model_json('{"is_leaf": true, "dise')
+        self.assertTrue(repaired)
+        self.assertEqual(value, {'is_leaf': True})
+        fields = {'disease': str, 'confidence': (int, float), 'prevention': [str]}
+        self.assertEqual(invalid_fields(value, fields), ['disease', 'confidence', 'prevention'])
+
+    def test_field_types(self):
+        """Test wrong types, booleans for numbers and non-string list items are invalid"""
+        fields = {'disease': str, 'confidence': (int, float), 'prevention': [str]}
+        self.assertEqual(invalid_fields({'disease': 'Potato___healthy', 'confidence': 91.5, 'prevention': ['Rotate']},
+                                        fields), [])
+        self.assertEqual(invalid_fields({'disease': 3, 'confidence': True, 'prevention': ['Rotate', 2]}, fields),
+                         ['disease', 'confidence', 'prevention'])
+
+    def test_garbage_raises(self):
+        """Test unrecoverable replies still raise JSONDecodeError"""
+        with self.assertRaises(json.JSONDecodeError):
+            parse_model_json('Sorry, I cannot help with that.')
+
+class TestIncrementalObjectParser(unittest.TestCase):
+    """Test fields are released as soon as they close in a streamed reply"""
+
+    REPLY = '```json\n{"is_leaf": true, "disease": "Potato___Late_blight", "confidence": 87, ' \
+            '"reasoning": "dark, {ringed} \\"spots\\"", "prevention": ["a, b", "c"]}\n```'
+
+    def test_label_arrives_before_the_end(self):
+        """Test disease is emitted once its closing comma has streamed in"""
+        parser = IncrementalObjectParser()
+        cut = self.REPLY.index('"confidence"')
+        first = dict(parser.feed(self.REPLY[:cut]))
+        self.assertEqual(first, {'is_leaf': True, 'disease': 'Potato___Late_blight'})
+        rest = dict(parser.feed(self.REPLY[cut:]))
+        self.assertEqual(rest['confidence'], 87)
+        self.assertTrue(parser.done)
+
+    def test_any_chunking_gives_the_same_fields(self):
+        """Test commas and braces inside strings and lists do not split members"""
+        expected = json.loads(extract_json_text(self.REPLY))
+        for size in (1, 4, 13):
+            parser = IncrementalObjectParser()
+            fields = {}
+            for i in range(0, len(self.REPLY), size):
+                fields.update(parser.feed(self.REPLY[i:i + size]))
+            self.assertEqual(fields, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import shutil
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.config import Config
+from utils.knowledge_base import KnowledgeBase, MANIFEST_NAME, write_knowledge_base
+
+ENTRY = {
+    'description': 'Fungal disease',
+    'symptoms': ['Brown spots'],
+    'treatment': {'organic': ['Neem oil'], 'chemical': []},
+    'prevention': ['Rotate crops'],
+    'fertilizer': 'Balanced NPK'
+}
+
+class TestKnowledgeBase(unittest.TestCase):
+    """Test the file-backed, lazily read knowledge base"""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        write_knowledge_base({
+            'Tomato___Early_blight': ENTRY,
+            'Tomato___healthy': {**ENTRY, 'description': 'Healthy plant'},
+            'Potato___Late_blight': {**ENTRY, 'description': 'Late blight'}
+        }, self.directory, '1.0.0')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shipped_files_load(self):
+        """Test the repository knowledge base covers every supported class"""
+        kb = KnowledgeBase(Config.KNOWLEDGE_DIR)
+        self.assertEqual(set(kb), set(Config.DISEASE_CLASSES))
+        self.assertTrue(kb['Tomato___Late_blight']['treatment']['organic'])
+
+    def test_lookup_reads_one_entry(self):
+        """Test lookups return a fresh copy of exactly the requested entry"""
+        kb = KnowledgeBase(self.directory)
+        self.assertEqual(len(kb), 3)
+        self.assertEqual(kb['Tomato___healthy']['description'], 'Healthy plant')
+        kb['Tomato___healthy']['symptoms'].append('Changed')
+        self.assertEqual(kb['Tomato___healthy']['symptoms'], ['Brown spots'])
+        with self.assertRaises(KeyError):
+            kb['Corn___Rust']
+
+    def test_hand_edited_file_is_reindexed(self):
+        """Test a crop file edited without updating the manifest still resolves"""
+        kb = KnowledgeBase(self.directory)
+        path = self.directory / 'tomato.jsonl'
+        lines = path.read_text(encoding='utf-8').splitlines()
+        first = json.loads(lines[0])
+        first['description'] = 'A much longer description that shifts every later offset'
+        lines[0] = json.dumps(first)
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        self.assertEqual(kb['Tomato___healthy']['description'], 'Healthy plant')
+
+    def test_reload_picks_up_new_version(self):
+        """Test a rewritten knowledge base is served without restarting"""
+        kb = KnowledgeBase(self.directory, reload_interval=0)
+        reloads = []
+        kb.on_reload(lambda knowledge_base: reloads.append(knowledge_base.version))
+        self.assertFalse(kb.maybe_reload())
+
+        write_knowledge_base({'Pepper_bell___healthy': ENTRY}, self.directory, '2.0.0')
+        (self.directory / MANIFEST_NAME).touch()
+        self.assertTrue(kb.maybe_reload())
+        self.assertEqual(reloads, ['2.0.0'])
+        self.assertIn('Pepper_bell___healthy', kb)
+        self.assertNotIn('Potato___Late_blight', kb)
+
+if __name__ == '__main__':
+    unittest.main()
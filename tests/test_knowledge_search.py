@@ -0,0 +1,38 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.knowledge_search import KnowledgeBaseIndex, stem
+from utils.recommendation import DiseaseRecommendationEngine
+
+class TestKnowledgeBaseIndex(unittest.TestCase):
+    """Test BM25 retrieval over the disease knowledge base"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = KnowledgeBaseIndex(DiseaseRecommendationEngine.DISEASE_INFO)
+
+    def test_search_ranks_matching_section_first(self):
+        """Test the most specific section ranks first"""
+        score, disease_code, section, _ = self.index.search('how to treat potato late blight organically')[0]
+        self.assertEqual((disease_code, section), ('Potato___Late_blight', 'organic'))
+        self.assertEqual(stem('organically'), 'organic')
+
+    def test_local_answer(self):
+        """Test disease-specific questions are answered locally"""
+        result = self.index.answer('symptoms of tomato bacterial spot?')
+        self.assertEqual(result['disease_code'], 'Tomato___Bacterial_spot')
+        self.assertEqual(result['sections'], ['symptoms'])
+        self.assertIn('Small dark spots with yellow halos', result['response'])
+
+    def test_ambiguous_or_general_questions(self):
+        """Test questions without a single named disease are not answered locally"""
+        self.assertIsNone(self.index.answer('late blight spray'))
+        self.assertTrue(self.index.snippets('late blight spray'))
+        self.assertEqual(self.index.snippets('where to buy urea'), [])
+
+if __name__ == '__main__':
+    unittest.main()
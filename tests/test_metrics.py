@@ -0,0 +1,27 @@
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.metrics import MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test in-process metrics"""
+
+    def test_counters_and_timings(self):
+        """Test counter increments and timing summaries"""
+        registry = MetricsRegistry()
+        registry.incr('requests')
+        registry.incr('requests', 2)
+        registry.observe('latency_ms', 10)
+        registry.observe('latency_ms', 30)
+
+        snapshot = registry.snapshot()
+
+        self.assertEqual(snapshot['counters']['requests'], 3)
+        self.assertEqual(snapshot['timings']['latency_ms'], {'count': 2, 'avg': 20.0, 'min': 10, 'max': 30})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import tensorflow as tf
+    from models.cnn_model import DiseaseDetectionModel
+    from models.preprocessing import ImagePreprocessing, has_preprocessing
+except ImportError:
+    tf = None
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestImagePreprocessing(unittest.TestCase):
+    """Test the resize and normalisation layer"""
+
+    def setUp(self):
+        self.pixels = np.array([[[[0, 127, 255]] * 4] * 4], dtype=np.uint8)
+
+    def test_caffe_mode_flips_to_bgr_and_centres(self):
+        """Test ResNet/VGG inputs become mean-subtracted BGR"""
+        out = ImagePreprocessing((4, 4), 'caffe')(self.pixels).numpy()
+        np.testing.assert_allclose(out[0, 0, 0], [255 - 103.939, 127 - 116.779, 0 - 123.68], rtol=1e-5)
+
+    def test_tf_mode_scales_to_unit_range(self):
+        """Test MobileNetV2 inputs are scaled to [-1, 1]"""
+        out = ImagePreprocessing((4, 4), 'tf')(self.pixels).numpy()
+        np.testing.assert_allclose(out[0, 0, 0], [-1.0, 127 / 127.5 - 1, 1.0], rtol=1e-5)
+
+    def test_resizes_any_input_size(self):
+        """Test uint8 images of another size come out float32 at the model size"""
+        out = ImagePreprocessing((8, 6), 'none')(np.zeros((2, 31, 17, 3), np.uint8))
+        self.assertEqual(out.dtype, tf.float32)
+        self.assertEqual(tuple(out.shape), (2, 8, 6, 3))
+
+    def test_unknown_mode(self):
+        """Test an unknown normalisation is rejected"""
+        with self.assertRaises(ValueError):
+            ImagePreprocessing((4, 4), 'torch')
+
+    def test_config_round_trip(self):
+        """Test the layer is rebuilt from its config when a model is loaded"""
+        layer = ImagePreprocessing((32, 48), 'caffe')
+        clone = ImagePreprocessing.from_config(layer.get_config())
+        self.assertEqual(clone.img_size, (32, 48))
+        self.assertEqual(clone.mode, 'caffe')
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestBackbones(unittest.TestCase):
+    """Test the lighter backbones build with preprocessing in the graph"""
+
+    def test_light_backbones_take_raw_images(self):
+        """Test EfficientNetB0 and MobileNetV3Small accept raw uint8 images of any size"""
+        for architecture in ('efficientnetb0', 'mobilenetv3small'):
+            with self.subTest(architecture=architecture):
+                disease_model = DiseaseDetectionModel(3, (64, 64), architecture, weights=None)
+                model = disease_model.build_model()
+                self.assertTrue(has_preprocessing(model))
+                images = np.random.randint(0, 256, (2, 90, 70, 3), dtype=np.uint8)
+                self.assertEqual(tuple(model(images, training=False).shape), (2, 3))
+
+    def test_embeddings_and_head_share_the_model(self):
+        """Test the feature extractor and head model still split the full model at the pooling layer"""
+        disease_model = DiseaseDetectionModel(3, (64, 64), 'mobilenetv3small', weights=None, head_units=(16,))
+        model = disease_model.build_model()
+        images = np.random.randint(0, 256, (2, 64, 64, 3), dtype=np.uint8)
+        features = disease_model.feature_extractor()(images, training=False)
+        np.testing.assert_allclose(disease_model.head_model()(features, training=False).numpy(),
+                                   model(images, training=False).numpy(), rtol=1e-4, atol=1e-5)
+        self.assertIs(disease_model.backbone(), model.layers[2])
+
+    def test_unknown_architecture(self):
+        """Test an unknown backbone name is rejected"""
+        with self.assertRaises(ValueError):
+            DiseaseDetectionModel(3, (64, 64), 'efficientnetb7', weights=None).build_model()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import csv
+import time
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import tensorflow as tf
+    from models.profiling import StepProfiler
+except ImportError:
+    tf = None
+
+def tiny_model():
+    inputs = tf.keras.layers.Input(shape=(8, 8, 3))
+    x = tf.keras.layers.GlobalAveragePooling2D()(inputs)
+    model = tf.keras.Model(inputs, tf.keras.layers.Dense(2, activation='softmax')(x))
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+def dataset(delay=0.0):
+    images = tf.random.uniform((32, 8, 8, 3), 0, 255)
+    labels = tf.one_hot(tf.range(32) % 2, 2)
+    ds = tf.data.Dataset.from_tensor_slices((images, labels)).batch(4)
+    if delay:
+        def slow(x, y):
+            def wait(x):
+                time.sleep(delay)
+                return x
+            x = tf.py_function(wait, [x], tf.float32)
+            x.set_shape((None, 8, 8, 3))
+            return x, y
+        ds = ds.map(slow)
+    return ds
+
+@unittest.skipIf(tf is None, 'TensorFlow is not installed')
+class TestStepProfiler(unittest.TestCase):
+    """Test the step-time breakdown callback"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_calibration_leaves_the_model_unchanged(self):
+        """Test timing the compute step does not train the model"""
+        model = tiny_model()
+        before = [w.copy() for w in model.get_weights()]
+        profiler = StepProfiler(4, calibration_steps=3)
+        self.assertGreater(profiler.calibrate(model, dataset()), 0)
+        for old, new in zip(before, model.get_weights()):
+            self.assertTrue((old == new).all())
+
+    def test_slow_input_is_input_bound(self):
+        """Test a pipeline that sleeps per batch is reported as input-bound, with a CSV row per epoch"""
+        model = tiny_model()
+        profiler = StepProfiler(4, csv_path=self.temp_dir / 'training_throughput.csv', calibration_steps=3)
+        profiler.start_phase('train', model, dataset(), samples=32)
+        model.fit(dataset(delay=0.05), epochs=2, callbacks=[profiler], verbose=0)
+        bound, share = profiler.verdict('train')
+        self.assertEqual(bound, 'input-bound')
+        self.assertGreater(share, 0.5)
+        with open(self.temp_dir / 'training_throughput.csv') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['epoch'] for row in rows], ['1', '2'])
+        self.assertEqual(rows[0]['images'], '32')
+
+    def test_verdict_weighs_phases_by_steps(self):
+        """Test the summary over several phases"""
+        profiler = StepProfiler(4)
+        profiler.rows = [
+            {'phase': 'train', 'steps': 10, 'step_ms': 100.0, 'input_wait_ms': 5.0},
+            {'phase': 'fine_tune', 'steps': 10, 'step_ms': 300.0, 'input_wait_ms': 0.0},
+        ]
+        self.assertEqual(profiler.verdict('train')[0], 'compute-bound')
+        self.assertAlmostEqual(profiler.verdict()[1], 50 / 4000)
+        self.assertIsNone(profiler.verdict('missing'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.recommendation import DiseaseRecommendationEngine, recommendation_json
+
+class TestPrecomputedRecommendations(unittest.TestCase):
+    """Test precomputed recommendation payloads and their JSON splicing"""
+
+    def test_payload_is_shared_per_severity_band(self):
+        """Test two requests in the same band reuse one precomputed payload"""
+        first = DiseaseRecommendationEngine.get_recommendation('Potato___Early_blight', 0.8)
+        second = DiseaseRecommendationEngine.get_recommendation('Potato___Early_blight', 0.85)
+        self.assertIs(first.precomputed, second.precomputed)
+        self.assertEqual((first['confidence'], second['confidence']), (0.8, 0.85))
+
+    def test_payloads_are_built_on_first_use_and_dropped_on_reload(self):
+        """Test nothing is built at import, a lookup memoizes its band and a reload clears the table"""
+        DiseaseRecommendationEngine.clear_precomputed()
+        self.assertEqual(DiseaseRecommendationEngine._precomputed, {})
+        rec = DiseaseRecommendationEngine.get_recommendation('Tomato___Early_blight', 0.95)
+        self.assertEqual(list(DiseaseRecommendationEngine._precomputed), [('Tomato___Early_blight', 'high')])
+        self.assertIs(rec.precomputed, DiseaseRecommendationEngine.precomputed('Tomato___Early_blight', 'high'))
+        for callback in DiseaseRecommendationEngine.DISEASE_INFO._listeners:
+            callback(DiseaseRecommendationEngine.DISEASE_INFO)
+        self.assertEqual(DiseaseRecommendationEngine._precomputed, {})
+
+    def test_spliced_json_matches_full_encoding(self):
+        """Test the spliced bytes decode to the same object as json.dumps"""
+        for code in DiseaseRecommendationEngine.DISEASE_INFO:
+            for confidence in (0.4, 0.65, 0.8, 0.95):
+                rec = DiseaseRecommendationEngine.get_recommendation(code, confidence)
+                rec['diagnosis_mode'] = 'compact'
+                rec['note'] = 'Pāni "daily"'
+                self.assertEqual(json.loads(recommendation_json(rec)), json.loads(json.dumps(rec)))
+
+    def test_precomputed_fields_are_read_only(self):
+        """Test callers cannot change shared payloads or the knowledge base"""
+        rec = DiseaseRecommendationEngine.get_recommendation('Tomato___Late_blight', 0.9)
+        with self.assertRaises(TypeError):
+            rec['severity'] = 'low'
+        with self.assertRaises(TypeError):
+            rec['treatment']['organic'] = []
+        with self.assertRaises(AttributeError):
+            rec['prevention'].append('Pray')
+        self.assertNotIn('Pray', DiseaseRecommendationEngine.DISEASE_INFO['Tomato___Late_blight']['prevention'])
+
+    def test_unknown_disease_is_plain_dict(self):
+        """Test unknown diseases still serialise through the generic path"""
+        rec = DiseaseRecommendationEngine.get_recommendation('Unknown_Disease', 0.8)
+        self.assertEqual(rec['severity'], 'uncertain')
+        self.assertEqual(json.loads(recommendation_json(rec))['disease_code'], 'Unknown_Disease')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.sweep import AshaScheduler, SweepResults, core_sets, parse_head_units, search_space
+
+class TestAshaScheduler(unittest.TestCase):
+    """Test successive-halving decisions"""
+
+    def test_rungs(self):
+        """Test epoch budgets grow by eta up to the maximum"""
+        self.assertEqual(AshaScheduler([], min_epochs=1, max_epochs=27, eta=3).rungs, [1, 3, 9, 27])
+        self.assertEqual(AshaScheduler([], min_epochs=2, max_epochs=10, eta=3).rungs, [2, 6, 10])
+
+    def test_only_the_top_third_is_promoted(self):
+        """Test weak trials stop at the first rung and the best continue from where they stopped"""
+        scheduler = AshaScheduler(['a', 'b', 'c'], min_epochs=1, max_epochs=3, eta=3)
+        jobs = [scheduler.next_job() for _ in range(3)]
+        self.assertEqual([job[0] for job in jobs], ['a', 'b', 'c'])
+        self.assertIsNone(scheduler.next_job())
+        for trial, score in (('a', 0.5), ('b', 0.9), ('c', 0.7)):
+            scheduler.report(trial, 0, score)
+        self.assertEqual(scheduler.next_job(), ('b', 1, 1, 3))
+        self.assertIsNone(scheduler.next_job())
+        scheduler.report('b', 1, 0.95)
+        self.assertEqual([scheduler.status(t) for t in 'abc'], ['stopped', 'completed', 'stopped'])
+
+    def test_promotion_does_not_wait_for_the_rung(self):
+        """Test a promotion starts as soon as enough trials have reported"""
+        scheduler = AshaScheduler([f"t{i}" for i in range(5)], min_epochs=1, max_epochs=9, eta=3)
+        for _ in range(3):
+            trial, rung, _, _ = scheduler.next_job()
+            scheduler.report(trial, rung, {'t0': 0.2, 't1': 0.8, 't2': 0.4}[trial])
+        self.assertEqual(scheduler.next_job()[:2], ('t1', 1))
+        self.assertEqual(scheduler.next_job()[:2], ('t3', 0))
+
+    def test_failed_trial(self):
+        """Test a trial without a score counts as failed"""
+        scheduler = AshaScheduler(['a'])
+        scheduler.next_job()
+        scheduler.report('a', 0, None)
+        self.assertEqual(scheduler.status('a'), 'failed')
+
+class TestSweepSetup(unittest.TestCase):
+    """Test the search space, core pinning and results table"""
+
+    def test_search_space(self):
+        """Test the full grid and a reproducible random sample of it"""
+        grid = search_space(['resnet50', 'mobilenet'], [1e-3, 1e-4], [32], [(512, 256), ()])
+        self.assertEqual(len(grid), 8)
+        self.assertEqual(len({spec['trial'] for spec in grid}), 8)
+        sample = search_space(['resnet50', 'mobilenet'], [1e-3, 1e-4], [32], [(512, 256), ()], samples=3)
+        self.assertEqual(sample, search_space(['resnet50', 'mobilenet'], [1e-3, 1e-4], [32], [(512, 256), ()], samples=3))
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(parse_head_units('1024,512'), (1024, 512))
+        self.assertEqual(parse_head_units('none'), ())
+
+    def test_core_sets_are_disjoint(self):
+        """Test every core goes to exactly one worker"""
+        sets = core_sets(3, cores=list(range(8)))
+        self.assertEqual([len(s) for s in sets], [3, 3, 2])
+        self.assertEqual(sorted(c for s in sets for c in s), list(range(8)))
+        self.assertEqual(len(core_sets(16, cores=[0, 1])), 2)
+
+    def test_results_table(self):
+        """Test rows accumulate time and sort the longest-trained, most accurate trial first"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            results = SweepResults(Path(temp_dir) / 'results.sqlite3')
+            for spec in search_space(['mobilenet'], [1e-3, 1e-4], [32], [(256,)]):
+                results.add('s1', spec)
+            results.update('s1', 't000', 'running', 1, 0.9, 0.3, seconds=5)
+            results.update('s1', 't001', 'running', 1, 0.6, 0.8, seconds=5)
+            results.update('s1', 't001', 'completed', 3, 0.7, 0.7, seconds=10)
+            results.update('s1', 't000', 'stopped')
+            rows = results.rows('s1')
+            self.assertEqual([row['trial'] for row in rows], ['t001', 't000'])
+            self.assertEqual((rows[0]['seconds'], rows[1]['status']), (15, 'stopped'))
+            self.assertEqual(results.latest_sweep(), 's1')
+            results.db.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
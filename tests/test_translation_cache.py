@@ -0,0 +1,132 @@
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.recommendation import DiseaseRecommendationEngine, localize_recommendation, recommendation_json
+from utils.translation_cache import TranslationCache
+
+def fake_translate(texts, lang):
+    """Deterministic stand-in for the Gemini batch translation"""
+    fake_translate.calls += 1
+    return [f"[{lang}] {text}" for text in texts]
+
+class TestTranslationCache(unittest.TestCase):
+    """Test the persistent content-hash translation cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / 'translations.sqlite3'
+        fake_translate.calls = 0
+        self.cache = TranslationCache(self.path, translate=fake_translate, batch_size=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_miss_returns_english_and_queues_text(self):
+        """Test a miss never calls upstream and leaves the text pending"""
+        value, complete = self.cache.localize({'response': 'Spray neem oil'}, 'hi')
+        self.assertEqual(value, {'response': 'Spray neem oil'})
+        self.assertFalse(complete)
+        self.assertTrue(self.cache.has_pending())
+        self.assertEqual(fake_translate.calls, 0)
+
+    def test_concurrent_lookups_and_stores(self):
+        """Test request threads and the filler can share the in-process layer"""
+        cache = TranslationCache(self.path, translate=fake_translate, memory_entries=8)
+        errors = []
+
+        def work(worker):
+            try:
+                for i in range(200):
+                    text = f"text {worker} {i % 20}"
+                    cache.store('hi', [(text, f"[hi] {text}")])
+                    self.assertEqual(cache.lookup({text}, 'hi'), {text: f"[hi] {text}"})
+                    cache.lookup({f"new {worker} {i}"}, 'te')
+                    cache.has_pending()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_fill_pending_then_hit(self):
+        """Test queued texts are translated in batches and then served from the cache"""
+        self.cache.localize(['Spray neem oil', 'Remove leaves', 'Water early'], 'hi')
+        self.assertEqual(self.cache.fill_pending(), 3)
+        self.assertEqual(fake_translate.calls, 2)
+
+        value, complete = self.cache.localize(['Spray neem oil', 'Remove leaves', 'Water early'], 'hi')
+        self.assertTrue(complete)
+        self.assertEqual(value[0], '[hi] Spray neem oil')
+        self.assertFalse(self.cache.has_pending())
+
+    def test_text_without_letters_is_not_translated(self):
+        """Test doses and ratios pass through unchanged"""
+        value, complete = self.cache.localize({'npk': '19-19-19', 'loss': '30-70%'}, 'te')
+        self.assertTrue(complete)
+        self.assertEqual(value, {'npk': '19-19-19', 'loss': '30-70%'})
+
+    def test_skip_keys_are_left_alone(self):
+        """Test codes for clients keep their value"""
+        self.cache.store('ta', [('high', 'உயர்')])
+        value, _ = self.cache.localize({'severity': 'high', 'label': 'high'}, 'ta', skip_keys=('severity',))
+        self.assertEqual(value, {'severity': 'high', 'label': 'உயர்'})
+
+    def test_translations_persist_across_instances(self):
+        """Test a new process reads translations stored by another"""
+        self.cache.warm(['Rotate crops every season'], 'kn')
+        reopened = TranslationCache(self.path)
+        self.assertEqual(reopened.lookup(['Rotate crops every season'], 'kn'),
+                         {'Rotate crops every season': '[kn] Rotate crops every season'})
+        self.assertEqual(reopened.lookup(['Rotate crops every season'], 'mr'), {})
+
+class TestLocalizedRecommendations(unittest.TestCase):
+    """Test engine recommendations served from the translation cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = TranslationCache(Path(self.temp_dir) / 'translations.sqlite3', translate=fake_translate)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_localized_recommendation_keeps_request_fields(self):
+        """Test translated text, untouched codes and the caller's confidence"""
+        rec = DiseaseRecommendationEngine.get_recommendation('Tomato___Early_blight', 0.8)
+        rec['diagnosis_mode'] = 'compact'
+        english, complete = localize_recommendation(rec, 'hi', self.cache)
+        self.assertFalse(complete)
+        self.assertEqual(english['description'], rec['description'])
+
+        self.cache.fill_pending()
+        localized, complete = localize_recommendation(rec, 'hi', self.cache)
+        self.assertTrue(complete)
+        self.assertEqual(localized['description'], f"[hi] {rec['description']}")
+        self.assertEqual(localized['disease_code'], 'Tomato___Early_blight')
+        self.assertEqual(localized['severity'], rec['severity'])
+        self.assertEqual((localized['confidence'], localized['diagnosis_mode']), (0.8, 'compact'))
+        self.assertEqual(json.loads(recommendation_json(localized)), json.loads(json.dumps(localized)))
+
+    def test_complete_translation_is_memoised(self):
+        """Test later requests reuse the translated payload"""
+        rec = DiseaseRecommendationEngine.get_recommendation('Potato___Late_blight', 0.9)
+        localize_recommendation(rec, 'te', self.cache)
+        self.cache.fill_pending()
+        first, _ = localize_recommendation(rec, 'te', self.cache)
+        second, _ = localize_recommendation(DiseaseRecommendationEngine.get_recommendation('Potato___Late_blight', 0.95), 'te', self.cache)
+        self.assertIs(first.precomputed, second.precomputed)
+        self.assertEqual(second['confidence'], 0.95)
+
+if __name__ == '__main__':
+    unittest.main()
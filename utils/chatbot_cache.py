@@ -0,0 +1,244 @@
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+try:
+    from scipy.sparse import vstack
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:  # exact-match caching still works without scikit-learn
+    TfidfVectorizer = None
+
+# Words that change the answer. Character n-grams rate "potato early blight" close to
+# "tomato early blight", so a similar question is only served when these agree exactly.
+KEY_TERMS = {
+    # Crops
+    'tomato': ('tomato', 'tomatoes'),
+    'potato': ('potato', 'potatoes', 'aloo'),
+    'pepper': ('pepper', 'peppers', 'capsicum'),
+    'chilli': ('chilli', 'chillies', 'chili', 'chilies'),
+    'brinjal': ('brinjal', 'eggplant', 'baingan'),
+    'okra': ('okra', 'bhindi'),
+    'onion': ('onion', 'onions'),
+    'cabbage': ('cabbage',),
+    'cauliflower': ('cauliflower',),
+    'rice': ('rice', 'paddy'),
+    'wheat': ('wheat',),
+    'maize': ('maize', 'corn'),
+    'cotton': ('cotton',),
+    'sugarcane': ('sugarcane',),
+    'groundnut': ('groundnut', 'peanut'),
+    'soybean': ('soybean', 'soya'),
+    'banana': ('banana',),
+    'mango': ('mango',),
+    # Diseases, pests and symptoms
+    'early': ('early',),
+    'late': ('late',),
+    'blight': ('blight',),
+    'bacterial': ('bacterial', 'bacteria'),
+    'fungal': ('fungal', 'fungus'),
+    'viral': ('viral', 'virus'),
+    'spot': ('spot', 'spots'),
+    'mosaic': ('mosaic',),
+    'curl': ('curl', 'curling'),
+    'wilt': ('wilt', 'wilting'),
+    'rot': ('rot', 'rotting'),
+    'rust': ('rust',),
+    'powdery': ('powdery',),
+    'downy': ('downy',),
+    'mildew': ('mildew',),
+    'mold': ('mold', 'mould'),
+    'scab': ('scab',),
+    'canker': ('canker',),
+    'anthracnose': ('anthracnose',),
+    'healthy': ('healthy',),
+    'aphid': ('aphid', 'aphids'),
+    'whitefly': ('whitefly', 'whiteflies'),
+    'thrips': ('thrips',),
+    'borer': ('borer', 'borers'),
+    'mite': ('mite', 'mites'),
+    'nematode': ('nematode', 'nematodes'),
+    'yellow': ('yellow', 'yellowing'),
+    'brown': ('brown', 'browning'),
+    'black': ('black',),
+    'white': ('white',),
+    # Fertilisers and products
+    'urea': ('urea',),
+    'dap': ('dap',),
+    'potash': ('potash', 'mop'),
+    'npk': ('npk',),
+    'ssp': ('ssp',),
+    'zinc': ('zinc',),
+    'boron': ('boron',),
+    'calcium': ('calcium',),
+    'magnesium': ('magnesium',),
+    'sulphur': ('sulphur', 'sulfur'),
+    'gypsum': ('gypsum',),
+    'lime': ('lime',),
+    'compost': ('compost', 'vermicompost'),
+    'manure': ('manure',),
+    'neem': ('neem',),
+    'mancozeb': ('mancozeb',),
+    'copper': ('copper',),
+    'chlorothalonil': ('chlorothalonil',),
+    'carbendazim': ('carbendazim',),
+    'metalaxyl': ('metalaxyl',),
+    'imidacloprid': ('imidacloprid',),
+    'streptocycline': ('streptocycline',),
+    'trichoderma': ('trichoderma',),
+    # Methods and what is being asked
+    'organic': ('organic', 'organically', 'natural', 'naturally'),
+    'chemical': ('chemical', 'chemically', 'pesticide', 'fungicide'),
+    'biological': ('biological', 'biologically'),
+    'prevent': ('prevent', 'prevention', 'avoid', 'protect'),
+    'treat': ('treat', 'treatment', 'cure', 'control', 'manage'),
+    'buy': ('buy', 'purchase'),
+    'price': ('price', 'cost'),
+    'dose': ('dose', 'dosage', 'quantity'),
+}
+_KEY_TERM_OF = {word: term for term, words in KEY_TERMS.items() for word in words}
+
+# Fitted index of one language's questions; replaced as a whole, never changed in place
+QuestionIndex = namedtuple('QuestionIndex', 'vectorizer matrix keys terms appended')
+
+
+def normalize_question(text):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def key_terms(question):
+    """The crop, disease, product, method and number words of a normalised question"""
+    return frozenset(word if word.isdigit() else _KEY_TERM_OF[word]
+                     for word in question.split() if word.isdigit() or word in _KEY_TERM_OF)
+
+
+class ChatbotAnswerCache:
+    """LRU + TTL answer cache with TF-IDF nearest-neighbour fallback"""
+
+    def __init__(self, ttl=86400, max_entries=1000, similarity_threshold=0.75):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (question, lang) -> (answer, stored_at)
+        self._lock = threading.Lock()
+        self._index = {}  # lang -> QuestionIndex; new questions are appended, refits happen outside the lock
+        self._version = 0  # bumped by every store, so a refit started before one is not installed
+        self._counters = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0,
+                          'stores': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, question, lang='en'):
+        """Return a cached answer for the question, or None"""
+        key = (normalize_question(question), lang)
+        refit_keys = None
+        with self._lock:
+            answer = self._lookup(key)
+            if answer is not None:
+                self._counters['exact_hits'] += 1
+                return answer
+            index = self._index.get(lang)
+            if TfidfVectorizer is not None and key[0] and self._needs_refit(index):
+                refit_keys = [k for k in self._entries if k[1] == lang]
+                version = self._version
+
+        if refit_keys is not None:
+            # Fitting is the slow part (up to max_entries questions), so other requests are not held up
+            index = self._fit(refit_keys) if refit_keys else None
+            with self._lock:
+                if self._version == version:
+                    self._index[lang] = index
+        candidates = self._similar(index, key[0])
+
+        with self._lock:
+            for similar_key in candidates:
+                answer = self._lookup(similar_key)
+                if answer is not None:
+                    self._counters['similar_hits'] += 1
+                    return answer
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, question, answer, lang='en'):
+        key = (normalize_question(question), lang)
+        if not key[0]:
+            return
+        with self._lock:
+            is_new = key not in self._entries
+            self._entries[key] = (answer, time.time())
+            self._entries.move_to_end(key)
+            self._counters['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+            self._version += 1
+            index = self._index.get(lang)
+            if index is not None and is_new:
+                # One transform with the fitted vocabulary; evicted rows stay until the next refit
+                self._index[lang] = index._replace(
+                    matrix=vstack([index.matrix, index.vectorizer.transform([key[0]])], format='csr'),
+                    keys=index.keys + [key],
+                    terms=index.terms + [key_terms(key[0])],
+                    appended=index.appended + 1,
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._version += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self._counters['exact_hits'] + self._counters['similar_hits']
+            lookups = hits + self._counters['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'similarity_threshold': self.similarity_threshold,
+                'semantic_fallback': TfidfVectorizer is not None,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                **self._counters
+            }
+
+    def _lookup(self, key):
+        """Fetch a live entry and refresh its LRU position (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        answer, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            self._counters['expirations'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return answer
+
+    def _needs_refit(self, index):
+        """True when there is no index yet or over a quarter of its rows were appended after the fit
+
+        Appended rows only use n-grams the fit saw, so the vocabulary is refreshed as the
+        cache grows; with a large cache that is one refit per few hundred stores.
+        """
+        if index is None:
+            return True
+        return index.appended > (len(index.keys) - index.appended) // 4
+
+    @staticmethod
+    def _fit(keys):
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), sublinear_tf=True)
+        matrix = vectorizer.fit_transform([k[0] for k in keys])
+        return QuestionIndex(vectorizer, matrix, list(keys), [key_terms(k[0]) for k in keys], 0)
+
+    def _similar(self, index, question):
+        """Cached keys above the threshold with the same key terms, most similar first"""
+        if index is None or not question:
+            return []
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        scores = (index.matrix @ index.vectorizer.transform([question]).T).toarray().ravel()
+        above = np.flatnonzero(scores >= self.similarity_threshold)
+        terms = key_terms(question)
+        return [index.keys[i] for i in above[np.argsort(-scores[above])] if index.terms[i] == terms]
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+def confidence_fraction(confidence):
+    """Gemini reports 0-100 or 0-1; return 0-1"""
+    confidence = float(confidence or 0)
+    return confidence / 100 if confidence > 1 else confidence
+
+
+class DiagnosisLog:
+    """Append-only JSON-lines record of diagnosed uploads and their labels
+
+    One line per successful diagnosis (``image_filename``, ``disease``,
+    ``confidence``, ``mode``), written under a lock with a single ``write``
+    so concurrent workers never interleave lines. A user confirming or
+    correcting a diagnosis adds a line with ``confirmed: true``. Training
+    jobs read it to reuse these labels for the photos kept in the upload
+    folder.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, **record):
+        record.setdefault('timestamp', time.time())
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def entries(self):
+        """Every record, oldest first; a torn last line (crash mid-write) is skipped"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def latest(self, image_filename):
+        """The most recent record for one upload, or None"""
+        found = None
+        for record in self.entries():
+            if record.get('image_filename') == image_filename:
+                found = record
+        return found
+
+    def confirm(self, image_filename, disease):
+        """Record a user's confirmed (or corrected) label for an upload"""
+        self.append(image_filename=image_filename, disease=disease, confirmed=True)
+
+    def confirmed_uploads(self, upload_dir, labels, since=0.0):
+        """[(image path, canonical label, timestamp)] for uploads confirmed after ``since``
+
+        Only user confirmations count; the latest one wins when an image was
+        confirmed more than once.
+        """
+        latest = {}
+        for record in self.entries():
+            if not record.get('confirmed'):
+                continue
+            label = labels.get(record.get('disease'))
+            if label is not None and record.get('timestamp', 0) > since:
+                latest[record['image_filename']] = (label, record['timestamp'])
+        return [(os.path.join(upload_dir, name), label, timestamp) for name, (label, timestamp) in sorted(latest.items())
+                if os.path.exists(os.path.join(upload_dir, name))]
+
+    def labelled_uploads(self, upload_dir, labels, min_confidence=0.0):
+        """[(image path, canonical label)] for logged uploads still on disk
+
+        ``labels`` is a DiseaseLabelRegistry; records with an unknown label or
+        a confidence below ``min_confidence`` (0-1) are left out, and user
+        confirmations count as certain. The latest
+        record wins when an image was logged more than once.
+        """
+        latest = {}
+        for record in self.entries():
+            label = labels.get(record.get('disease'))
+            confidence = 1.0 if record.get('confirmed') else confidence_fraction(record.get('confidence'))
+            if label is None or confidence < min_confidence:
+                latest.pop(record.get('image_filename'), None)
+                continue
+            latest[record['image_filename']] = label
+        return [(os.path.join(upload_dir, name), label) for name, label in sorted(latest.items())
+                if os.path.exists(os.path.join(upload_dir, name))]
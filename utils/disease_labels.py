@@ -0,0 +1,87 @@
+import re
+
+from config.config import Config
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+# Other names used for a crop by farmers, Gemini and dataset folders
+CROP_SYNONYMS = {
+    'Pepper_bell': ('Bell pepper', 'Pepper', 'Capsicum'),
+}
+
+
+def normalize_label(label):
+    """'Pepper__bell___Bacterial_spot' / 'Pepper bell - Bacterial spot' -> 'pepperbellbacterialspot'"""
+    return _NON_ALNUM_RE.sub('', label.lower())
+
+
+def display_name(label):
+    """'Tomato___Early_blight' -> 'Tomato - Early blight'"""
+    return label.replace('___', ' - ').replace('_', ' ')
+
+
+class DiseaseLabelRegistry:
+    """Canonical disease labels plus a hash index of every spelling of each one
+
+    Canonical labels are ``Config.DISEASE_CLASSES`` (the DISEASE_INFO keys).
+    The index covers case, underscore and spacing variants, display names,
+    crop synonyms and the names in a model's class_indices.json, so a lookup
+    is one normalisation and one dict probe. Building the index fails if two
+    labels would share a key, so a lookup can never land on the wrong disease.
+    """
+
+    def __init__(self, labels, crop_synonyms=None):
+        self.labels = list(labels)
+        self._index = {}   # normalised alias -> canonical label
+        self._exact = {}   # alias exactly as registered -> canonical label, checked first
+        for label in self.labels:
+            self._add(label, label)
+            crop, _, condition = label.partition('___')
+            for synonym in (crop_synonyms or {}).get(crop, ()):
+                self._add(f"{synonym} {condition}", label)
+
+    def _add(self, alias, label):
+        key = normalize_label(alias)
+        existing = self._index.setdefault(key, label)
+        if existing != label:
+            raise ValueError(f"Disease alias {alias!r} is ambiguous between {existing} and {label}")
+        self._exact[alias] = label
+
+    def add_alias(self, alias, label):
+        """Register another spelling for a label that is already known"""
+        self._add(alias, self[label])
+
+    def get(self, label, default=None):
+        """Canonical label for any known spelling, or ``default``"""
+        if not label:
+            return default
+        canonical = self._exact.get(label)
+        if canonical is not None:
+            return canonical
+        return self._index.get(normalize_label(label), default)
+
+    def __getitem__(self, label):
+        canonical = self.get(label)
+        if canonical is None:
+            raise KeyError(f"Unknown disease label: {label!r}")
+        return canonical
+
+    def __contains__(self, label):
+        return self.get(label) is not None
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def from_class_indices(self, class_indices):
+        """Canonical label for each model output index; raises KeyError on an unknown class"""
+        names = [None] * len(class_indices)
+        for name, index in class_indices.items():
+            names[index] = self[name]
+        return names
+
+
+# Shared by the predictor, the web app and the recommendation engine
+disease_labels = DiseaseLabelRegistry(Config.DISEASE_CLASSES, CROP_SYNONYMS)
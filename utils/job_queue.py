@@ -0,0 +1,178 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised when a job queue has no room for more pending work"""
+
+
+def sse_event(event, data):
+    """Format one server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Job:
+    """A unit of background work and the events it has published"""
+
+    FINISHED_STATES = ('done', 'failed')
+
+    def __init__(self, queue_name):
+        self.id = uuid.uuid4().hex
+        self.queue_name = queue_name
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATES
+
+    def publish(self, event, data=None):
+        """Append an event and wake any waiting listeners"""
+        with self._cond:
+            self.events.append((event, data))
+            self._cond.notify_all()
+
+    def start(self):
+        self.started_at = time.time()
+        self.status = 'running'
+        self.publish('status', {'status': 'running'})
+
+    def finish(self, result):
+        self.result = result
+        self.finished_at = time.time()
+        self.status = 'done'
+        self.publish('done', result)
+
+    def fail(self, error):
+        self.error = error
+        self.finished_at = time.time()
+        self.status = 'failed'
+        self.publish('failed', {'error': error})
+
+    def wait_events(self, since=0, timeout=15.0):
+        """Return events published after index `since`, blocking up to `timeout` seconds"""
+        with self._cond:
+            if len(self.events) <= since and not self.finished:
+                self._cond.wait(timeout)
+            return self.events[since:]
+
+    def iter_events(self, keepalive=15.0):
+        """Yield SSE frames until the job finishes; emits comments as keep-alives"""
+        sent = 0
+        while True:
+            events = self.wait_events(sent, timeout=keepalive)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event, data in events:
+                yield sse_event(event, data)
+            sent += len(events)
+            if self.finished and sent >= len(self.events):
+                return
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'queue': self.queue_name,
+            'status': self.status,
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            'finished_at': datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """Bounded worker pool that runs jobs off the request thread"""
+
+    def __init__(self, name, workers=4, max_pending=32, ttl=600):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._counters = {'submitted': 0, 'rejected': 0, 'done': 0, 'failed': 0}
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"{self.name}-worker-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue `fn(job, *args, **kwargs)`; raises QueueFullError when saturated"""
+        job = Job(self.name)
+        # Published before a worker can see the job, so 'running' never precedes 'queued'
+        job.publish('status', {'status': 'queued'})
+        with self._lock:
+            self._ensure_workers()
+            self._prune()
+            try:
+                self._queue.put_nowait((job, fn, args, kwargs))
+            except queue.Full:
+                self._counters['rejected'] += 1
+                raise QueueFullError(f"{self.name} queue is full ({self.max_pending} pending)")
+            self._jobs[job.id] = job
+            self._counters['submitted'] += 1
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == 'running')
+            return {
+                'queue': self.name,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._queue.qsize(),
+                'running': running,
+                'tracked_jobs': len(self._jobs),
+                **self._counters
+            }
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (caller holds the lock)"""
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            job, fn, args, kwargs = self._queue.get()
+            job.start()
+            try:
+                job.finish(fn(job, *args, **kwargs))
+                outcome = 'done'
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                job.fail(str(e))
+                outcome = 'failed'
+            finally:
+                self._queue.task_done()
+            with self._lock:
+                self._counters[outcome] += 1
@@ -0,0 +1,165 @@
+import json
+
+
+def extract_json_text(text):
+    """Strip markdown code fences and surrounding prose from a model reply"""
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json", 1)[1]
+        text = text.split("```", 1)[0] if "```" in text else text
+    elif "```" in text:
+        text = text.split("```", 1)[1]
+        text = text.split("```", 1)[0] if "```" in text else text
+    text = text.strip()
+    start = text.find('{')
+    return text[start:] if start > 0 else text
+
+
+def _scan(text):
+    """Return (open bracket closers, inside_string, comma positions outside strings)"""
+    closers = []
+    commas = []
+    in_string = False
+    escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            closers.append('}')
+        elif ch == '[':
+            closers.append(']')
+        elif ch in '}]' and closers:
+            closers.pop()
+        elif ch == ',':
+            commas.append(i)
+    return closers, in_string, commas
+
+
+def repair_truncated_json(text, max_attempts=8):
+    """Best-effort repair of a reply cut off mid-object; returns the parsed value or None
+
+    First closes any open string and brackets as-is, then retries after
+    cutting the text back to each earlier comma, dropping the partial field.
+    """
+    closers, in_string, commas = _scan(text)
+    candidates = [text + ('"' if in_string else '') + ''.join(reversed(closers))]
+    for position in reversed(commas[-max_attempts:]):
+        prefix = text[:position]
+        prefix_closers, prefix_in_string, _ = _scan(prefix)
+        if not prefix_in_string:
+            candidates.append(prefix + ''.join(reversed(prefix_closers)))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def parse_model_json(text):
+    """Parse a model's JSON reply; returns (value, repaired) or raises json.JSONDecodeError"""
+    body = extract_json_text(text)
+    try:
+        return json.loads(body), False
+    except json.JSONDecodeError:
+        value = repair_truncated_json(body)
+        if value is None:
+            raise
+        return value, True
+
+
+def invalid_fields(value, fields):
+    """Names in ``fields`` that ``value`` lacks or holds with the wrong type
+
+    ``fields`` maps a key to a type or tuple of types; ``[str]`` means a list
+    of strings. Booleans only pass where ``bool`` is asked for.
+    """
+    invalid = []
+    for name, expected in fields.items():
+        item = value.get(name)
+        if isinstance(expected, list):
+            ok = isinstance(item, list) and all(isinstance(element, expected[0]) for element in item)
+        else:
+            types = expected if isinstance(expected, tuple) else (expected,)
+            ok = isinstance(item, types) and (bool in types or not isinstance(item, bool))
+        if not ok:
+            invalid.append(name)
+    return invalid
+
+
+class IncrementalObjectParser:
+    """Yield the top-level members of a streamed JSON object as soon as each one closes
+
+    Text before the opening brace (prose, a ```json fence) is skipped. A
+    member is decoded on its own once the scanner reaches the comma or brace
+    that ends it, and consumed text is dropped, so the work is linear in the
+    length of the reply however it is chunked.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self.done = False
+
+    def feed(self, chunk):
+        """Consume more text; returns [(key, value)] for the members it completed"""
+        self._buffer += chunk
+        text = self._buffer
+        members = []
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            ch = text[i]
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                    self._member_start = i + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[self._member_start:i], members)
+                    self.done = True
+            elif ch == ',' and self._depth == 1:
+                self._emit(text[self._member_start:i], members)
+                self._member_start = i + 1
+
+        if self._member_start:
+            self._buffer = text[self._member_start:]
+            self._member_start = 0
+        else:
+            self._buffer = text if self._depth else ''
+        self._pos = len(self._buffer)
+        return members
+
+    @staticmethod
+    def _emit(member, members):
+        member = member.strip()
+        if not member:
+            return
+        try:
+            members.extend(json.loads('{' + member + '}').items())
+        except json.JSONDecodeError:
+            pass  # Malformed member; the full-reply parse decides what to do with it
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+def crop_of(disease_code):
+    """'Pepper_bell___healthy' -> 'Pepper_bell'"""
+    return disease_code.partition('___')[0]
+
+
+def index_crop_file(path):
+    """{disease_code: [offset, length]} for a JSON-lines crop file; parses every line"""
+    offsets = {}
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                offsets[json.loads(line)['code']] = [offset, len(line)]
+            offset += len(line)
+    return offsets
+
+
+class _Snapshot:
+    """One loaded manifest: version, files and the byte offset of every entry"""
+
+    __slots__ = ('version', 'files', 'offsets', 'stamp')
+
+    def __init__(self, version, files, offsets, stamp):
+        self.version = version
+        self.files = files        # crop -> Path of its JSON-lines file
+        self.offsets = offsets    # disease_code -> (crop, offset, length)
+        self.stamp = stamp        # (mtime_ns, size) of the manifest it came from
+
+
+class KnowledgeBase(Mapping):
+    """Disease knowledge base stored as versioned JSON-lines files, one per crop
+
+    Only the manifest (version plus the byte offset of each entry) is read up
+    front. Each lookup seeks to one line of one crop file and parses just that
+    entry, so import time and resident memory do not grow with the number of
+    diseases. Callers get a fresh dict on every lookup.
+
+    ``maybe_reload`` re-reads the manifest when it has changed on disk (checked
+    at most every ``reload_interval`` seconds) and then calls the listeners
+    registered with ``on_reload``, so edits ship without a restart.
+    """
+
+    def __init__(self, directory, reload_interval=30.0):
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._snapshot = self._load()
+        self._checked_at = time.monotonic()
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def _manifest_stamp(self):
+        stat = (self.directory / MANIFEST_NAME).stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        stamp = self._manifest_stamp()
+        with open(self.directory / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported knowledge base format: {manifest.get('format')}")
+
+        files = {}
+        offsets = {}
+        for crop, spec in manifest['crops'].items():
+            files[crop] = self.directory / spec['file']
+            for code, (offset, length) in spec['entries'].items():
+                offsets[code] = (crop, offset, length)
+        return _Snapshot(manifest['version'], files, offsets, stamp)
+
+    # -- Mapping interface -------------------------------------------------
+
+    def __getitem__(self, disease_code):
+        snapshot = self._snapshot
+        crop, offset, length = snapshot.offsets[disease_code]
+        entry = self._read(snapshot.files[crop], offset, length)
+        if entry is None or entry.get('code') != disease_code:
+            # The crop file was edited without re-indexing; rebuild its offsets
+            print(f"⚠️ Knowledge base index is stale for {crop}, re-indexing")
+            entry = self._reindex_and_read(snapshot, crop, disease_code)
+        entry.pop('code', None)
+        return entry
+
+    def __iter__(self):
+        return iter(self._snapshot.offsets)
+
+    def __len__(self):
+        return len(self._snapshot.offsets)
+
+    def __contains__(self, disease_code):
+        return disease_code in self._snapshot.offsets
+
+    def codes_for_crop(self, crop):
+        return [code for code, (entry_crop, _, _) in self._snapshot.offsets.items() if entry_crop == crop]
+
+    @staticmethod
+    def _read(path, offset, length):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            line = f.read(length)
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _reindex_and_read(self, snapshot, crop, disease_code):
+        path = snapshot.files[crop]
+        with self._lock:
+            fresh = index_crop_file(path)
+            for code, (offset, length) in fresh.items():
+                snapshot.offsets[code] = (crop, offset, length)
+        if disease_code not in fresh:
+            raise KeyError(disease_code)
+        offset, length = fresh[disease_code]
+        return self._read(path, offset, length)
+
+    # -- Reloading ---------------------------------------------------------
+
+    def on_reload(self, callback):
+        """Call ``callback(knowledge_base)`` after every successful reload"""
+        self._listeners.append(callback)
+
+    def reload(self):
+        """Re-read the manifest now; returns True when the version or index changed"""
+        with self._lock:
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Knowledge base reload failed, keeping version {self.version}: {e}")
+                return False
+            changed = snapshot.stamp != self._snapshot.stamp
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        if changed:
+            print(f"📚 Knowledge base reloaded: version {snapshot.version}, {len(snapshot.offsets)} diseases")
+            for callback in self._listeners:
+                callback(self)
+        return changed
+
+    def maybe_reload(self):
+        """Reload if the manifest changed on disk; cheap enough to call on every request"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        try:
+            if self._manifest_stamp() == self._snapshot.stamp:
+                return False
+        except OSError:
+            return False
+        return self.reload()
+
+
+def write_knowledge_base(entries, directory, version=None):
+    """Write ``{disease_code: info}`` as per-crop JSON-lines files plus an offset manifest
+
+    Files are written to temporary names and swapped in, manifest last, so a
+    running server never reads a half-written knowledge base.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    by_crop = {}
+    for code, info in entries.items():
+        by_crop.setdefault(crop_of(code), []).append((code, info))
+
+    crops = {}
+    for crop, crop_entries in sorted(by_crop.items()):
+        filename = f"{crop.lower()}.jsonl"
+        index = {}
+        lines = []
+        offset = 0
+        for code, info in crop_entries:
+            line = (json.dumps({'code': code, **info}, ensure_ascii=False) + '\n').encode('utf-8')
+            index[code] = [offset, len(line)]
+            lines.append(line)
+            offset += len(line)
+        temp = directory / f".{filename}.tmp"
+        temp.write_bytes(b''.join(lines))
+        os.replace(temp, directory / filename)
+        crops[crop] = {'file': filename, 'entries': index}
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'version': version or datetime.now().strftime('%Y.%m.%d.%H%M%S'),
+        'crops': crops
+    }
+    temp = directory / f".{MANIFEST_NAME}.tmp"
+    temp.write_text(json.dumps(manifest, indent=2) + '\n', encoding='utf-8')
+    os.replace(temp, directory / MANIFEST_NAME)
+    return manifest
+
+
+def reindex(directory, version=None):
+    """Rebuild the manifest offsets after the crop files were edited by hand"""
+    directory = Path(directory)
+    entries = {}
+    for path in sorted(directory.glob('*.jsonl')):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    info = json.loads(line)
+                    entries[info.pop('code')] = info
+    return write_knowledge_base(entries, directory, version)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintain the disease knowledge base files')
+    parser.add_argument('command', choices=['reindex', 'show'])
+    parser.add_argument('--dir', default=str(Config.KNOWLEDGE_DIR))
+    parser.add_argument('--version', help='Version to stamp (default: current timestamp)')
+    args = parser.parse_args()
+
+    if args.command == 'reindex':
+        manifest = reindex(args.dir, args.version)
+        total = sum(len(spec['entries']) for spec in manifest['crops'].values())
+        print(f"✅ Knowledge base {manifest['version']}: {total} diseases in {len(manifest['crops'])} crop files")
+    else:
+        kb = KnowledgeBase(args.dir)
+        print(f"Knowledge base {kb.version} ({len(kb)} diseases)")
+        for code in kb:
+            print(f"  {code}")
@@ -0,0 +1,184 @@
+import math
+import re
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = {
+    'a', 'an', 'the', 'i', 'me', 'my', 'you', 'your', 'is', 'are', 'am', 'do', 'does',
+    'can', 'could', 'please', 'to', 'of', 'for', 'in', 'on', 'and', 'or', 'it', 'this',
+    'that', 'what', 'how', 'with', 'about', 'should', 'will', 'be', 'at', 'from', 'by'
+}
+
+# Question words that select sections of a disease entry
+SECTION_KEYWORDS = {
+    'symptoms': {'symptom', 'sign', 'identify', 'recogni', 'look'},
+    'organic': {'organic', 'natural', 'neem', 'home', 'non', 'bio'},
+    'chemical': {'chemical', 'fungicide', 'pesticide', 'bactericide', 'spray'},
+    'treatment': {'treat', 'treatment', 'cure', 'control', 'manage', 'remedy', 'medicine', 'kill'},
+    'prevention': {'prevent', 'prevention', 'avoid', 'protect', 'stop'},
+    'fertilizer': {'fertilizer', 'fertiliser', 'npk', 'nutrient', 'manure', 'feed'},
+}
+
+SECTION_TITLES = {
+    'description': 'About',
+    'symptoms': 'Symptoms',
+    'organic': 'Organic treatment',
+    'chemical': 'Chemical treatment',
+    'prevention': 'Prevention',
+    'fertilizer': 'Fertilizer',
+}
+
+
+def stem(token):
+    """Very light suffix stripping so 'organically' finds 'organic' and 'sprays' finds 'spray'"""
+    for suffix, replacement in (('ically', 'ic'), ('ation', ''), ('ing', ''), ('ed', ''), ('ly', ''), ('es', ''), ('s', '')):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def tokenize(text):
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def split_disease_code(disease_code):
+    """'Pepper_bell___Bacterial_spot' -> ('pepper bell', 'bacterial spot')"""
+    crop, _, condition = disease_code.partition('___')
+    return crop.replace('_', ' ').lower(), condition.replace('_', ' ').lower()
+
+
+class KnowledgeBaseIndex:
+    """BM25 inverted index over the disease knowledge base, one document per section"""
+
+    def __init__(self, disease_info, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.disease_info = disease_info
+        self.documents = []   # (disease_code, section, text)
+        self.postings = {}    # term -> list of (doc_id, term_frequency)
+        self.doc_lengths = []
+
+        for disease_code, info in disease_info.items():
+            for section, text in self._sections(info):
+                self._add(disease_code, section, text)
+
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        total = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        self._aliases = self._build_aliases()
+        self._topic_terms = set().union(*(crop | condition for crop, condition in self._aliases.values()))
+
+    @staticmethod
+    def _sections(info):
+        yield 'description', info['description']
+        yield 'symptoms', '\n'.join(info['symptoms'])
+        yield 'organic', '\n'.join(info['treatment']['organic'])
+        if info['treatment']['chemical']:
+            yield 'chemical', '\n'.join(info['treatment']['chemical'])
+        yield 'prevention', '\n'.join(info['prevention'])
+        yield 'fertilizer', info['fertilizer']
+
+    def _add(self, disease_code, section, text):
+        crop, condition = split_disease_code(disease_code)
+        # Crop, condition and section names are indexed with the content so "potato late blight spray" ranks well
+        section_terms = ' '.join(SECTION_KEYWORDS.get(section, ()))
+        if section in ('organic', 'chemical'):
+            section_terms += ' treat treatment cure control'
+        terms = tokenize(f"{crop} {condition} {section} {section_terms} {text}")
+
+        doc_id = len(self.documents)
+        self.documents.append((disease_code, section, text))
+        self.doc_lengths.append(len(terms))
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, tf in frequencies.items():
+            self.postings.setdefault(term, []).append((doc_id, tf))
+
+    def _build_aliases(self):
+        """(crop tokens, condition tokens) per disease for exact disease detection"""
+        aliases = {}
+        for disease_code in self.disease_info:
+            crop, condition = split_disease_code(disease_code)
+            aliases[disease_code] = (set(tokenize(crop)), set(tokenize(condition)))
+        return aliases
+
+    def search(self, query, top_k=5):
+        """Return [(score, disease_code, section, text)] ranked by BM25"""
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(round(score, 3), *self.documents[doc_id]) for doc_id, score in ranked]
+
+    def detect_disease(self, query):
+        """Disease code whose crop and condition are both named in the query, or None"""
+        terms = set(tokenize(query))
+        matches = [code for code, (crop, condition) in self._aliases.items()
+                   if crop & terms and condition <= terms]
+        return matches[0] if len(matches) == 1 else None
+
+    @staticmethod
+    def detect_sections(query):
+        """Knowledge-base sections the question asks about, in display order"""
+        terms = set(tokenize(query))
+        wanted = [section for section, keywords in SECTION_KEYWORDS.items()
+                  if any(term.startswith(keyword) for term in terms for keyword in keywords)]
+        if 'non' in terms and 'chemical' in wanted:
+            wanted.remove('chemical')  # "non-chemical" means organic
+        if 'treatment' in wanted:
+            wanted.remove('treatment')
+            if 'organic' not in wanted and 'chemical' not in wanted:
+                wanted += ['organic', 'chemical']
+        return wanted
+
+    def answer(self, query):
+        """Answer a disease-specific question straight from the knowledge base, or None"""
+        disease_code = self.detect_disease(query)
+        sections = self.detect_sections(query)
+        if disease_code is None or not sections:
+            return None
+
+        info = self.disease_info[disease_code]
+        crop, condition = split_disease_code(disease_code)
+        lines = [f"🌱 {crop.title()} - {condition.capitalize()}"]
+        used = []
+        for section, text in self._sections(info):
+            if section in sections:
+                used.append(section)
+                items = text.split('\n')
+                lines.append(f"\n{SECTION_TITLES[section]}:")
+                lines.extend(f"• {item}" for item in items)
+        if not used:
+            return None
+
+        lines.append("\n📸 Upload a leaf photo on the /upload page to confirm the diagnosis.")
+        return {'response': '\n'.join(lines), 'disease_code': disease_code, 'sections': used}
+
+    def is_on_topic(self, query):
+        """True when the question names a crop, a disease or a knowledge-base section"""
+        return bool(self._topic_terms & set(tokenize(query))) or bool(self.detect_sections(query))
+
+    def snippets(self, query, top_k=4, max_chars=300, min_score=2.0):
+        """Short reference notes for grounding a generated answer; empty when off-topic"""
+        if not self.is_on_topic(query):
+            return []
+        notes = []
+        for score, disease_code, section, text in self.search(query, top_k):
+            if score < min_score:
+                break
+            crop, condition = split_disease_code(disease_code)
+            content = text.replace('\n', '; ')
+            if len(content) > max_chars:
+                content = content[:max_chars - 1] + '…'
+            notes.append(f"[{crop.title()} - {condition} / {SECTION_TITLES[section]}] {content}")
+        return notes
@@ -0,0 +1,47 @@
+import threading
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters and timing summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Record one sample (e.g. a duration in ms)"""
+        with self._lock:
+            summary = self._timings.get(name)
+            if summary is None:
+                summary = self._timings[name] = {'count': 0, 'total': 0.0, 'min': value, 'max': value}
+            summary['count'] += 1
+            summary['total'] += value
+            summary['min'] = min(summary['min'], value)
+            summary['max'] = max(summary['max'], value)
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self):
+        """Return counters and timing summaries as plain dicts"""
+        with self._lock:
+            timings = {
+                name: {
+                    'count': s['count'],
+                    'avg': round(s['total'] / s['count'], 2),
+                    'min': round(s['min'], 2),
+                    'max': round(s['max'], 2)
+                }
+                for name, s in self._timings.items()
+            }
+            return {'counters': dict(self._counters), 'timings': timings}
+
+
+# Shared registry for the web app
+metrics = MetricsRegistry()
@@ -1,345 +1,195 @@
+import json
+import math
+import os
+import sys
+from json.encoder import encode_basestring_ascii
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.config import Config
+from utils.disease_labels import disease_labels, display_name
+from utils.knowledge_base import KnowledgeBase
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation but still serialises like any other dict"""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Precomputed recommendation payloads are read-only')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+def freeze(value):
+    """Deep copy of a JSON-like value with dicts frozen and lists turned into tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class PrecomputedRecommendation:
+    """Immutable recommendation body for one (disease, severity band) plus its JSON bytes"""
+
+    __slots__ = ('payload', 'json', 'localized')
+
+    def __init__(self, payload):
+        self.payload = freeze(payload)
+        self.json = json.dumps(self.payload).encode()
+        self.localized = {}  # lang -> fully translated PrecomputedRecommendation
+
+    def render(self, fields):
+        """JSON bytes of the payload with per-request fields spliced onto the end"""
+        if not fields:
+            return self.json
+        if any(key in self.payload for key in fields):
+            return _ENCODER.encode({**self.payload, **fields}).encode()
+        spliced = ', '.join([_encode_field(key, value) for key, value in fields.items()])
+        return b''.join((self.json[:-1], b', ', spliced.encode(), b'}'))
+
+
+class Recommendation(dict):
+    """Per-request recommendation: a precomputed payload plus request fields such as confidence
+
+    Keys from the precomputed payload are read-only; new keys may be added
+    and are the only part encoded per request.
+    """
+
+    __slots__ = ('precomputed',)
+
+    def __init__(self, precomputed, **fields):
+        super().__init__(precomputed.payload)
+        self.precomputed = precomputed
+        for key, value in fields.items():
+            self[key] = value
+
+    def __setitem__(self, key, value):
+        if key in self.precomputed.payload:
+            raise TypeError(f"Precomputed recommendation field {key!r} is read-only")
+        super().__setitem__(key, value)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Use item assignment to add request fields to a recommendation')
+
+    __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+_ENCODER = json.JSONEncoder()
+
+
+def _encode_field(key, value):
+    """'"key": value' for one request field; scalars skip the general encoder"""
+    if isinstance(value, str):
+        encoded = encode_basestring_ascii(value)
+    elif value is None or value is True or value is False:
+        encoded = _ENCODER.encode(value)
+    elif isinstance(value, int):
+        encoded = int.__repr__(value)
+    elif isinstance(value, float) and math.isfinite(value):
+        encoded = float.__repr__(value)
+    else:
+        encoded = _ENCODER.encode(value)
+    return f"{encode_basestring_ascii(key)}: {encoded}"
+
+
+def recommendation_json(recommendation):
+    """Serialise a recommendation, reusing the pre-serialised body when it has one"""
+    if not isinstance(recommendation, Recommendation):
+        return _ENCODER.encode(recommendation).encode()
+    entry = recommendation.precomputed
+    fields = {key: recommendation[key] for key in recommendation.keys() - entry.payload.keys()}
+    return entry.render(fields)
+
+
+# Keys whose values are codes for clients rather than text for farmers
+UNTRANSLATED_KEYS = ('disease_code', 'severity', 'diagnosis_mode', 'confidence')
+
+
+def localize_recommendation(recommendation, lang, translations):
+    """Engine recommendation in ``lang`` from a TranslationCache; returns (recommendation, complete)
+
+    A fully translated payload is kept on its precomputed entry, so later
+    requests in that language reuse it (and its JSON bytes) directly.
+    Gemini-written recommendations are returned as they are, since those
+    are requested in the target language in the first place.
+    """
+    if not isinstance(recommendation, Recommendation):
+        return recommendation, True
+    entry = recommendation.precomputed
+    localized_entry = entry.localized.get(lang)
+    complete = True
+    if localized_entry is None:
+        payload, complete = translations.localize(entry.payload, lang, UNTRANSLATED_KEYS)
+        localized_entry = PrecomputedRecommendation(payload)
+        if complete:
+            entry.localized[lang] = localized_entry
+
+    fields = {key: recommendation[key] for key in recommendation.keys() - entry.payload.keys()}
+    return Recommendation(localized_entry, **fields), complete
+
+
 class DiseaseRecommendationEngine:
     """Generate treatment recommendations for diseases"""
+
+    # Every band _determine_severity can return
+    SEVERITY_BANDS = ('none', 'uncertain', 'low', 'medium', 'high')
+
+    # (disease_code, severity) -> PrecomputedRecommendation, built on first use and
+    # dropped on each knowledge base reload
+    _precomputed = {}
     
-    # Complete disease knowledge base
-    DISEASE_INFO = {
-        'Tomato___Early_blight': {
-            'description': 'Fungal disease causing dark spots with concentric rings on leaves',
-            'symptoms': [
-                'Dark brown spots with concentric rings (target-like pattern)',
-                'Yellow halo around spots',
-                'Lower leaves affected first',
-                'Leaf drop and defoliation',
-                'Small black lesions on stems'
-            ],
-            'treatment': {
-                'organic': [
-                    'Remove infected leaves immediately and destroy',
-                    'Apply neem oil spray (2ml/L water) weekly',
-                    'Use copper-based fungicides (Bordeaux mixture)',
-                    'Improve air circulation between plants',
-                    'Apply baking soda solution (1 tbsp/gallon)',
-                    'Use compost tea as foliar spray'
-                ],
-                'chemical': [
-                    'Chlorothalonil 500g/L at 2ml/L water',
-                    'Mancozeb 75% WP at 2g/L',
-                    'Azoxystrobin 250g/L at 1ml/L',
-                    'Apply every 7-10 days during infection',
-                    'Alternate fungicides to prevent resistance'
-                ]
-            },
-            'prevention': [
-                'Practice 3-year crop rotation',
-                'Use drip irrigation instead of overhead watering',
-                'Mulch to prevent soil splash onto leaves',
-                'Plant resistant varieties if available',
-                'Maintain proper plant spacing (45-60cm)',
-                'Remove crop debris after harvest',
-                'Avoid working with wet plants'
-            ],
-            'fertilizer': 'Balanced NPK 19-19-19, increase potassium for disease resistance'
-        },
-        
-        'Tomato___Late_blight': {
-            'description': 'Devastating fungal disease that can destroy entire crops within days',
-            'symptoms': [
-                'Water-soaked lesions on leaves',
-                'White fuzzy mold on leaf undersides',
-                'Rapid spread in cool, wet conditions',
-                'Brown spots on stems',
-                'Fruit rot with greasy appearance',
-                'Entire plant collapse possible'
-            ],
-            'treatment': {
-                'organic': [
-                    '🚨 URGENT: Remove and burn infected plants immediately',
-                    'Apply copper fungicide at first sign',
-                    'Increase plant spacing drastically',
-                    'Stop all overhead irrigation',
-                    'Apply Bacillus subtilis biological fungicide',
-                    'Remove volunteer plants from previous season'
-                ],
-                'chemical': [
-                    'Metalaxyl + Mancozeb at 2.5g/L (systemic action)',
-                    'Cymoxanil + Famoxadone at 2ml/L',
-                    'Dimethomorph 50% WP at 1g/L',
-                    'Apply every 5-7 days during outbreak',
-                    'Use preventive sprays in cool, humid weather'
-                ]
-            },
-            'prevention': [
-                'Use certified disease-free seeds only',
-                'Monitor weather forecasts (high risk at 15-25°C + rain)',
-                'Apply preventive fungicides before symptoms',
-                'Destroy volunteer potato and tomato plants',
-                'Plant in well-drained areas',
-                'Avoid planting near potatoes',
-                'Consider resistant varieties'
-            ],
-            'fertilizer': 'Reduce nitrogen, increase phosphorus (0-20-20) and potassium for stronger plants'
-        },
-        
-        'Tomato___Bacterial_spot': {
-            'description': 'Bacterial disease causing dark spots on leaves, stems, and fruit',
-            'symptoms': [
-                'Small dark spots with yellow halos',
-                'Spots may merge to form large lesions',
-                'Leaf edges turn yellow and die',
-                'Defoliation in severe cases',
-                'Raised spots on fruit',
-                'Reduced fruit quality'
-            ],
-            'treatment': {
-                'organic': [
-                    'Remove and destroy infected plant parts',
-                    'Apply copper-based bactericides (copper hydroxide)',
-                    'Avoid working with plants when wet',
-                    'Sanitize all tools with 10% bleach solution',
-                    'Improve air circulation',
-                    'Remove weeds that harbor bacteria'
-                ],
-                'chemical': [
-                    'Copper hydroxide at 2g/L water',
-                    'Streptomycin sulfate (where legally permitted)',
-                    'Copper + Mancozeb combination products',
-                    'Apply weekly during wet weather',
-                    'Begin applications preventively'
-                ]
-            },
-            'prevention': [
-                'Use resistant varieties (check local recommendations)',
-                'Use certified disease-free seeds',
-                'Avoid overhead irrigation completely',
-                'Disinfect tools between plants',
-                'Remove crop debris immediately after harvest',
-                '2-3 year rotation away from tomatoes/peppers',
-                'Control insect vectors'
-            ],
-            'fertilizer': 'Balanced NPK with adequate calcium (reduces susceptibility)'
-        },
-        
-        'Tomato___healthy': {
-            'description': '✅ Your tomato plant appears healthy with no visible disease symptoms!',
-            'symptoms': [
-                'Vibrant green leaves',
-                'No spots, lesions, or discoloration',
-                'Normal growth pattern',
-                'Good leaf structure'
-            ],
-            'treatment': {
-                'organic': [
-                    '✓ No treatment needed',
-                    'Continue regular care routine',
-                    'Monitor weekly for any changes',
-                    'Maintain good cultural practices'
-                ],
-                'chemical': []
-            },
-            'prevention': [
-                'Continue current care practices',
-                'Regular monitoring and inspection',
-                'Proper watering (1-2 inches per week)',
-                'Maintain balanced nutrition',
-                'Good air circulation',
-                'Mulch around plants',
-                'Practice crop rotation'
-            ],
-            'fertilizer': 'Continue balanced fertilization (10-10-10 or 5-10-10 NPK)'
-        },
-        
-        'Potato___Early_blight': {
-            'description': 'Common fungal disease affecting potato foliage and tubers',
-            'symptoms': [
-                'Target-like spots with concentric rings',
-                'Lower, older leaves affected first',
-                'Brown lesions on stems',
-                'Yellowing around lesions',
-                'Progressive upward movement',
-                'Tuber infection at harvest'
-            ],
-            'treatment': {
-                'organic': [
-                    'Remove infected lower leaves',
-                    'Apply baking soda spray (1 tbsp/gallon water)',
-                    'Use copper fungicide weekly',
-                    'Apply compost tea as foliar spray',
-                    'Maintain adequate soil moisture',
-                    'Improve plant nutrition'
-                ],
-                'chemical': [
-                    'Chlorothalonil 72% WP at 2g/L',
-                    'Azoxystrobin 23% SC at 1ml/L',
-                    'Mancozeb at labeled rates',
-                    'Apply every 7-10 days',
-                    'Begin at first symptom appearance'
-                ]
-            },
-            'prevention': [
-                'Use certified seed potatoes',
-                'Hill up soil around plants',
-                'Provide adequate nitrogen during growth',
-                'Water at base, not overhead',
-                'Remove volunteer potatoes',
-                'Destroy crop residue after harvest',
-                '3-4 year crop rotation'
-            ],
-            'fertilizer': 'NPK 10-10-20, adequate nitrogen during vegetative growth'
-        },
-        
-        'Potato___Late_blight': {
-            'description': 'Serious disease that caused the Irish Potato Famine - can destroy crops rapidly',
-            'symptoms': [
-                'Water-soaked dark lesions on leaves',
-                'White fungal growth on leaf undersides',
-                'Brown-black stems',
-                'Rapid plant collapse',
-                'Tuber rot with reddish-brown flesh',
-                'Foul odor from rotting tubers'
-            ],
-            'treatment': {
-                'organic': [
-                    '🚨 EMERGENCY ACTION REQUIRED',
-                    'Remove entire infected plants within 24 hours',
-                    'Do NOT compost infected material - burn it',
-                    'Apply copper fungicide to surrounding plants',
-                    'Harvest healthy tubers immediately if possible',
-                    'Hill up soil to protect tubers'
-                ],
-                'chemical': [
-                    'Metalaxyl-based systemic fungicides',
-                    'Cymoxanil at 2ml/L for curative action',
-                    'Chlorothalonil for protectant action',
-                    'Apply every 5 days during outbreaks',
-                    'Tank mix systemic + protectant'
-                ]
-            },
-            'prevention': [
-                'Use resistant varieties (check local recommendations)',
-                'Destroy volunteer plants and cull piles',
-                'Monitor weather (high risk: 15-25°C + high humidity)',
-                'Apply preventive sprays before symptoms',
-                'Hill plants properly',
-                'Ensure good drainage',
-                'Early harvest if disease appears nearby'
-            ],
-            'fertilizer': 'Balanced nutrition, avoid excess nitrogen which increases susceptibility'
-        },
-        
-        'Potato___healthy': {
-            'description': '✅ Your potato plant is healthy and disease-free!',
-            'symptoms': [
-                'Dark green, vigorous foliage',
-                'No lesions or spots',
-                'Normal plant structure',
-                'Good tuber development expected'
-            ],
-            'treatment': {
-                'organic': [
-                    '✓ No treatment necessary',
-                    'Continue monitoring',
-                    'Maintain current practices'
-                ],
-                'chemical': []
-            },
-            'prevention': [
-                'Continue proper hilling',
-                'Consistent watering',
-                'Monitor for pests',
-                'Maintain nutrition',
-                'Regular inspection',
-                'Good weed control'
-            ],
-            'fertilizer': 'Continue balanced program, increase potassium as tubers develop'
-        },
-        
-        'Pepper_bell___Bacterial_spot': {
-            'description': 'Bacterial disease causing spots on leaves and fruit of pepper plants',
-            'symptoms': [
-                'Small, dark spots on leaves',
-                'Yellow halos around spots',
-                'Leaf drop and defoliation',
-                'Raised spots on fruit',
-                'Fruit may become unmarketable',
-                'Reduced yields'
-            ],
-            'treatment': {
-                'organic': [
-                    'Remove infected leaves promptly',
-                    'Apply copper bactericide (copper hydroxide)',
-                    'Avoid overhead watering',
-                    'Sanitize hands and tools frequently',
-                    'Improve air circulation',
-                    'Remove plant debris'
-                ],
-                'chemical': [
-                    'Copper hydroxide at 2-3g/L',
-                    'Fixed copper products',
-                    'Apply weekly during wet periods',
-                    'Begin preventively at transplanting',
-                    'Continue through fruit set'
-                ]
-            },
-            'prevention': [
-                'Use disease-free transplants',
-                'Hot water seed treatment (50°C for 25 min)',
-                'Drip irrigation only',
-                'Wide plant spacing (45-60cm)',
-                '3-year rotation',
-                'Control weeds',
-                'Disinfect stakes and cages'
-            ],
-            'fertilizer': 'Balanced NPK, adequate calcium for fruit quality'
-        },
-        
-        'Pepper_bell___healthy': {
-            'description': '✅ Your pepper plant is healthy with no disease symptoms!',
-            'symptoms': [
-                'Dark green leaves',
-                'No spots or lesions',
-                'Good fruit set',
-                'Normal growth'
-            ],
-            'treatment': {
-                'organic': [
-                    '✓ Continue current care',
-                    'Regular monitoring',
-                    'Maintain practices'
-                ],
-                'chemical': []
-            },
-            'prevention': [
-                'Consistent watering',
-                'Proper fertilization',
-                'Pest monitoring',
-                'Good air flow',
-                'Mulching',
-                'Support plants as needed'
-            ],
-            'fertilizer': 'Balanced NPK, increase potassium during fruiting (5-10-10)'
-        }
-    }
+    # Disease knowledge base, read lazily from the versioned files in Config.KNOWLEDGE_DIR
+    DISEASE_INFO = KnowledgeBase(Config.KNOWLEDGE_DIR, Config.KNOWLEDGE_RELOAD_SECONDS)
     
     @classmethod
     def get_recommendation(cls, disease_code, confidence):
         """Get comprehensive recommendation for a disease"""
         
+        cls.DISEASE_INFO.maybe_reload()
+
+        # Any spelling of a known label (model, Gemini, display name) maps to its DISEASE_INFO key
+        disease_code = disease_labels.get(disease_code, disease_code)
+
         # Check if we have info for this disease
         if disease_code not in cls.DISEASE_INFO:
             return cls._generic_recommendation(disease_code, confidence)
         
-        info = cls.DISEASE_INFO[disease_code]
-        
         # Determine severity based on confidence
         severity = cls._determine_severity(disease_code, confidence)
         
+        # Everything but the confidence is fixed per (disease, severity band)
+        return Recommendation(cls.precomputed(disease_code, severity), confidence=confidence)
+
+    @classmethod
+    def precomputed(cls, disease_code, severity):
+        """Shared PrecomputedRecommendation for a DISEASE_INFO key and severity band"""
+        # A reload swaps in a new table; an entry built from the old one lands in the old one
+        table = cls._precomputed
+        key = (disease_code, severity)
+        entry = table.get(key)
+        if entry is None:
+            entry = table.setdefault(key, PrecomputedRecommendation(cls._build_payload(disease_code, severity)))
+        return entry
+
+    @classmethod
+    def clear_precomputed(cls, knowledge_base=None):
+        """Drop memoized payloads, e.g. after the knowledge base was reloaded"""
+        cls._precomputed = {}
+
+    @classmethod
+    def _build_payload(cls, disease_code, severity, info=None):
+        """Recommendation body for one disease and severity band, without per-request fields"""
+        info = info or cls.DISEASE_INFO[disease_code]
+        
         # Clean disease name for display
-        disease_name = disease_code.replace('___', ' - ').replace('_', ' ')
+        disease_name = display_name(disease_code)
         
         return {
             'disease': disease_name,
             'disease_code': disease_code,
-            'confidence': confidence,
             'severity': severity,
             'description': info['description'],
             'symptoms': info['symptoms'],
@@ -468,7 +318,7 @@ class DiseaseRecommendationEngine:
     @classmethod
     def _generic_recommendation(cls, disease_code, confidence):
         """Generic recommendation for unlisted diseases"""
-        disease_name = disease_code.replace('___', ' - ').replace('_', ' ')
+        disease_name = display_name(disease_code)
         
         return {
             'disease': disease_name,
@@ -505,6 +355,8 @@ class DiseaseRecommendationEngine:
             }
         }
 
+DiseaseRecommendationEngine.DISEASE_INFO.on_reload(DiseaseRecommendationEngine.clear_precomputed)
+
 # Quick test
 if __name__ == '__main__':
     print("Testing Recommendation Engine...")
@@ -0,0 +1,200 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def needs_translation(text):
+    """Strings with no letters ('30-70%', '19-19-19') are the same in every language"""
+    return any(ch.isalpha() for ch in text)
+
+
+class TranslationCache:
+    """Persistent translations of fixed texts, keyed by content hash and language
+
+    Lookups never call upstream: a string without a stored translation comes
+    back unchanged and is queued as pending, and ``fill_pending`` (run in the
+    background or by the warm-up script) translates pending strings in
+    batches with the ``translate(texts, lang)`` callable. Because the key is
+    the hash of the English text, an edited knowledge-base entry gets a fresh
+    translation while unchanged strings are shared across every payload that
+    uses them.
+
+    Backed by SQLite (one connection per thread, WAL journal) so all worker
+    processes share one cache; recent lookups are also kept in memory.
+    """
+
+    def __init__(self, path, translate=None, batch_size=40, max_pending=5000, memory_entries=20000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.translate = translate
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.memory_entries = memory_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._fill_lock = threading.Lock()
+        self._memory = {}    # (hash, lang) -> translation
+        self._pending = {}   # lang -> {hash: text}
+        self._counters = {'hits': 0, 'misses': 0, 'translated': 0, 'failed_batches': 0}
+
+        with self._connection() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS translations ('
+                ' hash TEXT NOT NULL, lang TEXT NOT NULL, source TEXT NOT NULL,'
+                ' text TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (hash, lang))'
+            )
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=10)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    # -- Lookups -----------------------------------------------------------
+
+    def lookup(self, texts, lang):
+        """{text: translation} for the texts already translated into ``lang``"""
+        found = {}
+        missing = {}
+        hashed = [(content_hash(text), text) for text in texts]
+        with self._lock:
+            for key, text in hashed:
+                translation = self._memory.get((key, lang))
+                if translation is None:
+                    missing[key] = text
+                else:
+                    found[text] = translation
+
+        if missing:
+            keys = list(missing)
+            db = self._connection()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = db.execute(
+                    f"SELECT hash, text FROM translations WHERE lang = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    [lang, *chunk]
+                ).fetchall()
+                for key, translation in rows:
+                    found[missing.pop(key)] = translation
+                self._remember(lang, rows)
+
+        with self._lock:
+            self._counters['hits'] += len(found)
+            self._counters['misses'] += len(missing)
+            pending = self._pending.setdefault(lang, {})
+            for key, text in missing.items():
+                if len(pending) < self.max_pending:
+                    pending[key] = text
+        return found
+
+    def _remember(self, lang, pairs):
+        """Keep (hash, translation) pairs in the in-process layer"""
+        with self._lock:
+            for key, translation in pairs:
+                if len(self._memory) >= self.memory_entries:
+                    self._memory.clear()
+                self._memory[(key, lang)] = translation
+
+    def localize(self, value, lang, skip_keys=()):
+        """Translate every string in a JSON-like value from the cache
+
+        Returns (localized_value, complete); ``complete`` is False when some
+        strings had no translation yet and were left in English.
+        """
+        strings = set()
+        _collect_strings(value, skip_keys, strings)
+        found = self.lookup(strings, lang)
+        return _replace_strings(value, skip_keys, found), len(found) == len(strings)
+
+    def has_pending(self):
+        with self._lock:
+            return any(self._pending.values())
+
+    # -- Filling -----------------------------------------------------------
+
+    def store(self, lang, pairs):
+        """Save (source, translation) pairs"""
+        now = time.time()
+        rows = [(content_hash(source), lang, source, translation, now) for source, translation in pairs]
+        db = self._connection()
+        with db:
+            db.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)', rows)
+        self._remember(lang, [(key, translation) for key, _, _, translation, _ in rows])
+
+    def fill_pending(self):
+        """Translate everything queued by cache misses; returns the number of strings stored"""
+        if self.translate is None:
+            return 0
+        stored = 0
+        with self._fill_lock:
+            while True:
+                with self._lock:
+                    lang = next((lang for lang, pending in self._pending.items() if pending), None)
+                    if lang is None:
+                        return stored
+                    pending = self._pending[lang]
+                    batch = [pending.pop(key) for key in list(pending)[:self.batch_size]]
+                try:
+                    translations = self.translate(batch, lang)
+                    if len(translations) != len(batch):
+                        raise ValueError(f"Expected {len(batch)} translations, got {len(translations)}")
+                except Exception as e:
+                    # Drop the batch; the strings are queued again the next time they are requested
+                    print(f"⚠️ Translation batch to {lang} failed: {e}")
+                    with self._lock:
+                        self._counters['failed_batches'] += 1
+                    continue
+                self.store(lang, zip(batch, translations))
+                stored += len(batch)
+                with self._lock:
+                    self._counters['translated'] += len(batch)
+
+    def warm(self, texts, lang):
+        """Translate any of ``texts`` not cached yet; returns the number translated"""
+        self.lookup({text for text in texts if needs_translation(text)}, lang)
+        return self.fill_pending()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            stored = self._connection().execute(
+                'SELECT lang, COUNT(*) FROM translations GROUP BY lang'
+            ).fetchall()
+            return {
+                'hit_rate': round(self._counters['hits'] / lookups, 3) if lookups else 0.0,
+                'pending': sum(len(pending) for pending in self._pending.values()),
+                'stored': dict(stored),
+                **self._counters
+            }
+
+
+def _collect_strings(value, skip_keys, strings):
+    if isinstance(value, str):
+        if needs_translation(value):
+            strings.add(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key not in skip_keys:
+                _collect_strings(item, skip_keys, strings)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_strings(item, skip_keys, strings)
+
+
+def _replace_strings(value, skip_keys, found):
+    if isinstance(value, str):
+        return found.get(value, value)
+    if isinstance(value, dict):
+        return {key: item if key in skip_keys else _replace_strings(item, skip_keys, found)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_strings(item, skip_keys, found) for item in value]
+    return value